@@ -0,0 +1,112 @@
+"""
+Benchmark the FuzzyInsightExtractor (bigram candidate filter over the vocabulary
+of the transcript) against a brute-force comparison of every tracker word with
+every transcript word, on synthetic transcripts with misspelled words. The exact
+SimpleRegexInsightExtractor shows how many matches the misspellings hide.
+
+Usage:
+    python benchmarks/bench_fuzzy_extractor.py [--minutes 5 15 60] [--trackers 10 50] [--misspelled 0.1]
+"""
+
+import argparse
+import random
+import re
+import time
+from typing import Callable, List, Tuple
+
+import synthetic
+from extras.extractors import SimpleRegexInsightExtractor
+from extras.fuzzy_extractors import FuzzyInsightExtractor, edit_distance
+
+WORD = re.compile(r"\w+")
+
+
+def misspell(transcript: str, rate: float, seed: int = 0) -> str:
+    """Replace one letter of a share of the words of at least 4 letters."""
+    rng = random.Random(seed)
+
+    def replace(matched: re.Match) -> str:
+        word = matched.group()
+        if len(word) < 4 or rng.random() >= rate:
+            return word
+        position = rng.randrange(len(word))
+        return word[:position] + rng.choice("aeiouy") + word[position + 1 :]
+
+    return WORD.sub(replace, transcript)
+
+
+def brute_force(
+    transcript: str, trackers: List[str], extractor: FuzzyInsightExtractor
+) -> List[Tuple[int, str, int]]:
+    """Compare every tracker word with every word of every sentence."""
+    matches = []
+    for sentence_index, sentence in enumerate(transcript.split(".")):
+        tokens = [token.lower() for token in WORD.findall(sentence)]
+        for tracker in trackers:
+            words = WORD.findall(tracker.lower())
+            for first in range(len(tokens) - len(words) + 1):
+                distance = 0
+                for word, token in zip(words, tokens[first:]):
+                    allowed = (
+                        extractor.max_distance
+                        if len(word) >= extractor.min_word_length
+                        else 0
+                    )
+                    word_distance = edit_distance(word, token, allowed)
+                    if word_distance > allowed:
+                        break
+                    distance += word_distance
+                else:
+                    matches.append((sentence_index, tracker, distance))
+    return sorted(matches)
+
+
+def best_of(repeat: int, function: Callable, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=int, nargs="+", default=[5, 15, 60])
+    parser.add_argument("--trackers", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--misspelled", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    regex, fuzzy = SimpleRegexInsightExtractor(), FuzzyInsightExtractor()
+    print(
+        f"{'minutes':>8} {'trackers':>9} {'brute [s]':>10} {'fuzzy [s]':>10} "
+        f"{'speedup':>8} {'same':>6} {'regex hits':>11} {'fuzzy hits':>11}"
+    )
+    for minutes in args.minutes:
+        transcript = misspell(
+            synthetic.transcript_for_minutes(minutes), args.misspelled
+        )
+        for count in args.trackers:
+            trackers = synthetic.synthetic_trackers(count)
+            brute = best_of(args.repeat, brute_force, transcript, trackers, fuzzy)
+            indexed = best_of(args.repeat, fuzzy.extract_insights, transcript, trackers)
+            insights = fuzzy.extract_insights(transcript, trackers)
+            same = brute_force(transcript, trackers, fuzzy) == sorted(
+                (
+                    insight["sentence_index"],
+                    insight["tracker_value"],
+                    insight["distance"],
+                )
+                for insight in insights
+            )
+            print(
+                f"{minutes:>8} {count:>9} {brute:>10.4f} {indexed:>10.4f} "
+                f"{brute / indexed:>7.1f}x {str(same):>6} "
+                f"{len(regex.extract_insights(transcript, trackers)):>11} "
+                f"{len(insights):>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
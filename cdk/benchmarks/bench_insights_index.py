@@ -0,0 +1,85 @@
+"""
+Benchmark answering trackers from a prebuilt insights index against searching
+the full transcript, for the regex and (with --spacy) the spaCy extractor.
+
+Usage:
+    python benchmarks/bench_insights_index.py [--minutes 15 60 180] [--trackers 10 200] [--spacy]
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, List
+
+import synthetic  # noqa: F401  (makes the lambda package importable)
+from extras.extractors import InsightExtractor, SimpleRegexInsightExtractor
+
+
+def best_of(repeat: int, function: Callable, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(
+    name: str,
+    extractor: InsightExtractor,
+    minutes: List[int],
+    tracker_counts: List[int],
+    repeat: int,
+) -> None:
+    for count_minutes in minutes:
+        transcript = synthetic.transcript_for_minutes(count_minutes)
+        build = best_of(repeat, extractor.build_index, transcript)
+        index = extractor.build_index(transcript)
+        size = len(json.dumps(extractor.dump_index(index)))
+        for count in tracker_counts:
+            trackers = synthetic.synthetic_trackers(count)
+            scan = best_of(repeat, extractor.extract_insights, transcript, trackers)
+            lookup = best_of(
+                repeat,
+                extractor.extract_insights_from_index,
+                transcript,
+                index,
+                trackers,
+            )
+            same = extractor.extract_insights(
+                transcript, trackers
+            ) == extractor.extract_insights_from_index(transcript, index, trackers)
+            print(
+                f"{name:>9} {count_minutes:>8} {count:>9} {build:>10.4f} "
+                f"{size / 1024:>11.0f} {scan:>9.4f} {lookup:>11.4f} "
+                f"{scan / lookup:>7.1f}x {str(same):>6}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=int, nargs="+", default=[15, 60, 180])
+    parser.add_argument("--trackers", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--spacy", action="store_true")
+    args = parser.parse_args()
+
+    print(
+        f"{'extractor':>9} {'minutes':>8} {'trackers':>9} {'build [s]':>10} "
+        f"{'index [KiB]':>11} {'scan [s]':>9} {'lookup [s]':>11} {'speedup':>8} {'same':>6}"
+    )
+    run(
+        "regex",
+        SimpleRegexInsightExtractor(),
+        args.minutes,
+        args.trackers,
+        args.repeat,
+    )
+    if args.spacy:
+        from extras.extractors import create_spacy_extractor
+
+        run("spacy", create_spacy_extractor(), args.minutes, args.trackers, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,489 @@
+"""
+Benchmark and load-test `lambda_handler` end to end, with the S3 bucket and the
+Transcribe jobs held in memory (see stubbed_aws.py), on synthetic Transcribe
+outputs of several lengths and tracker counts:
+- requests: the latency of a request with cold caches (nothing stored next to
+  the Transcribe output yet, empty in-process caches) and of the same request
+  repeated in the warm container, split into stages: parse, validate, status
+  (Transcribe job lookup), fetch (transcript and word items), index, extract and
+  serialize; and the peak memory allocated by the request (tracemalloc);
+- batch: requests for many interactions at once, with an emulated AWS latency;
+- startup: in a fresh interpreter, like a new Lambda container, the import of
+  `lambda_function`, the first request (which creates the extractor) and a
+  warm request, and the peak RSS.
+
+Stages are timed by wrapping the functions `lambda_handler` calls, without their
+nested stages. The lookups of a batch run on a thread pool and are counted in
+its status stage.
+
+The results are saved as JSON (--output) and compared with a previous run
+(--compare): the median latencies more than --tolerance slower are reported as
+regressions and the script exits with status 1.
+
+Usage:
+    python benchmarks/bench_lambda_handler.py [--minutes 5 60] [--trackers 10 100]
+        [--extractors regex spacy] [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import synthetic
+
+# the settings of the deployed stack, see lambda_environment in cdk_stack.py
+STACK_ENVIRONMENT = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "TRANSCRIPT_CACHE_S3_PREFIX": "transcripts-cache/",
+    "TRANSCRIPT_RESULTS_S3_PREFIX": "transcripts-results/",
+    "INSIGHTS_INDEX_ENABLED": "True",
+    "TRANSCRIPT_ITEMS_ENABLED": "True",
+    "METRICS_ENABLED": "True",
+}
+for name, value in STACK_ENVIRONMENT.items():
+    os.environ.setdefault(name, value)
+
+import lambda_function  # noqa: E402
+from extras import handlers  # noqa: E402
+from extras.insights_index import INSIGHTS_INDEX_CACHE  # noqa: E402
+from extras.metrics import METRICS  # noqa: E402
+from extras.response import ResponseAWS  # noqa: E402
+from extras.transcript_cache import TRANSCRIPT_CACHE  # noqa: E402
+from extras.transcript_items import TRANSCRIPT_ITEMS_CACHE  # noqa: E402
+from stubbed_aws import StubbedAWS  # noqa: E402
+
+BUCKET = "benchmark-bucket"
+HEADERS = {
+    "regex": {},
+    "fuzzy": {"X-Fuzzy": "True"},
+    "spacy": {"X-Spacy": "True"},
+    "static": {"X-Spacy": "static"},
+}
+STAGES = ("parse", "validate", "status", "fetch", "index", "extract", "serialize")
+
+STARTUP = """
+import json, resource, sys, time
+start = time.perf_counter()
+import lambda_function
+imported = time.perf_counter()
+sys.path.insert(0, {benchmarks!r})
+import bench_lambda_handler as bench
+aws = bench.StubbedAWS()
+aws.attach(lambda_function.s3)
+aws.attach(lambda_function.transcribe)
+event = bench.prepare_interaction(aws, {minutes}, {trackers}, {extractor!r})
+answering = time.perf_counter()
+first = lambda_function.lambda_handler(event, None)
+answered = time.perf_counter()
+lambda_function.lambda_handler(event, None)
+warm = time.perf_counter()
+if first["statusCode"] != 200:
+    raise SystemExit(first["body"])
+print(json.dumps({{
+    "import_s": imported - start,
+    "first_request_s": answered - answering,
+    "warm_request_s": warm - answered,
+    "rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+
+class StageTimer:
+    """
+    Times the functions called by `lambda_handler`, each under its stage. The time
+    of a nested stage is left out of the stage calling it. Only the calls of the
+    thread running the request are timed.
+    """
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self._stack: List[List[float]] = []
+        self._thread: Optional[int] = None
+
+    def start(self) -> None:
+        self.durations = dict.fromkeys(STAGES, 0.0)
+        self._stack = []
+        self._thread = threading.get_ident()
+
+    def wrap(self, stage: str, function: Callable) -> Callable:
+        @wraps(function)
+        def timed(*args, **kwargs):
+            if threading.get_ident() != self._thread:
+                return function(*args, **kwargs)
+            # [nested time] of the running call
+            self._stack.append([0.0])
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                nested = self._stack.pop()[0]
+                self.durations[stage] += elapsed - nested
+                if self._stack:
+                    self._stack[-1][0] += elapsed
+
+        return timed
+
+
+def instrument(timer: StageTimer) -> None:
+    patches = {
+        lambda_function: {
+            "parse_body": "parse",
+            "validate_input": "validate",
+            "validate_trackers": "validate",
+            "validate_interaction_urls": "validate",
+            "parse_s3_uri": "validate",
+            "handle_transcription_job": "status",
+            "handle_transcription_jobs_batch": "status",
+            "get_insights_index": "index",
+            "handle_insights_extraction": "extract",
+        },
+        handlers: {
+            "get_insights_index": "index",
+            "get_fresh_transcript": "fetch",
+            "get_transcript_result": "fetch",
+            "get_cached_transcript": "fetch",
+            "handle_transcript_text_from_s3_job": "fetch",
+            "handle_transcript_from_s3_job": "fetch",
+            "handle_transcript_items": "fetch",
+            "cache_transcript": "fetch",
+        },
+    }
+    for module, functions in patches.items():
+        for name, stage in functions.items():
+            setattr(module, name, timer.wrap(stage, getattr(module, name)))
+    ResponseAWS.create_response = timer.wrap("serialize", ResponseAWS.create_response)
+
+
+def interaction_key(minutes: int, index: int = 0) -> str:
+    return f"interactions/call-{minutes}min-{index}.mp3"
+
+
+def prepare_interaction(
+    aws: StubbedAWS,
+    minutes: int,
+    trackers: int,
+    extractor: str,
+    index: int = 0,
+) -> Dict[str, Any]:
+    """
+    Store an audio file and the completed transcription of a call.
+
+    Returns:
+        Dict[str, Any]: The API Gateway event of a request for the call.
+    """
+    key = interaction_key(minutes, index)
+    job_name = handlers.transcription_job_name(BUCKET, key)
+    aws.put_object(BUCKET, key, b"ID3" + bytes(1024))
+    aws.put_object(
+        BUCKET,
+        f"{job_name}.json",
+        synthetic.synthetic_transcribe_output_bytes(minutes, seed=index),
+        "application/json",
+    )
+    aws.complete_job(job_name, f"s3://{BUCKET}/{key}")
+    return request_event(
+        {
+            "interaction_url": f"s3://{BUCKET}/{key}",
+            "trackers": synthetic.synthetic_trackers(trackers),
+        },
+        extractor,
+    )
+
+
+def request_event(body: Dict[str, Any], extractor: str) -> Dict[str, Any]:
+    return {"headers": dict(HEADERS[extractor]), "body": json.dumps(body)}
+
+
+def clear_caches(aws: StubbedAWS) -> None:
+    """Forget all the copies of the transcripts made by previous requests."""
+    for cache in (TRANSCRIPT_CACHE, INSIGHTS_INDEX_CACHE, TRANSCRIPT_ITEMS_CACHE):
+        cache.clear()
+    for bucket, key in list(aws.objects):
+        # keeps the audio files and the Transcribe outputs
+        if not (key.endswith(".json") or key.startswith("interactions/")):
+            aws.delete_object(bucket, key)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {
+        "p50": statistics.median(values),
+        "p95": values[min(len(values) - 1, round(0.95 * (len(values) - 1)))],
+        "mean": statistics.fmean(values),
+    }
+
+
+def run_requests(
+    aws: StubbedAWS,
+    timer: StageTimer,
+    event: Dict[str, Any],
+    cold: bool,
+    repeat: int,
+) -> Dict[str, Any]:
+    totals, stages, calls = [], {stage: [] for stage in STAGES}, []
+    lambda_function.lambda_handler(event, None)
+    for _ in range(repeat):
+        if cold:
+            clear_caches(aws)
+        calls_before = sum(aws.calls.values())
+        timer.start()
+        started = time.perf_counter()
+        response = lambda_function.lambda_handler(event, None)
+        totals.append((time.perf_counter() - started) * 1000)
+        if response["statusCode"] != 200:
+            raise RuntimeError(f"The request failed: {response['body']}")
+        for stage, duration in timer.durations.items():
+            stages[stage].append(duration * 1000)
+        calls.append(sum(aws.calls.values()) - calls_before)
+
+    if cold:
+        clear_caches(aws)
+    tracemalloc.start()
+    lambda_function.lambda_handler(event, None)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "total_ms": summarize(totals),
+        "stages_ms": {stage: statistics.median(stages[stage]) for stage in STAGES},
+        "aws_calls": statistics.median(calls),
+        "peak_alloc_mib": peak / 2**20,
+    }
+
+
+def benchmark_requests(args: argparse.Namespace, timer: StageTimer) -> List[Dict]:
+    results = []
+    print(
+        f"{'extractor':>9} {'minutes':>8} {'trackers':>9} {'caches':>6} "
+        f"{'p50 [ms]':>9} {'p95 [ms]':>9} {'calls':>6} {'peak [MiB]':>11}  stages p50 [ms]"
+    )
+    for extractor in args.extractors:
+        for minutes in args.minutes:
+            for trackers in args.trackers:
+                aws = StubbedAWS()
+                aws.attach(lambda_function.s3)
+                aws.attach(lambda_function.transcribe)
+                event = prepare_interaction(aws, minutes, trackers, extractor)
+                for cold in (True, False):
+                    entry = {
+                        "extractor": extractor,
+                        "minutes": minutes,
+                        "trackers": trackers,
+                        "caches": "cold" if cold else "warm",
+                    }
+                    try:
+                        entry.update(run_requests(aws, timer, event, cold, args.repeat))
+                    except Exception as e:
+                        entry["error"] = f"{type(e).__name__}: {e}"
+                        print(f"{extractor:>9} {minutes:>8} {trackers:>9} skipped: {e}")
+                        results.append(entry)
+                        break
+                    results.append(entry)
+                    print(
+                        f"{extractor:>9} {minutes:>8} {trackers:>9} {entry['caches']:>6} "
+                        f"{entry['total_ms']['p50']:>9.2f} {entry['total_ms']['p95']:>9.2f} "
+                        f"{entry['aws_calls']:>6.0f} {entry['peak_alloc_mib']:>11.1f}  "
+                        + " ".join(
+                            f"{stage}={duration:.2f}"
+                            for stage, duration in entry["stages_ms"].items()
+                        )
+                    )
+                aws.detach(lambda_function.s3)
+                aws.detach(lambda_function.transcribe)
+    return results
+
+
+def benchmark_batch(args: argparse.Namespace) -> List[Dict]:
+    results = []
+    print(
+        f"\n{'interactions':>12} {'AWS latency [ms]':>17} {'p50 [ms]':>9} "
+        f"{'per interaction [ms]':>21}"
+    )
+    for count in args.batch:
+        aws = StubbedAWS(latency=args.aws_latency / 1000)
+        aws.attach(lambda_function.s3)
+        aws.attach(lambda_function.transcribe)
+        for index in range(count):
+            prepare_interaction(aws, args.batch_minutes, 0, "regex", index)
+        event = request_event(
+            {
+                "interaction_urls": [
+                    f"s3://{BUCKET}/{interaction_key(args.batch_minutes, index)}"
+                    for index in range(count)
+                ],
+                "trackers": synthetic.synthetic_trackers(args.trackers[0]),
+            },
+            "regex",
+        )
+        totals = []
+        for _ in range(args.repeat):
+            clear_caches(aws)
+            started = time.perf_counter()
+            lambda_function.lambda_handler(event, None)
+            totals.append((time.perf_counter() - started) * 1000)
+        aws.detach(lambda_function.s3)
+        aws.detach(lambda_function.transcribe)
+        entry = {
+            "interactions": count,
+            "aws_latency_ms": args.aws_latency,
+            "total_ms": summarize(totals),
+        }
+        results.append(entry)
+        print(
+            f"{count:>12} {args.aws_latency:>17.1f} {entry['total_ms']['p50']:>9.1f} "
+            f"{entry['total_ms']['p50'] / count:>21.2f}"
+        )
+    return results
+
+
+def benchmark_startup(args: argparse.Namespace) -> List[Dict]:
+    results = []
+    print(
+        f"\n{'extractor':>9} {'import [s]':>11} {'first request [s]':>18} "
+        f"{'warm request [s]':>17} {'RSS [MiB]':>10}"
+    )
+    code = STARTUP.format(
+        benchmarks=os.path.dirname(os.path.abspath(__file__)),
+        minutes=args.minutes[0],
+        trackers=args.trackers[0],
+        extractor="{extractor}",
+    )
+    for extractor in args.extractors:
+        runs, error = [], None
+        for _ in range(args.startup_repeat):
+            process = subprocess.run(
+                [sys.executable, "-c", code.replace("{extractor}", extractor)],
+                cwd=synthetic.LAMBDA_DIR,
+                env={**os.environ, **STACK_ENVIRONMENT},
+                capture_output=True,
+                text=True,
+            )
+            if process.returncode != 0:
+                error = (process.stderr.strip().splitlines() or ["failed"])[-1]
+                break
+            runs.append(json.loads(process.stdout.strip().splitlines()[-1]))
+        entry: Dict[str, Any] = {"extractor": extractor}
+        if error:
+            entry["error"] = error
+            print(f"{extractor:>9} skipped: {error}")
+        else:
+            entry.update(
+                {
+                    field: statistics.median(run[field] for run in runs)
+                    for field in runs[0]
+                }
+            )
+            print(
+                f"{extractor:>9} {entry['import_s']:>11.3f} "
+                f"{entry['first_request_s']:>18.3f} {entry['warm_request_s']:>17.4f} "
+                f"{entry['rss_mib']:>10.1f}"
+            )
+        results.append(entry)
+    return results
+
+
+def measurements(results: Dict[str, Any]) -> Dict[Tuple, float]:
+    """The comparable latencies of a result file, by section and parameters."""
+    values = {}
+    for entry in results.get("requests", []):
+        if "error" not in entry:
+            key = ("requests", entry["extractor"], entry["minutes"])
+            key += (entry["trackers"], entry["caches"])
+            values[key] = entry["total_ms"]["p50"]
+    for entry in results.get("batch", []):
+        values[("batch", entry["interactions"], entry["aws_latency_ms"])] = entry[
+            "total_ms"
+        ]["p50"]
+    for entry in results.get("startup", []):
+        if "error" not in entry:
+            values[("startup", entry["extractor"], "import")] = entry["import_s"]
+            values[("startup", entry["extractor"], "first request")] = entry[
+                "first_request_s"
+            ]
+    return values
+
+
+def compare(results: Dict[str, Any], baseline_path: str, tolerance: float) -> bool:
+    """
+    Returns:
+        bool: Whether a measurement regressed by more than the tolerance.
+    """
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = measurements(json.load(baseline_file))
+    regressed = False
+    print(f"\nCompared with {baseline_path}:")
+    for key, value in measurements(results).items():
+        if key not in baseline or not baseline[key]:
+            continue
+        ratio = value / baseline[key]
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag, regressed = "  REGRESSION", True
+        print(f"  {' '.join(map(str, key)):<45} {ratio:>6.2f}x{flag}")
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--minutes", type=int, nargs="+", default=[5, 60])
+    parser.add_argument("--trackers", type=int, nargs="+", default=[10, 100])
+    parser.add_argument(
+        "--extractors",
+        nargs="+",
+        choices=sorted(HEADERS),
+        default=["regex", "spacy"],
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--batch", type=int, nargs="*", default=[10, 100])
+    parser.add_argument("--batch-minutes", type=int, default=5)
+    parser.add_argument("--aws-latency", type=float, default=20.0)
+    parser.add_argument("--startup-repeat", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    timer = StageTimer()
+    instrument(timer)
+    # the metrics are written as in the Lambda, but not to the console
+    METRICS.output = open(os.devnull, "w")
+    results = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "arguments": vars(args),
+        },
+        "requests": benchmark_requests(args, timer),
+        "batch": benchmark_batch(args),
+        "startup": benchmark_startup(args),
+    }
+    results["meta"]["max_rss_mib"] = (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+        print(f"\nResults saved to {args.output}")
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark the scaling of the parallel extraction from 1 to N worker processes
+on a synthetic long transcript, for the regex and (with --spacy) the spaCy
+extractor. One worker is the single-process `extract_insights`.
+
+Usage:
+    python benchmarks/bench_parallel_extraction.py [--minutes 180] [--trackers 50] [--workers 1 2 4 8] [--spacy]
+"""
+
+import argparse
+import os
+import time
+from typing import Callable, List
+
+import synthetic  # noqa: F401  (makes the lambda package importable)
+from extras.extractors import InsightExtractor, SimpleRegexInsightExtractor
+from extras.parallel import extract_insights_parallel
+
+
+def best_of(repeat: int, function: Callable, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(
+    name: str,
+    extractor: InsightExtractor,
+    transcript: str,
+    trackers: List[str],
+    workers: List[int],
+    repeat: int,
+) -> None:
+    single = best_of(repeat, extractor.extract_insights, transcript, trackers)
+    expected = extractor.extract_insights(transcript, trackers)
+    for count in workers:
+        if count == 1:
+            elapsed, same = single, True
+        else:
+            elapsed = best_of(
+                repeat,
+                extract_insights_parallel,
+                extractor,
+                transcript,
+                trackers,
+                None,
+                count,
+            )
+            same = (
+                extract_insights_parallel(extractor, transcript, trackers, None, count)
+                == expected
+            )
+        print(
+            f"{name:>9} {count:>8} {elapsed:>9.4f} {single / elapsed:>7.2f}x "
+            f"{str(same):>6}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=int, default=180)
+    parser.add_argument("--trackers", type=int, default=50)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--spacy", action="store_true")
+    args = parser.parse_args()
+
+    transcript = synthetic.transcript_for_minutes(args.minutes)
+    trackers = synthetic.synthetic_trackers(args.trackers)
+    print(
+        f"{len(transcript)} characters, {len(trackers)} trackers, "
+        f"{os.cpu_count()} CPUs"
+    )
+    print(f"{'extractor':>9} {'workers':>8} {'time [s]':>9} {'speedup':>8} {'same':>6}")
+    run(
+        "regex",
+        SimpleRegexInsightExtractor(),
+        transcript,
+        trackers,
+        args.workers,
+        args.repeat,
+    )
+    if args.spacy:
+        from extras.extractors import create_spacy_extractor
+
+        # spaCy segments every shard on its own, `same` may be False near boundaries
+        run(
+            "spacy",
+            create_spacy_extractor(),
+            transcript,
+            trackers,
+            args.workers,
+            args.repeat,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark the phrase matching of the SpacyNLPInsightExtractor (best window of
+tracker length per sentence) against the sentence matching (whole sentence
+vectors), for speed and accuracy.
+
+Accuracy is measured on synthetic transcripts where tracker phrases are planted
+at known word positions: `found` is the share of planted phrases matched in
+their sentence, `exact` the share matched with their exact start and end word
+and `spurious` the number of matches of sentences where the tracker was not
+planted, natural occurrences of the tracker words included. Transcribe output
+documents (e.g. of the /cdk/media samples) can be added with --transcripts;
+they have no planted phrases, so only the time and the number of matches are
+reported for them.
+
+Usage:
+    python benchmarks/bench_phrase_matching.py [--minutes 5 15 60] [--trackers 10 50] [--transcripts out.json ...]
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Callable, Dict, List, Set, Tuple
+
+import synthetic
+from extras.spacy_extractors import SpacyNLPInsightExtractor, load_nlp_pipeline
+
+
+def planted_transcript(
+    minutes: int, trackers: List[str], rate: float, seed: int = 0
+) -> Tuple[str, Dict[Tuple[int, str], Tuple[int, int]]]:
+    """
+    Generate a synthetic transcript with tracker phrases planted in some sentences.
+
+    Args:
+        minutes (int): Call length in minutes.
+        trackers (List[str]): The trackers to plant.
+        rate (float): Share of the sentences with a planted tracker.
+        seed (int): Seed for the random generator.
+
+    Returns:
+        Tuple[str, Dict[Tuple[int, str], Tuple[int, int]]]: The transcript text and
+            the start and end word of every planted (sentence index, tracker).
+    """
+    rng = random.Random(seed)
+    sentences, planted = [], {}
+    for i, sentence in enumerate(
+        synthetic.transcript_for_minutes(minutes, seed=seed)[:-1].split(". ")
+    ):
+        words = sentence.lower().split()
+        if rng.random() < rate:
+            tracker = rng.choice(trackers)
+            start = rng.randint(0, len(words))
+            words[start:start] = tracker.split()
+            planted[(i, tracker)] = (start, start + len(tracker.split()) - 1)
+        if words[-1] == "i":
+            # "i." is tokenized as an abbreviation, the sentence would not end
+            words.append("please")
+        sentences.append(" ".join(words).capitalize())
+    return ". ".join(sentences) + ".", planted
+
+
+def accuracy(
+    insights: List[Dict], planted: Dict[Tuple[int, str], Tuple[int, int]]
+) -> Tuple[float, float, int]:
+    # sets, a tracker listed twice has its insights twice
+    matches: Set[Tuple[int, str]] = set()
+    exact: Set[Tuple[int, str]] = set()
+    spurious = 0
+    for insight in insights:
+        key = (insight["sentence_index"], insight["tracker_value"])
+        if key not in planted:
+            spurious += 1
+            continue
+        matches.add(key)
+        if planted[key] == (insight["start_word_index"], insight["end_word_index"]):
+            exact.add(key)
+    total = max(len(planted), 1)
+    return len(matches) / total, len(exact) / total, spurious
+
+
+def best_of(repeat: int, function: Callable, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=int, nargs="+", default=[5, 15, 60])
+    parser.add_argument("--trackers", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--rate", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--transcripts", nargs="*", default=[])
+    args = parser.parse_args()
+
+    nlp = load_nlp_pipeline()
+    extractors = {
+        "sentence": SpacyNLPInsightExtractor(nlp),
+        "phrase": SpacyNLPInsightExtractor(nlp, phrase_matching=True),
+    }
+
+    print(
+        f"{'minutes':>8} {'trackers':>9} {'matching':>9} {'time [s]':>9} "
+        f"{'found':>7} {'exact':>7} {'spurious':>9}"
+    )
+    for minutes in args.minutes:
+        for count in args.trackers:
+            trackers = synthetic.synthetic_trackers(count)
+            transcript, planted = planted_transcript(minutes, trackers, args.rate)
+            for name, extractor in extractors.items():
+                elapsed = best_of(
+                    args.repeat, extractor.extract_insights, transcript, trackers
+                )
+                found, exact, spurious = accuracy(
+                    extractor.extract_insights(transcript, trackers), planted
+                )
+                print(
+                    f"{minutes:>8} {count:>9} {name:>9} {elapsed:>9.4f} "
+                    f"{found:>7.1%} {exact:>7.1%} {spurious:>9}"
+                )
+
+    trackers = synthetic.synthetic_trackers(max(args.trackers))
+    for path in args.transcripts:
+        with open(path, encoding="utf-8") as transcribe_output:
+            transcript = json.load(transcribe_output)["results"]["transcripts"][0][
+                "transcript"
+            ]
+        for name, extractor in extractors.items():
+            elapsed = best_of(
+                args.repeat, extractor.extract_insights, transcript, trackers
+            )
+            insights = extractor.extract_insights(transcript, trackers)
+            print(f"{path}: {name} {elapsed:.4f} s, {len(insights)} matches")
+
+
+if __name__ == "__main__":
+    main()
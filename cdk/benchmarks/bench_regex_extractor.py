@@ -0,0 +1,76 @@
+"""
+Benchmark the single-pass SimpleRegexInsightExtractor against the previous
+per-sentence, per-tracker `re.search` loop on synthetic long transcripts.
+
+Usage:
+    python benchmarks/bench_regex_extractor.py [--minutes 15 60 180] [--trackers 10 200]
+"""
+
+import argparse
+import re
+import time
+from typing import Any, Callable, Dict, List
+
+import synthetic  # noqa: F401  (makes the lambda package importable)
+from extras.extractors import SimpleRegexInsightExtractor
+
+
+def per_sentence_search(
+    transcript_text: str, trackers: List[str]
+) -> List[Dict[str, Any]]:
+    """The previous implementation: one `re.search` per sentence and tracker."""
+    insights = []
+    sentences = transcript_text.split(".")
+    for i, sentence in enumerate(sentences):
+        for tracker in trackers:
+            matched = re.search(rf"\b{tracker}\b", sentence)
+            if matched:
+                insights.append(
+                    {
+                        "sentence_index": i,
+                        "start_word_index": len(sentence[: matched.start()].split()),
+                        "end_word_index": len(sentence[: matched.end()].split()),
+                        "tracker_value": tracker,
+                        "transcribe_value": sentence.strip(),
+                    }
+                )
+    return insights
+
+
+def best_of(repeat: int, function: Callable, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=int, nargs="+", default=[15, 60, 180])
+    parser.add_argument("--trackers", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    extractor = SimpleRegexInsightExtractor()
+    print(
+        f"{'minutes':>8} {'trackers':>9} {'loop [s]':>10} {'single-pass [s]':>16} {'speedup':>8} {'hits':>8}"
+    )
+    for minutes in args.minutes:
+        transcript = synthetic.transcript_for_minutes(minutes)
+        for count in args.trackers:
+            trackers = synthetic.synthetic_trackers(count)
+            loop = best_of(args.repeat, per_sentence_search, transcript, trackers)
+            single = best_of(
+                args.repeat, extractor.extract_insights, transcript, trackers
+            )
+            hits = len(extractor.extract_insights(transcript, trackers))
+            print(
+                f"{minutes:>8} {count:>9} {loop:>10.4f} {single:>16.4f} "
+                f"{loop / single:>7.1f}x {hits:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
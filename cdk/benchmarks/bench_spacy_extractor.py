@@ -0,0 +1,95 @@
+"""
+Benchmark the vectorized SpacyNLPInsightExtractor against the previous
+per-sentence, per-tracker `Doc.similarity` loop.
+
+Usage:
+    python benchmarks/bench_spacy_extractor.py [--minutes 5 15 60] [--trackers 10 50]
+"""
+
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+import synthetic  # noqa: F401  (makes the lambda package importable)
+from extras.spacy_extractors import SpacyNLPInsightExtractor, load_nlp_pipeline
+
+
+def per_pair_similarity(
+    transcript_text: str, trackers: List[str]
+) -> List[Dict[str, Any]]:
+    """The previous implementation: one `Doc.similarity` call per sentence and tracker."""
+    nlp = load_nlp_pipeline()
+    extractor = SpacyNLPInsightExtractor(nlp)
+    insights = []
+    doc = nlp(transcript_text)
+    tracker_docs = [nlp(tracker) for tracker in trackers]
+    for i, sentence_doc in enumerate(doc.sents):
+        sentence_tokens_idexes = {
+            token.text.lower(): index for index, token in enumerate(sentence_doc)
+        }
+        for tracker_doc in tracker_docs:
+            similarity = tracker_doc.similarity(sentence_doc)
+            if similarity > 0.7:
+                start_word_index, end_word_index = extractor._find_word_indicies(
+                    sentence_tokens_idexes,
+                    tuple(token.text.lower() for token in tracker_doc),
+                )
+                insights.append(
+                    {
+                        "sentence_index": i,
+                        "start_word_index": start_word_index,
+                        "end_word_index": end_word_index,
+                        "tracker_value": tracker_doc.text,
+                        "transcribe_value": sentence_doc.text.strip(),
+                        "similarity_score": similarity,
+                    }
+                )
+    return insights
+
+
+def best_of(repeat: int, function: Callable, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=int, nargs="+", default=[5, 15, 60])
+    parser.add_argument("--trackers", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    extractor = SpacyNLPInsightExtractor(load_nlp_pipeline())
+    print(
+        f"{'minutes':>8} {'trackers':>9} {'per-pair [s]':>13} "
+        f"{'vectorized [s]':>15} {'speedup':>8} {'same hits':>10}"
+    )
+    for minutes in args.minutes:
+        transcript = synthetic.transcript_for_minutes(minutes)
+        for count in args.trackers:
+            trackers = synthetic.synthetic_trackers(count)
+            per_pair = best_of(args.repeat, per_pair_similarity, transcript, trackers)
+            vectorized = best_of(
+                args.repeat, extractor.extract_insights, transcript, trackers
+            )
+            expected = per_pair_similarity(transcript, trackers)
+            actual = extractor.extract_insights(transcript, trackers)
+            same = [
+                (insight["sentence_index"], insight["tracker_value"])
+                for insight in expected
+            ] == [
+                (insight["sentence_index"], insight["tracker_value"])
+                for insight in actual
+            ]
+            print(
+                f"{minutes:>8} {count:>9} {per_pair:>13.4f} {vectorized:>15.4f} "
+                f"{per_pair / vectorized:>7.1f}x {str(same):>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
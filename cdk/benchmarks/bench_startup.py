@@ -0,0 +1,63 @@
+"""
+Measure the cold-start cost of the Lambda module in both extraction modes.
+
+Every measurement runs in a fresh interpreter, like a new Lambda container:
+- regex: `import lambda_function`
+- spacy: `import lambda_function` followed by the creation of the spaCy extractor
+  (spaCy import and model load) that the first `X-Spacy: True` request pays.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from synthetic import LAMBDA_DIR
+
+MEASURE = """
+import json, time
+start = time.perf_counter()
+import lambda_function
+imported = time.perf_counter()
+if {spacy}:
+    from extras.extractors import create_spacy_extractor
+    create_spacy_extractor()
+ready = time.perf_counter()
+print(json.dumps({{"import": imported - start, "total": ready - start}}))
+"""
+
+
+def measure(spacy: bool) -> dict:
+    env = {"AWS_DEFAULT_REGION": "us-east-1", **os.environ}
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE.format(spacy=spacy)],
+        cwd=LAMBDA_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':>6} {'import [s]':>11} {'ready [s]':>10}")
+    for mode, spacy in (("regex", False), ("spacy", True)):
+        runs = [measure(spacy) for _ in range(args.repeat)]
+        print(
+            f"{mode:>6} {statistics.median(run['import'] for run in runs):>11.3f} "
+            f"{statistics.median(run['total'] for run in runs):>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Compare the static vector extractor (memory-mapped table exported by
+scripts/export_static_vectors.py) with the spaCy extractor:
+- cold start: in a fresh interpreter, like a new Lambda container, the time to
+  create the extractor and to answer the first request, and the peak RSS;
+- throughput: the time of `extract_insights` on synthetic transcripts.
+
+Usage:
+    python benchmarks/bench_static_vectors.py [--vectors ../lambda/static-vectors] [--minutes 5 15 60]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable
+
+import synthetic
+
+MEASURE = """
+import json, resource, time
+start = time.perf_counter()
+from extras.extractors import create_spacy_extractor, create_static_vector_extractor
+extractor = create_{mode}_extractor()
+ready = time.perf_counter()
+extractor.extract_insights({transcript!r}, ["refund please", "cancel"])
+answered = time.perf_counter()
+print(json.dumps({{
+    "ready": ready - start,
+    "first": answered - start,
+    "rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+
+def measure(mode: str, vectors: str, transcript: str) -> dict:
+    env = {**os.environ, "STATIC_VECTORS_DIR": vectors}
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE.format(mode=mode, transcript=transcript)],
+        cwd=synthetic.LAMBDA_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def best_of(repeat: int, function: Callable, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--vectors", default=str(synthetic.LAMBDA_DIR / "static-vectors")
+    )
+    parser.add_argument("--minutes", type=int, nargs="+", default=[5, 15, 60])
+    parser.add_argument("--trackers", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    os.environ["STATIC_VECTORS_DIR"] = args.vectors
+
+    print(f"{'backend':>7} {'ready [s]':>10} {'first [s]':>10} {'RSS [MiB]':>10}")
+    for mode in ("spacy", "static_vector"):
+        runs = [
+            measure(mode, args.vectors, synthetic.transcript_for_minutes(5))
+            for _ in range(args.repeat)
+        ]
+        print(
+            f"{mode.split('_')[0]:>7} "
+            f"{statistics.median(run['ready'] for run in runs):>10.3f} "
+            f"{statistics.median(run['first'] for run in runs):>10.3f} "
+            f"{statistics.median(run['rss'] for run in runs):>10.1f}"
+        )
+
+    from extras.extractors import (create_spacy_extractor,
+                                   create_static_vector_extractor)
+
+    extractors = {
+        "spacy": create_spacy_extractor(),
+        "static": create_static_vector_extractor(),
+    }
+    trackers = synthetic.synthetic_trackers(args.trackers)
+    print(f"\n{'minutes':>8} {'spacy [s]':>10} {'static [s]':>11} {'speedup':>8}")
+    for minutes in args.minutes:
+        transcript = synthetic.transcript_for_minutes(minutes)
+        timings = {
+            name: best_of(args.repeat, extractor.extract_insights, transcript, trackers)
+            for name, extractor in extractors.items()
+        }
+        print(
+            f"{minutes:>8} {timings['spacy']:>10.4f} {timings['static']:>11.4f} "
+            f"{timings['spacy'] / timings['static']:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Benchmark live insight extraction (extras.streaming.LiveInsightSession) on the
+media samples replayed as a chunked stream (see replay.py), against re-scanning
+the whole transcript at every update, and check that the session ends with the
+insights of a single pass over the final transcript.
+
+A sample is replayed with the Transcribe output given by --transcript, or with a
+synthetic transcript fitted to its duration. --minutes adds longer calls, looping
+the first sample.
+
+Usage:
+    python benchmarks/bench_streaming.py [--media ../media/sample-1.mp3] [--minutes 15 60]
+        [--extractor regex] [--realtime]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import statistics
+import time
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+import replay
+import synthetic
+from extras.extractors import (InsightExtractor, SimpleRegexInsightExtractor,
+                               create_spacy_extractor,
+                               create_static_vector_extractor)
+from extras.fuzzy_extractors import FuzzyInsightExtractor
+from extras.streaming import (LiveInsightSession, TranscriptSegment,
+                              stream_insights)
+from extras.transcript import TranscriptItems
+
+EXTRACTORS = {
+    "regex": SimpleRegexInsightExtractor,
+    "fuzzy": FuzzyInsightExtractor,
+    "static": create_static_vector_extractor,
+    "spacy": create_spacy_extractor,
+}
+
+
+async def replay_segments(
+    path: str, output: Dict[str, Any], time_scale: float
+) -> List[TranscriptSegment]:
+    return [
+        segment
+        async for segment in replay.replay_segments(path, output, time_scale=time_scale)
+    ]
+
+
+async def realtime_lag(
+    extractor: InsightExtractor,
+    trackers: List[str],
+    path: str,
+    output: Dict[str, Any],
+    time_scale: float,
+) -> float:
+    """
+    Replay a sample at the pace of the audio through `stream_insights`.
+
+    Returns:
+        float: The longest time from the arrival of a segment to its update.
+    """
+    arrivals = []
+
+    async def arriving() -> AsyncIterator[TranscriptSegment]:
+        async for segment in replay.replay_segments(
+            path, output, realtime=True, time_scale=time_scale
+        ):
+            arrivals.append(time.perf_counter())
+            yield segment
+
+    lags = []
+    session = LiveInsightSession(extractor, trackers)
+    async for _ in stream_insights(session, arriving()):
+        lags.append(time.perf_counter() - arrivals[-1])
+    return max(lags)
+
+
+def incremental(
+    extractor: InsightExtractor,
+    trackers: List[str],
+    segments: List[TranscriptSegment],
+) -> Tuple[LiveInsightSession, List[float]]:
+    session = LiveInsightSession(extractor, trackers)
+    latencies = []
+    for segment in segments:
+        start = time.perf_counter()
+        session.add_segment(segment)
+        latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    session.close()
+    latencies.append(time.perf_counter() - start)
+    return session, latencies
+
+
+def full_rescan(
+    extractor: InsightExtractor,
+    trackers: List[str],
+    segments: List[TranscriptSegment],
+) -> List[float]:
+    """Extract the whole transcript so far, final and partial, at every update."""
+    finals, partials, latencies = [], {}, []
+    for segment in segments:
+        start = time.perf_counter()
+        if segment.is_partial:
+            partials[segment.result_id] = segment.text
+        else:
+            partials.pop(segment.result_id, None)
+            finals.append(segment.text)
+        extractor.extract_insights(" ".join(finals + list(partials.values())), trackers)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def single_pass(
+    extractor: InsightExtractor,
+    trackers: List[str],
+    segments: List[TranscriptSegment],
+) -> List[Dict[str, Any]]:
+    finals = [segment for segment in segments if not segment.is_partial]
+    items = TranscriptItems.from_transcribe_items(
+        item for segment in finals for item in segment.items
+    )
+    return extractor.extract_insights(
+        " ".join(segment.text for segment in finals), trackers, items
+    )
+
+
+def calls(args: argparse.Namespace) -> List[Tuple[str, str, Dict[str, Any], float]]:
+    """The replayed calls: name, audio, Transcribe output and time scale."""
+    media = args.media or sorted(
+        str(path) for path in (synthetic.LAMBDA_DIR.parent / "media").glob("*.mp3")
+    )
+    replayed = []
+    for path in media:
+        duration = replay.mp3_duration(path)
+        if args.transcript:
+            with open(args.transcript, encoding="utf-8") as transcript_file:
+                output, time_scale = json.load(transcript_file), 1.0
+        else:
+            output = synthetic.synthetic_transcribe_output(math.ceil(duration / 60))
+            last_end = max(
+                float(item["end_time"])
+                for item in output["results"]["items"]
+                if "end_time" in item
+            )
+            time_scale = duration / last_end
+        replayed.append((path.rsplit("/", 1)[-1], path, output, time_scale))
+    for minutes in args.minutes:
+        output = synthetic.synthetic_transcribe_output(minutes)
+        replayed.append((f"{minutes} min", media[0], output, 1.0))
+    return replayed
+
+
+def milliseconds(seconds: float) -> str:
+    return f"{seconds * 1000:.2f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--media", nargs="+", default=None)
+    parser.add_argument("--transcript", default=None)
+    parser.add_argument("--minutes", type=int, nargs="*", default=[15, 60])
+    parser.add_argument("--trackers", type=int, default=50)
+    parser.add_argument("--extractor", choices=sorted(EXTRACTORS), default="regex")
+    parser.add_argument("--realtime", action="store_true")
+    args = parser.parse_args()
+
+    extractor = EXTRACTORS[args.extractor]()
+    trackers = synthetic.synthetic_trackers(args.trackers)
+    print(
+        f"{'call':>14} {'updates':>8} {'p50 [ms]':>9} {'max [ms]':>9} {'total [s]':>10} "
+        f"{'rescan max [ms]':>16} {'rescan total [s]':>17} {'same':>6}"
+        + (f" {'live lag [ms]':>14}" if args.realtime else "")
+    )
+    for name, path, output, time_scale in calls(args):
+        segments = asyncio.run(replay_segments(path, output, time_scale))
+        session, latencies = incremental(extractor, trackers, segments)
+        rescan = full_rescan(extractor, trackers, segments)
+        same = session.insights == single_pass(extractor, trackers, segments)
+        print(
+            f"{name:>14} {len(segments):>8} "
+            f"{milliseconds(statistics.median(latencies)):>9} "
+            f"{milliseconds(max(latencies)):>9} {sum(latencies):>10.4f} "
+            f"{milliseconds(max(rescan)):>16} {sum(rescan):>17.4f} {str(same):>6}",
+            end="",
+        )
+        if args.realtime:
+            lag = asyncio.run(
+                realtime_lag(extractor, trackers, path, output, time_scale)
+            )
+            print(f" {milliseconds(lag):>14}", end="")
+        print()
+
+
+if __name__ == "__main__":
+    main()
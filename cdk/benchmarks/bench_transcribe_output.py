@@ -0,0 +1,75 @@
+"""
+Benchmark reading the transcript out of a Transcribe output document, loading the
+whole JSON with `json.loads` versus streaming it with TranscribeOutputStream.
+
+Peak memory is measured with tracemalloc, the S3 body is an in-memory
+botocore StreamingBody.
+
+Usage:
+    python benchmarks/bench_transcribe_output.py [--minutes 30 180]
+"""
+
+import argparse
+import io
+import json
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import synthetic
+from botocore.response import StreamingBody
+from extras.transcribe_output import DEFAULT_CHUNK_SIZE, TranscribeOutputStream
+
+
+def full_document(body: StreamingBody) -> str:
+    data = body.read().decode("utf-8")
+    return json.loads(data)["results"]["transcripts"][0]["transcript"]
+
+
+def streamed(body: StreamingBody) -> str:
+    return TranscribeOutputStream(body.iter_chunks(DEFAULT_CHUNK_SIZE)).transcript()
+
+
+def streamed_with_items(body: StreamingBody) -> str:
+    stream = TranscribeOutputStream(body.iter_chunks(DEFAULT_CHUNK_SIZE))
+    transcript = stream.transcript()
+    for _ in stream.items():
+        pass
+    return transcript
+
+
+def measure(function: Callable[[StreamingBody], str], raw: bytes) -> Tuple[float, int]:
+    body = StreamingBody(io.BytesIO(raw), len(raw))
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(body)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=int, nargs="+", default=[30, 180])
+    args = parser.parse_args()
+
+    print(
+        f"{'minutes':>8} {'size [MB]':>10} {'mode':>20} {'time [s]':>9} {'peak [MB]':>10}"
+    )
+    for minutes in args.minutes:
+        raw = synthetic.synthetic_transcribe_output_bytes(minutes)
+        for name, function in (
+            ("json.loads", full_document),
+            ("stream transcript", streamed),
+            ("stream + items", streamed_with_items),
+        ):
+            elapsed, peak = measure(function, raw)
+            print(
+                f"{minutes:>8} {len(raw) / 2**20:>10.1f} {name:>20} "
+                f"{elapsed:>9.3f} {peak / 2**20:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
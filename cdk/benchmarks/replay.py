@@ -0,0 +1,171 @@
+"""
+Local stand-in for Transcribe streaming: replays an MP3 file as a stream of audio
+chunks and emits the partial and final segments of a known transcript as the
+audio clock passes the end of every word, the way Transcribe streaming revises a
+result word by word until its sentence ends.
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Tuple
+
+import synthetic  # noqa: F401, puts the Lambda code on the path
+from extras.audio import iter_mp3_frames
+from extras.streaming import TranscriptSegment
+
+
+def mp3_chunks(
+    path: str, chunk_seconds: float = 0.1, min_seconds: float = 0.0
+) -> Iterator[Tuple[bytes, float]]:
+    """
+    Cut an MP3 file into chunks of whole frames.
+
+    Args:
+        path (str): The MP3 file.
+        chunk_seconds (float): Audio duration of every chunk.
+        min_seconds (float): The file is replayed again until this much audio
+                             was sent.
+
+    Yields:
+        Tuple[bytes, float]: The chunk, and the audio clock at its end, in seconds.
+    """
+    with open(path, "rb") as media:
+        data = media.read()
+    frames = list(iter_mp3_frames(data))
+    if not frames:
+        raise ValueError(f"{path} has no MP3 frames")
+
+    clock, chunk, chunk_duration = 0.0, [], 0.0
+    while True:
+        for frame in frames:
+            chunk.append(data[frame.offset : frame.offset + frame.length])
+            chunk_duration += frame.duration
+            if chunk_duration >= chunk_seconds:
+                clock += chunk_duration
+                yield b"".join(chunk), clock
+                chunk, chunk_duration = [], 0.0
+        # within a frame, rounding errors of the clock must not replay the file
+        if clock + chunk_duration + frames[-1].duration > min_seconds:
+            break
+    if chunk:
+        yield b"".join(chunk), clock + chunk_duration
+
+
+def mp3_duration(path: str) -> float:
+    """
+    Returns:
+        float: The audio duration of an MP3 file, in seconds.
+    """
+    with open(path, "rb") as media:
+        return sum(frame.duration for frame in iter_mp3_frames(media.read()))
+
+
+class ReplayTranscriber:
+    """
+    Emits the segments of the items of a Transcribe output against an audio clock.
+
+    Every sentence is a result: a partial segment is emitted each time the clock
+    passes the end of one of its words, and a final segment when its sentence
+    separator (a punctuation item) arrives.
+
+    Args:
+        transcribe_output (Dict[str, Any]): A Transcribe output document.
+        time_scale (float): Multiplies the item times, to fit a transcript to the
+                            duration of the replayed audio.
+    """
+
+    def __init__(self, transcribe_output: Dict[str, Any], time_scale: float = 1.0):
+        self._items = transcribe_output["results"]["items"]
+        self._time_scale = time_scale
+        self._position = 0
+        self._result = 0
+        self._words: List[Dict[str, Any]] = []
+        self._text = ""
+
+    def feed(self, clock: float) -> List[TranscriptSegment]:
+        """
+        Args:
+            clock (float): Audio sent so far, in seconds.
+
+        Returns:
+            List[TranscriptSegment]: The segments of the words ended before the clock.
+        """
+        segments = []
+        while self._position < len(self._items):
+            item = self._items[self._position]
+            content = item["alternatives"][0]["content"]
+            if item["type"] == "punctuation":
+                self._text += content
+                if content in ".?!":
+                    segments.append(self._segment(is_partial=False))
+            elif float(item["end_time"]) * self._time_scale <= clock:
+                self._text += (" " if self._text else "") + content
+                self._words.append(item)
+                segments.append(self._segment(is_partial=True))
+            else:
+                break
+            self._position += 1
+        return segments
+
+    def finish(self) -> List[TranscriptSegment]:
+        """
+        Returns:
+            List[TranscriptSegment]: The segments left when the audio ends.
+        """
+        segments = self.feed(float("inf"))
+        if self._text:
+            segments.append(self._segment(is_partial=False))
+        return segments
+
+    def _segment(self, is_partial: bool) -> TranscriptSegment:
+        segment = TranscriptSegment(
+            result_id=f"result-{self._result}",
+            text=self._text,
+            is_partial=is_partial,
+            items=list(self._words),
+        )
+        if not is_partial:
+            self._result += 1
+            self._words, self._text = [], ""
+        return segment
+
+
+async def replay_segments(
+    path: str,
+    transcribe_output: Dict[str, Any],
+    chunk_seconds: float = 0.1,
+    realtime: bool = False,
+    time_scale: float = 1.0,
+) -> AsyncIterator[TranscriptSegment]:
+    """
+    Replace `extras.streaming.transcribe_audio_stream` with a replay of an MP3
+    file and its known transcript.
+
+    Args:
+        path (str): The MP3 file.
+        transcribe_output (Dict[str, Any]): The Transcribe output of the audio.
+        chunk_seconds (float): Audio duration of every chunk.
+        realtime (bool): Send the chunks at the pace of the audio.
+        time_scale (float): Multiplies the item times, see `ReplayTranscriber`.
+
+    Yields:
+        TranscriptSegment: The partial and final segments, in order.
+    """
+    # the audio is looped until the transcript ends
+    min_seconds = time_scale * max(
+        (
+            float(item["end_time"])
+            for item in transcribe_output["results"]["items"]
+            if "end_time" in item
+        ),
+        default=0.0,
+    )
+    transcriber = ReplayTranscriber(transcribe_output, time_scale)
+    start = time.perf_counter()
+    for _, clock in mp3_chunks(path, chunk_seconds, min_seconds):
+        if realtime:
+            await asyncio.sleep(max(0.0, start + clock - time.perf_counter()))
+        for segment in transcriber.feed(clock):
+            yield segment
+    for segment in transcriber.finish():
+        yield segment
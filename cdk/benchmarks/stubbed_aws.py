@@ -0,0 +1,201 @@
+"""
+In-memory S3 buckets and Transcribe jobs answering the calls of boto3 clients,
+so that `lambda_handler` runs its whole request path without AWS.
+
+The responses are short-circuited on the `before-call` event of the clients, as
+botocore's `Stubber` does, but are computed from the parameters of every call
+instead of being queued in order: the lookups of a batch request run on a thread
+pool, in no fixed order. No request is signed or sent.
+"""
+
+import hashlib
+import io
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from botocore.awsrequest import AWSResponse
+from botocore.client import BaseClient
+from botocore.response import StreamingBody
+
+
+class StubbedAWS:
+    """
+    Args:
+        latency (float): Seconds every call waits, to emulate the network.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.objects: Dict[Tuple[str, str], Tuple[bytes, str]] = {}
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, client: BaseClient) -> BaseClient:
+        """
+        Answer the calls of a S3 or Transcribe client from this instance.
+
+        Args:
+            client (BaseClient): The client.
+
+        Returns:
+            BaseClient: The client.
+        """
+        service_id = client.meta.service_model.service_id.hyphenize()
+        client.meta.events.register(
+            f"before-parameter-build.{service_id}", self._keep_params
+        )
+        client.meta.events.register(f"before-call.{service_id}", self._respond)
+        return client
+
+    def detach(self, client: BaseClient) -> BaseClient:
+        """
+        Let the calls of a client attached by `attach` through again.
+
+        Args:
+            client (BaseClient): The client.
+
+        Returns:
+            BaseClient: The client.
+        """
+        service_id = client.meta.service_model.service_id.hyphenize()
+        client.meta.events.unregister(
+            f"before-parameter-build.{service_id}", self._keep_params
+        )
+        client.meta.events.unregister(f"before-call.{service_id}", self._respond)
+        return client
+
+    def put_object(
+        self, bucket: str, key: str, body: bytes, content_type: str = "audio/mpeg"
+    ) -> None:
+        with self._lock:
+            self.objects[(bucket, key)] = (body, content_type)
+
+    def complete_job(self, job_name: str, media_uri: str) -> None:
+        """Store a completed transcription job, its output is to be put with it."""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            self.jobs[job_name] = {
+                "TranscriptionJobName": job_name,
+                "TranscriptionJobStatus": "COMPLETED",
+                "LanguageCode": "en-US",
+                "Media": {"MediaFileUri": media_uri},
+                "CreationTime": now,
+                "CompletionTime": now,
+            }
+
+    def delete_object(self, bucket: str, key: str) -> None:
+        with self._lock:
+            self.objects.pop((bucket, key), None)
+
+    def _keep_params(
+        self, params: Dict[str, Any], context: Dict[str, Any], **kwargs
+    ) -> None:
+        context["stubbed_params"] = dict(params)
+
+    def _respond(
+        self, model: Any, context: Dict[str, Any], **kwargs
+    ) -> Tuple[AWSResponse, Dict[str, Any]]:
+        operation = model.name
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        handler = getattr(self, f"_{operation}", None)
+        if handler is None:
+            raise NotImplementedError(f"{operation} is not stubbed")
+        return handler(context.get("stubbed_params", {}))
+
+    def _GetObject(self, params: Dict[str, Any]) -> Tuple[AWSResponse, Dict[str, Any]]:
+        stored = self.objects.get((params["Bucket"], params["Key"]))
+        if stored is None:
+            return _error("NoSuchKey", 404)
+        body, content_type = stored
+        etag, size = _etag(body), len(body)
+        parsed = {"ContentType": content_type, "ETag": etag}
+        if "Range" in params:
+            first, _, last = params["Range"].removeprefix("bytes=").partition("-")
+            first, last = int(first), min(int(last), size - 1)
+            body = body[first : last + 1]
+            parsed["ContentRange"] = f"bytes {first}-{last}/{size}"
+        parsed.update(
+            Body=StreamingBody(io.BytesIO(body), len(body)), ContentLength=len(body)
+        )
+        return _response(parsed, 206 if "ContentRange" in parsed else 200)
+
+    def _HeadObject(self, params: Dict[str, Any]) -> Tuple[AWSResponse, Dict[str, Any]]:
+        stored = self.objects.get((params["Bucket"], params["Key"]))
+        if stored is None:
+            return _error("404", 404)
+        body, content_type = stored
+        return _response(
+            {
+                "ContentLength": len(body),
+                "ContentType": content_type,
+                "ETag": _etag(body),
+            }
+        )
+
+    def _PutObject(self, params: Dict[str, Any]) -> Tuple[AWSResponse, Dict[str, Any]]:
+        body = params.get("Body", b"")
+        if hasattr(body, "read"):
+            body = body.read()
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.put_object(
+            params["Bucket"],
+            params["Key"],
+            body,
+            params.get("ContentType", "binary/octet-stream"),
+        )
+        return _response({"ETag": _etag(body)})
+
+    def _DeleteObject(
+        self, params: Dict[str, Any]
+    ) -> Tuple[AWSResponse, Dict[str, Any]]:
+        self.delete_object(params["Bucket"], params["Key"])
+        return _response({}, 204)
+
+    def _GetTranscriptionJob(
+        self, params: Dict[str, Any]
+    ) -> Tuple[AWSResponse, Dict[str, Any]]:
+        job = self.jobs.get(params["TranscriptionJobName"])
+        if job is None:
+            return _error("NotFoundException", 400)
+        return _response({"TranscriptionJob": dict(job)})
+
+    def _StartTranscriptionJob(
+        self, params: Dict[str, Any]
+    ) -> Tuple[AWSResponse, Dict[str, Any]]:
+        job_name = params["TranscriptionJobName"]
+        with self._lock:
+            if job_name in self.jobs:
+                return _error("ConflictException", 400)
+            self.jobs[job_name] = {
+                "TranscriptionJobName": job_name,
+                "TranscriptionJobStatus": "IN_PROGRESS",
+                "Media": params["Media"],
+                "MediaFormat": params.get("MediaFormat"),
+                "CreationTime": datetime.now(timezone.utc),
+                "Tags": params.get("Tags", []),
+            }
+        return _response({"TranscriptionJob": dict(self.jobs[job_name])})
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.md5(body).hexdigest()}"'
+
+
+def _response(
+    parsed: Dict[str, Any], status_code: int = 200
+) -> Tuple[AWSResponse, Dict[str, Any]]:
+    parsed["ResponseMetadata"] = {"HTTPStatusCode": status_code, "RetryAttempts": 0}
+    return AWSResponse("https://stubbed", status_code, {}, None), parsed
+
+
+def _error(
+    code: str, status_code: int, message: Optional[str] = None
+) -> Tuple[AWSResponse, Dict[str, Any]]:
+    return _response({"Error": {"Code": code, "Message": message or code}}, status_code)
@@ -0,0 +1,144 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Importing this module makes the lambda package (`extras`, `lambda_function`)
+importable and provides generators for synthetic call transcripts.
+"""
+
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+LAMBDA_DIR = Path(__file__).resolve().parents[1] / "lambda"
+if str(LAMBDA_DIR) not in sys.path:
+    sys.path.insert(0, str(LAMBDA_DIR))
+
+VOCABULARY = (
+    "i you we they it is was be have do say get make go know take see come think "
+    "look want give use find tell ask work seem feel try leave call account order "
+    "refund cancel subscription billing charge payment card invoice plan upgrade "
+    "downgrade support agent manager problem issue help thanks please sorry today "
+    "tomorrow week month price discount offer service delivery package late broken "
+    "replace return label email phone number address password login reset error"
+).split()
+
+WORDS_PER_MINUTE = 150
+
+
+def synthetic_transcript(
+    words: int, seed: int = 0, mean_sentence_length: int = 15
+) -> str:
+    """
+    Generate a synthetic transcript in the shape AWS Transcribe produces.
+
+    Args:
+        words (int): Number of words in the transcript.
+        seed (int): Seed for the random generator.
+        mean_sentence_length (int): Average number of words per sentence.
+
+    Returns:
+        str: The transcript text, sentences separated by ". ".
+    """
+    rng = random.Random(seed)
+    sentences, remaining = [], words
+    while remaining > 0:
+        length = min(remaining, max(1, int(rng.expovariate(1 / mean_sentence_length))))
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(length))
+        sentences.append(sentence.capitalize())
+        remaining -= length
+    return ". ".join(sentences) + "."
+
+
+def synthetic_trackers(count: int, seed: int = 0) -> List[str]:
+    """
+    Generate a list of single and multi word trackers drawn from the vocabulary.
+
+    Args:
+        count (int): Number of trackers.
+        seed (int): Seed for the random generator.
+
+    Returns:
+        List[str]: The trackers.
+    """
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(VOCABULARY) for _ in range(rng.choice((1, 1, 2, 3))))
+        for _ in range(count)
+    ]
+
+
+def transcript_for_minutes(minutes: int, seed: int = 0) -> str:
+    """
+    Generate a synthetic transcript for a call of the given length.
+
+    Args:
+        minutes (int): Call length in minutes.
+        seed (int): Seed for the random generator.
+
+    Returns:
+        str: The transcript text.
+    """
+    return synthetic_transcript(minutes * WORDS_PER_MINUTE, seed=seed)
+
+
+def synthetic_transcribe_output(minutes: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Generate a Transcribe output document (transcript plus per-word items) for a
+    call of the given length.
+
+    Args:
+        minutes (int): Call length in minutes.
+        seed (int): Seed for the random generator.
+
+    Returns:
+        Dict[str, Any]: The document, as written by Transcribe to S3.
+    """
+    rng = random.Random(seed)
+    transcript = transcript_for_minutes(minutes, seed=seed)
+    items, time = [], 0.0
+    for index, word in enumerate(transcript.replace(".", " .").split()):
+        if word == ".":
+            items.append(
+                {
+                    "id": index,
+                    "type": "punctuation",
+                    "alternatives": [{"confidence": "0.0", "content": "."}],
+                }
+            )
+            continue
+        duration = rng.uniform(0.15, 0.6)
+        items.append(
+            {
+                "id": index,
+                "type": "pronunciation",
+                "alternatives": [
+                    {"confidence": f"{rng.uniform(0.6, 1):.4f}", "content": word}
+                ],
+                "start_time": f"{time:.3f}",
+                "end_time": f"{time + duration:.3f}",
+            }
+        )
+        time += duration + rng.uniform(0, 0.1)
+    return {
+        "jobName": "transcriptionJob-synthetic",
+        "accountId": "000000000000",
+        "status": "COMPLETED",
+        "results": {
+            "transcripts": [{"transcript": transcript}],
+            "items": items,
+        },
+    }
+
+
+def synthetic_transcribe_output_bytes(minutes: int, seed: int = 0) -> bytes:
+    """
+    Args:
+        minutes (int): Call length in minutes.
+        seed (int): Seed for the random generator.
+
+    Returns:
+        bytes: The serialized Transcribe output document.
+    """
+    return json.dumps(synthetic_transcribe_output(minutes, seed=seed)).encode("utf-8")
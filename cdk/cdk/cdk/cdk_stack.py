@@ -1,10 +1,13 @@
 import os
 
-from aws_cdk import Stack
+from aws_cdk import Duration, Stack
 from aws_cdk import aws_apigateway as apigateway
+from aws_cdk import aws_events as events
+from aws_cdk import aws_events_targets as targets
 from aws_cdk import aws_iam as iam
 from aws_cdk import aws_lambda as _lambda
 from aws_cdk import aws_s3 as s3
+from aws_cdk import aws_s3_notifications as s3n
 from constructs import Construct
 
 
@@ -16,12 +19,18 @@ class CdkStack(Stack):
     - An S3 bucket for storing files.
     - An IAM role with necessary permissions for Lambda functions.
     - A Lambda function that processes files and interacts with the S3 bucket.
+    - Lambda functions starting transcriptions on upload and storing the transcripts
+      of completed jobs, triggered by S3 notifications and an EventBridge rule.
     - An API Gateway to expose the Lambda function via HTTP endpoints.
 
     Attributes:
         bucket (s3.Bucket): The S3 bucket used for storing files.
         lambda_role (iam.Role): The IAM role assumed by the Lambda function.
         lambda_function (_lambda.Function): The Lambda function that processes files.
+        transcription_starter_function (_lambda.Function): Starts the transcription
+            of uploaded audio files.
+        transcription_completed_function (_lambda.Function): Stores the transcripts
+            of completed transcription jobs.
         api (apigateway.RestApi): The API Gateway for the Lambda function.
     """
 
@@ -49,19 +58,131 @@ class CdkStack(Stack):
             ],
         )
 
+        lambda_code = _lambda.Code.from_asset("../../lambda")
+        lambda_environment = {
+            "BUCKET_NAME": bucket.bucket_name,
+            "TRACKER_EMBEDDING_CACHE_SIZE": os.getenv(
+                "TRACKER_EMBEDDING_CACHE_SIZE", "1024"
+            ),
+            "TRANSCRIPT_CACHE_SIZE": os.getenv("TRANSCRIPT_CACHE_SIZE", "32"),
+            "TRANSCRIPT_REVALIDATE_SECONDS": os.getenv(
+                "TRANSCRIPT_REVALIDATE_SECONDS", "300"
+            ),
+            "TRANSCRIPT_CACHE_S3_PREFIX": os.getenv(
+                "TRANSCRIPT_CACHE_S3_PREFIX", "transcripts-cache/"
+            ),
+            "TRANSCRIPT_RESULTS_S3_PREFIX": os.getenv(
+                "TRANSCRIPT_RESULTS_S3_PREFIX", "transcripts-results/"
+            ),
+            "BATCH_MAX_INTERACTIONS": os.getenv("BATCH_MAX_INTERACTIONS", "100"),
+            "BATCH_MAX_WORKERS": os.getenv("BATCH_MAX_WORKERS", "10"),
+            # boto3 clients: one pooled connection per batch worker, kept alive
+            "AWS_CLIENT_MAX_POOL_CONNECTIONS": os.getenv(
+                "AWS_CLIENT_MAX_POOL_CONNECTIONS", os.getenv("BATCH_MAX_WORKERS", "10")
+            ),
+            "AWS_CLIENT_TCP_KEEPALIVE": os.getenv("AWS_CLIENT_TCP_KEEPALIVE", "True"),
+            "AWS_CLIENT_CONNECT_TIMEOUT": os.getenv("AWS_CLIENT_CONNECT_TIMEOUT", "2"),
+            "AWS_CLIENT_READ_TIMEOUT": os.getenv("AWS_CLIENT_READ_TIMEOUT", "10"),
+            "AWS_CLIENT_MAX_ATTEMPTS": os.getenv("AWS_CLIENT_MAX_ATTEMPTS", "4"),
+            "AWS_CLIENT_RETRY_MODE": os.getenv("AWS_CLIENT_RETRY_MODE", "adaptive"),
+            "FUZZY_MAX_DISTANCE": os.getenv("FUZZY_MAX_DISTANCE", "1"),
+            "FUZZY_MIN_WORD_LENGTH": os.getenv("FUZZY_MIN_WORD_LENGTH", "4"),
+            "INSIGHTS_INDEX_ENABLED": os.getenv("INSIGHTS_INDEX_ENABLED", "True"),
+            "INSIGHTS_INDEX_CACHE_SIZE": os.getenv("INSIGHTS_INDEX_CACHE_SIZE", "32"),
+            "TRANSCRIPT_ITEMS_ENABLED": os.getenv("TRANSCRIPT_ITEMS_ENABLED", "True"),
+            "TRANSCRIPT_ITEMS_CACHE_SIZE": os.getenv(
+                "TRANSCRIPT_ITEMS_CACHE_SIZE", "32"
+            ),
+            # opt-in: Lambda gets more vCPUs with more memory, raise both together
+            "PARALLEL_EXTRACTION_WORKERS": os.getenv(
+                "PARALLEL_EXTRACTION_WORKERS", "1"
+            ),
+            "PARALLEL_EXTRACTION_MIN_LENGTH": os.getenv(
+                "PARALLEL_EXTRACTION_MIN_LENGTH", "200000"
+            ),
+            # CloudWatch embedded metrics, written to the logs of every request
+            "METRICS_ENABLED": os.getenv("METRICS_ENABLED", "True"),
+            "METRICS_NAMESPACE": os.getenv(
+                "METRICS_NAMESPACE", "TranscriptionInsights"
+            ),
+            # opt-in sampling profiler, logs the most sampled stacks of every request
+            "PROFILER_INTERVAL_MS": os.getenv("PROFILER_INTERVAL_MS", "0"),
+            "PROFILER_TOP_STACKS": os.getenv("PROFILER_TOP_STACKS", "20"),
+            # responses of clients sending Accept-Encoding: gzip are compressed
+            "RESPONSE_GZIP_MIN_BYTES": os.getenv("RESPONSE_GZIP_MIN_BYTES", "1024"),
+            "RESPONSE_GZIP_LEVEL": os.getenv("RESPONSE_GZIP_LEVEL", "6"),
+            # pending jobs: status cached per container, Retry-After of 202 responses
+            "JOB_STATUS_CACHE_SECONDS": os.getenv("JOB_STATUS_CACHE_SECONDS", "5"),
+            "TRANSCRIPTION_DURATION_RATIO": os.getenv(
+                "TRANSCRIPTION_DURATION_RATIO", "0.5"
+            ),
+            "RETRY_AFTER_MIN_SECONDS": os.getenv("RETRY_AFTER_MIN_SECONDS", "5"),
+            "RETRY_AFTER_MAX_SECONDS": os.getenv("RETRY_AFTER_MAX_SECONDS", "300"),
+            # identical uploads share one transcription, see extras/deduplication.py
+            "DEDUPLICATION_S3_PREFIX": os.getenv(
+                "DEDUPLICATION_S3_PREFIX", "transcription-dedup/"
+            ),
+            "DEDUPLICATION_REVALIDATE_SECONDS": os.getenv(
+                "DEDUPLICATION_REVALIDATE_SECONDS", "300"
+            ),
+        }
+
         lambda_function = _lambda.Function(
             self,
             "MiniSedricLambda",
             runtime=_lambda.Runtime.PYTHON_3_12,
             handler="lambda_function.lambda_handler",
-            code=_lambda.Code.from_asset("../../lambda"),
+            code=lambda_code,
             role=lambda_role,
-            environment={"BUCKET_NAME": bucket.bucket_name},
+            environment=lambda_environment,
+            # batch requests wait on many lookups, bounded by the API Gateway timeout
+            timeout=Duration.seconds(29),
             reserved_concurrent_executions=5,
             # adjusted based on empirical values
             memory_size=1024,
         )
 
+        # event-driven pipeline: uploads start the transcription and completed jobs
+        # store their transcript, so polling the API becomes a single S3 lookup
+        transcription_starter_function = _lambda.Function(
+            self,
+            "TranscriptionStarterLambda",
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            handler="events_function.start_transcription_handler",
+            code=lambda_code,
+            role=lambda_role,
+            environment=lambda_environment,
+            timeout=Duration.seconds(30),
+        )
+        # one notification per extension of the formats supported by Transcribe
+        for extension in ("amr", "flac", "m4a", "mp3", "mp4", "ogg", "wav", "webm"):
+            bucket.add_event_notification(
+                s3.EventType.OBJECT_CREATED,
+                s3n.LambdaDestination(transcription_starter_function),
+                s3.NotificationKeyFilter(suffix=f".{extension}"),
+            )
+
+        transcription_completed_function = _lambda.Function(
+            self,
+            "TranscriptionCompletedLambda",
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            handler="events_function.transcription_completed_handler",
+            code=lambda_code,
+            role=lambda_role,
+            environment=lambda_environment,
+            timeout=Duration.seconds(60),
+        )
+        events.Rule(
+            self,
+            "TranscriptionCompletedRule",
+            event_pattern=events.EventPattern(
+                source=["aws.transcribe"],
+                detail_type=["Transcribe Job State Change"],
+                detail={"TranscriptionJobStatus": ["COMPLETED"]},
+            ),
+            targets=[targets.LambdaFunction(transcription_completed_function)],
+        )
+
         # Add this line for lambda provisioned concurrency
         # lambda_alias = _lambda.Alias(
         #     self,
@@ -75,8 +196,10 @@ class CdkStack(Stack):
             self,
             "AudioInteractions",
             rest_api_name="Audio Interactions",
-            description="Retrives insights from a given MP3 file, based on trackers values",
+            description="Retrives insights from a given audio file, based on trackers values",
             endpoint_configuration={"types": [apigateway.EndpointType.REGIONAL]},
+            # decodes the base64 gzip responses of the Lambda to binary
+            binary_media_types=["*/*"],
         )
 
         # Add this line for lambda provisioned concurrency
@@ -10,3 +10,38 @@ def test_sqs_queue_created():
     app = core.App()
     stack = CdkStack(app, "cdk")
     template = assertions.Template.from_stack(stack)
+
+
+def test_transcription_event_pipeline_created():
+    app = core.App()
+    stack = CdkStack(app, "cdk")
+    template = assertions.Template.from_stack(stack)
+
+    for handler in (
+        "lambda_function.lambda_handler",
+        "events_function.start_transcription_handler",
+        "events_function.transcription_completed_handler",
+    ):
+        template.has_resource_properties("AWS::Lambda::Function", {"Handler": handler})
+
+    template.has_resource_properties(
+        "AWS::Events::Rule",
+        {
+            "EventPattern": {
+                "source": ["aws.transcribe"],
+                "detail-type": ["Transcribe Job State Change"],
+                "detail": {"TranscriptionJobStatus": ["COMPLETED"]},
+            }
+        },
+    )
+    template.resource_count_is("Custom::S3BucketNotifications", 1)
+
+
+def test_api_returns_compressed_responses():
+    app = core.App()
+    stack = CdkStack(app, "cdk")
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties(
+        "AWS::ApiGateway::RestApi", {"BinaryMediaTypes": ["*/*"]}
+    )
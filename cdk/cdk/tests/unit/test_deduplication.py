@@ -0,0 +1,80 @@
+import hashlib
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "lambda"))
+
+from extras import deduplication  # noqa: E402
+
+BUCKET = "interactions"
+
+
+class FakeS3:
+    """The S3 calls of the deduplication records, on objects kept in memory."""
+
+    class exceptions:
+        NoSuchKey = type("NoSuchKey", (Exception,), {})
+
+    def __init__(self):
+        self.objects = {}
+
+    def head_object(self, Bucket, Key):
+        body = self.objects[Key]
+        return {
+            "ETag": f'"{hashlib.md5(body).hexdigest()}"',
+            "ContentLength": len(body),
+        }
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self.exceptions.NoSuchKey(Key)
+        return {"Body": _Body(self.objects[Key])}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+
+class _Body:
+    def __init__(self, content):
+        self.content = content
+
+    def read(self):
+        return self.content
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setattr(deduplication, "DEDUPLICATION_S3_PREFIX", "dedup/")
+    deduplication.CANONICAL_KEYS.clear()
+    s3 = FakeS3()
+    s3.objects["b.mp3"] = s3.objects["a.mp3"] = b"first content"
+    for key in ("b.mp3", "a.mp3"):
+        deduplication.register_upload(BUCKET, key, s3.head_object(BUCKET, key), s3)
+    assert deduplication.canonical_key(BUCKET, "a.mp3") == "b.mp3"
+    s3.objects["a.mp3"] = b"new content"
+    yield s3
+    deduplication.CANONICAL_KEYS.clear()
+
+
+def test_overwritten_alias_registered_for_its_new_content(s3):
+    head_response = s3.head_object(BUCKET, "a.mp3")
+
+    assert deduplication.register_upload(BUCKET, "a.mp3", head_response, s3) == "a.mp3"
+    assert deduplication._alias_record_key("a.mp3") not in s3.objects
+    assert deduplication.canonical_key(BUCKET, "a.mp3") == "a.mp3"
+    assert deduplication.find_alias(BUCKET, "a.mp3", s3) is None
+
+
+@pytest.mark.parametrize("warm", [True, False])
+def test_overwritten_alias_not_resolved_again(s3, monkeypatch, warm):
+    monkeypatch.setattr(deduplication, "DEDUPLICATION_REVALIDATE_SECONDS", 0)
+    if not warm:
+        deduplication.CANONICAL_KEYS.clear()
+
+    assert deduplication.find_alias(BUCKET, "a.mp3", s3) is None
+    assert deduplication.CANONICAL_KEYS.get((BUCKET, "a.mp3")) is None
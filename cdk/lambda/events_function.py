@@ -0,0 +1,143 @@
+import logging
+from typing import Any, Dict
+from urllib.parse import unquote_plus
+
+from botocore.exceptions import ClientError
+from extras.clients import CALL_LATENCIES, get_client
+from extras.deduplication import register_upload
+from extras.exception import BaseError
+from extras.extractors import SimpleRegexInsightExtractor
+from extras.handlers import (TRANSCRIPTION_JOB_PREFIX,
+                             handle_transcript_from_s3_job,
+                             handle_transcript_text_from_s3_job,
+                             start_transcription_job, transcript_version)
+from extras.insights_index import INSIGHTS_INDEX_ENABLED, store_insights_index
+from extras.media import inspect_media
+from extras.metrics import flush_invocation_metrics
+from extras.transcript_cache import store_transcript_result
+from extras.transcript_items import (TRANSCRIPT_ITEMS_ENABLED,
+                                     store_transcript_items)
+from extras.validators import check_s3_object_exists, parse_s3_uri
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+s3 = get_client("s3")
+transcribe = get_client("transcribe")
+
+
+def start_transcription_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    AWS Lambda function handler for S3 `ObjectCreated` notifications.
+
+    Starts the transcription job of every uploaded audio file, so the transcript
+    is usually ready before the first insights request. A file with the content
+    of a file transcribed before is not transcribed again, see
+    `extras.deduplication.register_upload`.
+
+    Args:
+        event (Dict[str, Any]): The S3 notification event.
+        context (Any): The context object provided by AWS Lambda with
+                       runtime information.
+
+    Returns:
+        Dict[str, Any]: The names of the started transcription jobs, and the keys
+            of the deduplicated files.
+    """
+    started, deduplicated = [], []
+    for record in event.get("Records", []):
+        bucket_name = record["s3"]["bucket"]["name"]
+        key = unquote_plus(record["s3"]["object"]["key"])
+        try:
+            head_response = check_s3_object_exists(
+                bucket_name=bucket_name, key=key, s3_client=s3
+            )
+            if register_upload(bucket_name, key, head_response, s3) != key:
+                deduplicated.append(key)
+                continue
+            media = inspect_media(bucket_name, key, head_response, s3)
+            started.append(
+                start_transcription_job(
+                    bucket_name, key, transcribe, media.media_format, media.duration
+                )
+            )
+        except (BaseError, ClientError) as e:
+            # the other records are not retried for it, a skipped file is
+            # transcribed when its insights are first requested
+            logger.error(f"Skipping {bucket_name} {key}: {e}")
+
+    call_latencies = CALL_LATENCIES.reset()
+    logger.info(f"AWS call latencies: {call_latencies}")
+    flush_invocation_metrics(context, call_latencies)
+    return {"started": started, "deduplicated": deduplicated}
+
+
+def transcription_completed_handler(
+    event: Dict[str, Any], context: Any
+) -> Dict[str, Any]:
+    """
+    AWS Lambda function handler for the EventBridge `Transcribe Job State Change`
+    events of completed jobs.
+
+    Stores the transcript next to the audio file, so polling the insights endpoint
+    is answered with a single S3 lookup instead of the HEAD and Transcribe calls,
+    and the regex insights index and the columnar word items next to the
+    Transcribe output. The spaCy index is built by the first spaCy request, this
+    function does not load the model.
+
+    Args:
+        event (Dict[str, Any]): The EventBridge event.
+        context (Any): The context object provided by AWS Lambda with
+                       runtime information.
+
+    Returns:
+        Dict[str, Any]: The job name and whether its transcript was stored.
+    """
+    detail = event["detail"]
+    job_name = detail["TranscriptionJobName"]
+    if (
+        not job_name.startswith(TRANSCRIPTION_JOB_PREFIX)
+        or detail["TranscriptionJobStatus"] != "COMPLETED"
+    ):
+        return {"job_name": job_name, "stored": False}
+
+    try:
+        job = transcribe.get_transcription_job(TranscriptionJobName=job_name)
+        bucket_name, key = parse_s3_uri(
+            job["TranscriptionJob"]["Media"]["MediaFileUri"]
+        )
+        version = transcript_version(job["TranscriptionJob"])
+        if TRANSCRIPT_ITEMS_ENABLED:
+            transcript, items = handle_transcript_from_s3_job(
+                bucket_name, job_name + ".json", s3_client=s3
+            )
+            store_transcript_items(bucket_name, job_name, version, items, s3_client=s3)
+        else:
+            transcript = handle_transcript_text_from_s3_job(
+                bucket_name, job_name + ".json", s3_client=s3
+            )
+        store_transcript_result(
+            bucket_name, key, job_name, version, transcript, s3_client=s3
+        )
+        if INSIGHTS_INDEX_ENABLED:
+            extractor = SimpleRegexInsightExtractor()
+            store_insights_index(
+                bucket_name,
+                job_name,
+                version,
+                extractor,
+                extractor.build_index(transcript),
+                s3_client=s3,
+            )
+    except (BaseError, ClientError) as e:
+        # failing again on a retry of the event would not help, the API reads
+        # the Transcribe output itself when the transcript is not stored
+        logger.error(f"An error occurred for {job_name}: {e}")
+        return {"job_name": job_name, "stored": False}
+    finally:
+        call_latencies = CALL_LATENCIES.reset()
+        logger.info(f"AWS call latencies: {call_latencies}")
+        flush_invocation_metrics(context, call_latencies)
+
+    logger.info(f"Stored the transcript of {job_name}.")
+    return {"job_name": job_name, "stored": True}
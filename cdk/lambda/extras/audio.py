@@ -0,0 +1,284 @@
+from typing import Iterator, NamedTuple, Optional
+
+# the MediaFormat values of Transcribe, also the accepted file extensions
+MEDIA_FORMATS = ("amr", "flac", "m4a", "mp3", "mp4", "ogg", "wav", "webm")
+# MediaFormat by content type, for files whose first bytes are not recognized
+CONTENT_TYPE_FORMATS = {
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+    "audio/wav": "wav",
+    "audio/wave": "wav",
+    "audio/x-wav": "wav",
+    "audio/vnd.wave": "wav",
+    "audio/flac": "flac",
+    "audio/x-flac": "flac",
+    "audio/ogg": "ogg",
+    "audio/opus": "ogg",
+    "application/ogg": "ogg",
+    "audio/amr": "amr",
+    "audio/webm": "webm",
+    "video/webm": "webm",
+    "audio/mp4": "m4a",
+    "audio/m4a": "m4a",
+    "audio/x-m4a": "m4a",
+    "video/mp4": "mp4",
+}
+# ISO base media brands of audio only files
+_M4A_BRANDS = (b"M4A ", b"M4B ")
+
+# kbps by bitrate index, for MPEG-1 and MPEG-2/2.5 Layer III
+_MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Hz by sample rate index, for MPEG-1, MPEG-2 and MPEG-2.5
+_MP3_SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+_ID3_HEADER_LENGTH = 10
+
+
+class Mp3Frame(NamedTuple):
+    """
+    An MPEG Layer III audio frame.
+
+    Attributes:
+        offset (int): Byte offset of the frame in the file.
+        length (int): Length of the frame in bytes.
+        bitrate (int): Bitrate of the frame in bits per second.
+        duration (float): Duration of the audio of the frame, in seconds.
+    """
+
+    offset: int
+    length: int
+    bitrate: int
+    duration: float
+
+
+def id3_length(data: bytes) -> int:
+    """
+    Args:
+        data (bytes): The start of an MP3 file.
+
+    Returns:
+        int: The length of the ID3v2 tag at the start of the data, 0 if none.
+    """
+    if len(data) < _ID3_HEADER_LENGTH or data[:3] != b"ID3":
+        return 0
+    # 4 bytes of 7 bits ("syncsafe"), plus the footer when flagged
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = _ID3_HEADER_LENGTH if data[5] & 0x10 else 0
+    return _ID3_HEADER_LENGTH + size + footer
+
+
+def parse_mp3_frame(data: bytes, offset: int) -> "Mp3Frame | None":
+    """
+    Args:
+        data (bytes): The MP3 data.
+        offset (int): Byte offset of a possible frame header.
+
+    Returns:
+        Mp3Frame | None: The frame starting at the offset, None when the bytes are
+            not a valid Layer III frame header.
+    """
+    if offset + 4 > len(data):
+        return None
+    b1, b2 = data[offset + 1], data[offset + 2]
+    if data[offset] != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+
+    version = {0b11: 1, 0b10: 2, 0b00: 2.5}.get((b1 >> 3) & 0b11)
+    layer_iii = (b1 >> 1) & 0b11 == 0b01
+    bitrate_index, sample_rate_index = b2 >> 4, (b2 >> 2) & 0b11
+    if (
+        version is None
+        or not layer_iii
+        or bitrate_index in (0, 15)
+        or sample_rate_index == 3
+    ):
+        return None
+
+    bitrate = _MP3_BITRATES[1 if version == 1 else 2][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+    samples = 1152 if version == 1 else 576
+    padding = (b2 >> 1) & 1
+    return Mp3Frame(
+        offset=offset,
+        length=samples // 8 * bitrate // sample_rate + padding,
+        bitrate=bitrate,
+        duration=samples / sample_rate,
+    )
+
+
+def iter_mp3_frames(data: bytes) -> Iterator[Mp3Frame]:
+    """
+    Iterate over the audio frames of an MP3 file, skipping its ID3v2 tag and any
+    bytes between frames that are not a frame header.
+
+    Args:
+        data (bytes): The MP3 file.
+
+    Yields:
+        Mp3Frame: The frames, in order.
+    """
+    offset = id3_length(data)
+    while offset + 4 <= len(data):
+        frame = parse_mp3_frame(data, offset)
+        if frame is None:
+            offset += 1
+            continue
+        yield frame
+        offset += frame.length
+
+
+def estimate_mp3_duration(data: bytes, size: int) -> Optional[float]:
+    """
+    Estimate the duration of an MP3 file from its first bytes.
+
+    The frame count of a Xing or Info header, written in the first frame by most
+    encoders of variable bitrate files, gives the exact duration. Otherwise the
+    audio is assumed to have the mean bitrate of the frames of the data.
+
+    Args:
+        data (bytes): The start of the MP3 file.
+        size (int): The size of the whole file in bytes.
+
+    Returns:
+        Optional[float]: The duration in seconds, None when the data holds no
+            complete frame.
+    """
+    frames = []
+    for frame in iter_mp3_frames(data):
+        if frame.offset + frame.length > len(data):
+            break
+        frames.append(frame)
+    if not frames:
+        return None
+
+    first = frames[0]
+    header = data[first.offset : first.offset + first.length]
+    for tag in (b"Xing", b"Info"):
+        position = header.find(tag)
+        if position >= 0 and position + 12 <= len(header):
+            flags = int.from_bytes(header[position + 4 : position + 8], "big")
+            if flags & 1:
+                frame_count = int.from_bytes(
+                    header[position + 8 : position + 12], "big"
+                )
+                return frame_count * first.duration
+
+    return (
+        (size - first.offset)
+        * sum(frame.duration for frame in frames)
+        / sum(frame.length for frame in frames)
+    )
+
+
+def sniff_media_format(data: bytes) -> Optional[str]:
+    """
+    Detect the format of an audio file from its magic number.
+
+    Args:
+        data (bytes): The start of the file.
+
+    Returns:
+        Optional[str]: The MediaFormat of Transcribe, None when it is not recognized.
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return "wav"
+    if data[:4] == b"OggS":
+        return "ogg"
+    if data[:5] == b"#!AMR":
+        return "amr"
+    if data[:4] == b"\x1a\x45\xdf\xa3":  # EBML, the container of WebM
+        return "webm"
+    if data[4:8] == b"ftyp":
+        return "m4a" if data[8:12] in _M4A_BRANDS else "mp4"
+
+    # an ID3 tag may also precede a FLAC stream
+    audio_start = id3_length(data)
+    if data[audio_start : audio_start + 4] == b"fLaC":
+        return "flac"
+    if audio_start or parse_mp3_frame(data, 0) is not None:
+        return "mp3"
+    return None
+
+
+def estimate_wav_duration(data: bytes, size: int) -> Optional[float]:
+    """
+    Args:
+        data (bytes): The start of the WAV file, up to its `data` chunk.
+        size (int): The size of the whole file in bytes.
+
+    Returns:
+        Optional[float]: The duration in seconds, from the byte rate of the `fmt `
+            chunk, None when the data holds no `fmt ` and `data` chunks.
+    """
+    byte_rate = 0
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = data[offset : offset + 4]
+        chunk_size = int.from_bytes(data[offset + 4 : offset + 8], "little")
+        if chunk_id == b"fmt " and offset + 20 <= len(data):
+            byte_rate = int.from_bytes(data[offset + 16 : offset + 20], "little")
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # streaming encoders leave the size of the data chunk unset
+            audio_size = size - offset - 8
+            if 0 < chunk_size < audio_size:
+                audio_size = chunk_size
+            return audio_size / byte_rate
+        offset += 8 + chunk_size + chunk_size % 2
+    return None
+
+
+def estimate_flac_duration(data: bytes) -> Optional[float]:
+    """
+    Args:
+        data (bytes): The start of the FLAC file.
+
+    Returns:
+        Optional[float]: The duration in seconds, from the sample count of the
+            STREAMINFO block, None when it is missing or unknown.
+    """
+    offset = id3_length(data) + 4
+    if data[offset - 4 : offset] != b"fLaC" or offset + 4 + 18 > len(data):
+        return None
+    if data[offset] & 0x7F != 0:  # STREAMINFO must be the first metadata block
+        return None
+    info = data[offset + 4 : offset + 22]
+    sample_rate = (info[10] << 12) | (info[11] << 4) | (info[12] >> 4)
+    total_samples = ((info[13] & 0x0F) << 32) | int.from_bytes(info[14:18], "big")
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+
+def estimate_duration(
+    data: bytes, size: int, media_format: Optional[str]
+) -> Optional[float]:
+    """
+    Estimate the duration of an audio file from its first bytes.
+
+    Args:
+        data (bytes): The start of the file.
+        size (int): The size of the whole file in bytes.
+        media_format (Optional[str]): The format of the file, see `sniff_media_format`.
+
+    Returns:
+        Optional[float]: The duration in seconds, None for the formats whose
+            duration cannot be read from the start of the file (Ogg, AMR, WebM,
+            MP4) or when the data is too short.
+    """
+    if media_format == "mp3":
+        return estimate_mp3_duration(data, size)
+    if media_format == "wav":
+        return estimate_wav_duration(data, size)
+    if media_format == "flac":
+        return estimate_flac_duration(data)
+    return None
@@ -0,0 +1,144 @@
+import logging
+import os
+import time
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Dict
+
+import boto3
+from botocore.client import BaseClient
+from botocore.config import Config
+
+# sized for the batch thread pool, one pooled connection per worker
+AWS_CLIENT_MAX_POOL_CONNECTIONS = int(
+    os.getenv("AWS_CLIENT_MAX_POOL_CONNECTIONS", "10")
+)
+AWS_CLIENT_CONNECT_TIMEOUT = float(os.getenv("AWS_CLIENT_CONNECT_TIMEOUT", "2"))
+AWS_CLIENT_READ_TIMEOUT = float(os.getenv("AWS_CLIENT_READ_TIMEOUT", "10"))
+# attempts including the first one
+AWS_CLIENT_MAX_ATTEMPTS = int(os.getenv("AWS_CLIENT_MAX_ATTEMPTS", "4"))
+AWS_CLIENT_RETRY_MODE = os.getenv("AWS_CLIENT_RETRY_MODE", "adaptive")
+AWS_CLIENT_TCP_KEEPALIVE = os.getenv("AWS_CLIENT_TCP_KEEPALIVE", "True") == "True"
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+class CallLatencies:
+    """
+    Latency of the AWS API calls, aggregated per service and operation.
+
+    A call is timed from its first attempt to its last retry, failures included.
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = Lock()
+
+    def record(self, operation: str, seconds: float, failed: bool = False) -> None:
+        """
+        Args:
+            operation (str): The name of the call, e.g. `s3.GetObject`.
+            seconds (float): The duration of the call.
+            failed (bool): Whether the call failed.
+        """
+        with self._lock:
+            stats = self._stats.setdefault(
+                operation, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            stats["calls"] += 1
+            stats["errors"] += failed
+            stats["total_ms"] += seconds * 1000
+            stats["max_ms"] = max(stats["max_ms"], seconds * 1000)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns:
+            Dict[str, Dict[str, float]]: The number of calls and errors, the total
+                and maximum latency in milliseconds, of every operation.
+        """
+        with self._lock:
+            return {
+                operation: {
+                    **stats,
+                    "total_ms": round(stats["total_ms"], 1),
+                    "max_ms": round(stats["max_ms"], 1),
+                }
+                for operation, stats in self._stats.items()
+            }
+
+    def reset(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns:
+            Dict[str, Dict[str, float]]: The statistics before the reset.
+        """
+        stats = self.stats()
+        with self._lock:
+            self._stats.clear()
+        return stats
+
+
+CALL_LATENCIES = CallLatencies()
+
+
+def client_config() -> Config:
+    """
+    Returns:
+        Config: The botocore configuration shared by the clients: pooled and kept
+            alive connections, bounded timeouts and adaptive retries.
+    """
+    return Config(
+        max_pool_connections=AWS_CLIENT_MAX_POOL_CONNECTIONS,
+        connect_timeout=AWS_CLIENT_CONNECT_TIMEOUT,
+        read_timeout=AWS_CLIENT_READ_TIMEOUT,
+        tcp_keepalive=AWS_CLIENT_TCP_KEEPALIVE,
+        retries={
+            "total_max_attempts": AWS_CLIENT_MAX_ATTEMPTS,
+            "mode": AWS_CLIENT_RETRY_MODE,
+        },
+    )
+
+
+@lru_cache(maxsize=None)
+def get_client(service_name: str) -> BaseClient:
+    """
+    Create the client of an AWS service once per container, so handlers and the
+    threads of concurrent code paths share its connection pool.
+
+    Args:
+        service_name (str): The name of the service, e.g. `s3`.
+
+    Returns:
+        BaseClient: The client, timing every API call into `CALL_LATENCIES`.
+    """
+    client = boto3.client(service_name, config=client_config())
+    service_id = client.meta.service_model.service_id.hyphenize()
+    # first and last, so the timing covers the other handlers of the call too
+    client.meta.events.register_first(f"before-call.{service_id}", _start_call)
+    client.meta.events.register_last(f"after-call.{service_id}", _finish_call)
+    client.meta.events.register_last(f"after-call-error.{service_id}", _fail_call)
+    return client
+
+
+def _start_call(context: Dict[str, Any], **kwargs) -> None:
+    context["call_started"] = time.perf_counter()
+
+
+def _finish_call(
+    event_name: str, http_response: Any, context: Dict[str, Any], **kwargs
+) -> None:
+    _record_call(event_name, context, failed=http_response.status_code >= 300)
+
+
+def _fail_call(event_name: str, context: Dict[str, Any], **kwargs) -> None:
+    _record_call(event_name, context, failed=True)
+
+
+def _record_call(event_name: str, context: Dict[str, Any], failed: bool) -> None:
+    started = context.pop("call_started", None)
+    if started is not None:
+        # event names are `<event>.<service id>.<operation>`
+        _, service_id, operation = event_name.split(".", 2)
+        CALL_LATENCIES.record(
+            f"{service_id}.{operation}", time.perf_counter() - started, failed=failed
+        )
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+from botocore.exceptions import ClientError
+from extras.cache import LRUCache
+from extras.types import S3ClientType
+
+# content and alias records in the source bucket, deduplication disabled when empty
+DEDUPLICATION_S3_PREFIX = os.getenv("DEDUPLICATION_S3_PREFIX", "")
+# canonical keys of the audio objects of warm containers, keyed by bucket/key
+CANONICAL_KEYS = LRUCache(maxsize=1024)
+# seconds a canonical key is used without checking the content of the object again
+DEDUPLICATION_REVALIDATE_SECONDS = float(
+    os.getenv("DEDUPLICATION_REVALIDATE_SECONDS", "300")
+)
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+class CanonicalKey(NamedTuple):
+    """
+    The canonical key resolved for an audio object, in the in-process cache.
+
+    Attributes:
+        key (str): The key of the object transcribed for the same content.
+        content (Optional[str]): The content identifier of the object, see
+                                 `content_id`.
+        checked (float): When the content of the object was last checked.
+    """
+
+    key: str
+    content: Optional[str]
+    checked: float
+
+
+def content_id(head_response: Dict[str, Any]) -> Optional[str]:
+    """
+    Identify the content of an audio object from its HEAD response, without
+    reading it: the ETag (the MD5 of objects uploaded in a single part) and the
+    size. Identical files uploaded in parts of different sizes get different
+    ETags, they are then transcribed separately.
+
+    Args:
+        head_response (Dict[str, Any]): The head response of the object.
+
+    Returns:
+        Optional[str]: The identifier, None without an ETag.
+    """
+    etag = head_response.get("ETag", "").strip('"')
+    if not etag:
+        return None
+    return f"{etag}-{head_response.get('ContentLength', 0)}"
+
+
+def _content_record_key(identifier: str) -> str:
+    return f"{DEDUPLICATION_S3_PREFIX}content/{identifier}.json"
+
+
+def _alias_record_key(key: str) -> str:
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+    return f"{DEDUPLICATION_S3_PREFIX}aliases/{digest}.json"
+
+
+def canonical_key(bucket_name: str, key: str) -> str:
+    """
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        key (str): The key of the audio S3 object.
+
+    Returns:
+        str: The key of the object transcribed for the same content, as resolved
+            by this container less than `DEDUPLICATION_REVALIDATE_SECONDS` ago,
+            the key itself otherwise.
+    """
+    cached = CANONICAL_KEYS.get((bucket_name, key))
+    if (
+        cached is None
+        or time.time() - cached.checked > DEDUPLICATION_REVALIDATE_SECONDS
+    ):
+        return key
+    return cached.key
+
+
+def find_alias(bucket_name: str, key: str, s3_client: S3ClientType) -> Optional[str]:
+    """
+    Look up the alias record of an audio object whose content was already
+    transcribed under another key. The record only holds while the object keeps
+    the content it was recorded with: an object overwritten since is not an
+    alias anymore and has to be registered again, see `register_upload`.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        key (str): The key of the audio S3 object.
+        s3_client (S3ClientType): client to interact with s3 bucket
+
+    Returns:
+        Optional[str]: The canonical key, None if the object is not an alias.
+    """
+    if not DEDUPLICATION_S3_PREFIX:
+        return None
+
+    cached = CANONICAL_KEYS.get((bucket_name, key))
+    if cached is None:
+        record = _read_record(bucket_name, _alias_record_key(key), s3_client)
+        if record is None or record.get("key") in (None, key):
+            return None
+        cached = CanonicalKey(record["key"], record.get("content"), 0.0)
+    if cached.key == key:
+        return None
+
+    try:
+        head_response = s3_client.head_object(Bucket=bucket_name, Key=key)
+    except ClientError:
+        # the missing object is reported when its transcription is started
+        return None
+    if content_id(head_response) != cached.content:
+        logger.info(
+            f"{bucket_name} {key} changed since it was an alias of {cached.key}."
+        )
+        CANONICAL_KEYS.pop((bucket_name, key))
+        return None
+    CANONICAL_KEYS.put((bucket_name, key), cached._replace(checked=time.time()))
+    return cached.key
+
+
+def register_upload(
+    bucket_name: str,
+    key: str,
+    head_response: Dict[str, Any],
+    s3_client: S3ClientType,
+    stale_key: Optional[str] = None,
+) -> str:
+    """
+    Map an audio object about to be transcribed onto the object already
+    transcribed for the same content, if any.
+
+    The first object of a content is recorded as its canonical key, the next ones
+    get an alias record pointing to it and share its transcription job, its
+    stored transcript, insights index and word items. Two identical files
+    uploaded at the same moment may both be recorded as canonical, they are then
+    both transcribed. An object whose canonical object is gone takes its place.
+    An alias overwritten with a new content loses its alias record and is
+    registered for the new content.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        key (str): The key of the audio S3 object.
+        head_response (Dict[str, Any]): The head response of the object.
+        s3_client (S3ClientType): client to interact with s3 bucket
+        stale_key (Optional[str]): The canonical key the object was an alias of,
+                                   whose object no longer exists.
+
+    Returns:
+        str: The key to transcribe, the canonical key of the content.
+    """
+    identifier = content_id(head_response)
+    cached = CANONICAL_KEYS.get((bucket_name, key))
+    if cached is not None and cached.content != identifier:
+        CANONICAL_KEYS.pop((bucket_name, key))
+    if not DEDUPLICATION_S3_PREFIX or identifier is None:
+        return key
+
+    record_key = _content_record_key(identifier)
+    record = _read_record(bucket_name, record_key, s3_client)
+    canonical = record.get("key") if record is not None else None
+    if canonical is None or canonical == stale_key:
+        _write_record(bucket_name, record_key, {"key": key}, s3_client)
+        canonical = key
+    if canonical != key:
+        logger.info(f"{bucket_name} {key} has the content of {canonical}.")
+        _write_record(
+            bucket_name,
+            _alias_record_key(key),
+            {"key": canonical, "content": identifier},
+            s3_client,
+        )
+    else:
+        if stale_key is not None:
+            logger.info(f"{bucket_name} {key} replaces {stale_key}, which is gone.")
+        # the key may have been an alias for a previous content
+        _delete_record(bucket_name, _alias_record_key(key), s3_client)
+
+    CANONICAL_KEYS.put(
+        (bucket_name, key), CanonicalKey(canonical, identifier, time.time())
+    )
+    return canonical
+
+
+def _read_record(
+    bucket_name: str, record_key: str, s3_client: S3ClientType
+) -> Optional[Dict[str, Any]]:
+    try:
+        response = s3_client.get_object(Bucket=bucket_name, Key=record_key)
+        record = json.loads(response["Body"].read())
+        return record if isinstance(record, dict) else None
+    except s3_client.exceptions.NoSuchKey:
+        return None
+    except (ClientError, ValueError) as e:
+        logger.error(f"Cant read the record {bucket_name} {record_key}: {e}")
+        return None
+
+
+def _write_record(
+    bucket_name: str, record_key: str, record: Dict[str, Any], s3_client: S3ClientType
+) -> None:
+    try:
+        s3_client.put_object(
+            Bucket=bucket_name,
+            Key=record_key,
+            Body=json.dumps(record).encode("utf-8"),
+            ContentType="application/json",
+        )
+    except ClientError as e:
+        logger.error(f"Cant write the record {bucket_name} {record_key}: {e}")
+
+
+def _delete_record(bucket_name: str, record_key: str, s3_client: S3ClientType) -> None:
+    try:
+        s3_client.delete_object(Bucket=bucket_name, Key=record_key)
+    except ClientError as e:
+        logger.error(f"Cant delete the record {bucket_name} {record_key}: {e}")
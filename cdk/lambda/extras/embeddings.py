@@ -0,0 +1,621 @@
+import base64
+import logging
+from abc import abstractmethod
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy
+from extras.extractors import InsightExtractor
+from extras.transcript import TranscriptIndex, TranscriptItems
+
+SIMILARITY_THRESHOLD = 0.7
+# tokens whose window sums are computed at once by the phrase matching, bounds its memory
+PHRASE_MATCHING_BLOCK_TOKENS = 4096
+# sentences compared at once by `iter_insights`, the rest only once consumed
+ITER_INSIGHTS_BLOCK_SENTENCES = 256
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+class TrackerEmbedding(NamedTuple):
+    """
+    The parts of a processed tracker the embedding extractors need.
+
+    Attributes:
+        text (str): The tracker text.
+        keys (numpy.ndarray): Vector keys of the tracker tokens.
+        tokens (Tuple[str, ...]): Lower-cased texts of the tracker tokens.
+        vector (numpy.ndarray): Mean vector of the tracker tokens.
+    """
+
+    text: str
+    keys: numpy.ndarray
+    tokens: Tuple[str, ...]
+    vector: numpy.ndarray
+
+
+class SentenceEmbeddings(NamedTuple):
+    """
+    The index of a transcript processed by an embedding extractor.
+
+    Attributes:
+        sentence_spans (numpy.ndarray): Start and end character offsets of the sentences.
+        token_bounds (numpy.ndarray): Start and end token positions of the sentences.
+        token_spans (numpy.ndarray): Start and end character offsets of the tokens.
+        keys (numpy.ndarray): Vector keys of the transcript tokens.
+        tokens (List[str]): Lower-cased texts of the transcript tokens.
+        vectors (numpy.ndarray): Mean vector of every sentence.
+    """
+
+    sentence_spans: numpy.ndarray
+    token_bounds: numpy.ndarray
+    token_spans: numpy.ndarray
+    keys: numpy.ndarray
+    tokens: List[str]
+    vectors: numpy.ndarray
+
+
+def _encode_array(array: numpy.ndarray) -> Dict[str, Any]:
+    return {
+        "dtype": array.dtype.str,
+        "shape": list(array.shape),
+        "data": base64.b64encode(numpy.ascontiguousarray(array).tobytes()).decode(
+            "ascii"
+        ),
+    }
+
+
+def _decode_array(data: Dict[str, Any]) -> numpy.ndarray:
+    return numpy.frombuffer(
+        base64.b64decode(data["data"]), dtype=data["dtype"]
+    ).reshape(data["shape"])
+
+
+class EmbeddingInsightExtractor(InsightExtractor):
+    """
+    Base class of the extractors comparing static word vectors of the transcript
+    and the trackers, see `extras.spacy_extractors` and `extras.static_vectors`.
+
+    Sentences and trackers are embedded as the mean vector of their tokens and
+    compared by cosine similarity. Subclasses split the transcript into sentences
+    and tokens (`build_index`), embed the trackers and look up the token vectors.
+
+    With phrase matching, every tracker is compared to the windows of as many
+    consecutive tokens as it has, instead of to whole sentences, so long sentences
+    do not dilute the similarity, and the best window of a sentence gives the exact
+    token positions of the match.
+
+    Args:
+        phrase_matching (bool): Whether to match trackers to token windows instead
+                                of whole sentences.
+    """
+
+    def __init__(self, phrase_matching: bool = False):
+        self.phrase_matching = phrase_matching
+
+    @abstractmethod
+    def build_index(self, transcript_text: str) -> SentenceEmbeddings:
+        pass
+
+    @abstractmethod
+    def _embed_trackers(self, trackers: List[str]) -> List[TrackerEmbedding]:
+        pass
+
+    @abstractmethod
+    def _token_vectors(self, index: SentenceEmbeddings) -> numpy.ndarray:
+        pass
+
+    def extract_insights(
+        self,
+        transcript_text: str,
+        trackers: List[str],
+        items: Optional[TranscriptItems] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract insights from the transcribed text using sentence embeddings.
+        Searches for sentences semantically similar to the trackers.
+
+        Args:
+            transcript_text (str): The transcribed text.
+            trackers (List[str]): List of trackers to search for in the transcript.
+            items (Optional[TranscriptItems]): The words of the transcript with their
+                                               timings, adds the audio position of
+                                               the matching sentences when given.
+
+        Returns:
+            List[Dict[str, Any]]: A list of dictionaries containing insights.
+        """
+        return self.extract_insights_from_index(
+            transcript_text, self.build_index(transcript_text), trackers, items
+        )
+
+    def extract_insights_from_index(
+        self,
+        transcript_text: str,
+        index: SentenceEmbeddings,
+        trackers: List[str],
+        items: Optional[TranscriptItems] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract the same insights as `extract_insights` from the precomputed
+        sentence embeddings, without processing the transcript again.
+
+        Args:
+            transcript_text (str): The transcribed text.
+            index (SentenceEmbeddings): The index built by `build_index` for the text.
+            trackers (List[str]): List of trackers to search for in the transcript.
+            items (Optional[TranscriptItems]): The words of the transcript with their
+                                               timings, adds the audio position of
+                                               the matching sentences when given.
+
+        Returns:
+            List[Dict[str, Any]]: A list of dictionaries containing insights.
+        """
+        transcript_index = TranscriptIndex(
+            transcript_text, index.sentence_spans.tolist(), ()
+        )
+        tracker_embeddings = self._embed_trackers(trackers)
+
+        if self.phrase_matching:
+            return self._phrase_insights(
+                transcript_text,
+                transcript_index,
+                index,
+                tracker_embeddings,
+                items,
+                self._phrase_matches(index, tracker_embeddings),
+            )
+        return self._sentence_insights(
+            transcript_text, transcript_index, index, tracker_embeddings, items
+        )
+
+    def iter_insights(
+        self,
+        transcript_text: str,
+        trackers: List[str],
+        items: Optional[TranscriptItems] = None,
+        index: Optional[SentenceEmbeddings] = None,
+        start_sentence: int = 0,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the insights of `extract_insights` from the sentence `start_sentence`
+        on. The sentences are compared to the trackers in blocks of
+        `ITER_INSIGHTS_BLOCK_SENTENCES`, or of `PHRASE_MATCHING_BLOCK_TOKENS` tokens
+        with phrase matching, a block only when the previous insights are consumed.
+
+        Without an index the whole transcript is processed by `build_index` first.
+
+        Args:
+            transcript_text (str): The transcribed text.
+            trackers (List[str]): List of trackers to search for in the transcript.
+            items (Optional[TranscriptItems]): The words of the transcript with their
+                                               timings, adds the audio position of
+                                               the insights when given.
+            index (Optional[SentenceEmbeddings]): The index built by `build_index`
+                                                  for the text.
+            start_sentence (int): Index of the first sentence to search.
+
+        Yields:
+            Dict[str, Any]: The insights.
+        """
+        if index is None:
+            index = self.build_index(transcript_text)
+        transcript_index = TranscriptIndex(
+            transcript_text, index.sentence_spans.tolist(), ()
+        )
+        tracker_embeddings = self._embed_trackers(trackers)
+
+        if self.phrase_matching:
+            for matches in self._iter_phrase_matches(
+                index, tracker_embeddings, start_sentence
+            ):
+                yield from self._phrase_insights(
+                    transcript_text,
+                    transcript_index,
+                    index,
+                    tracker_embeddings,
+                    items,
+                    matches,
+                )
+            return
+
+        for block_start in range(
+            start_sentence, len(index.sentence_spans), ITER_INSIGHTS_BLOCK_SENTENCES
+        ):
+            yield from self._sentence_insights(
+                transcript_text,
+                transcript_index,
+                index,
+                tracker_embeddings,
+                items,
+                slice(block_start, block_start + ITER_INSIGHTS_BLOCK_SENTENCES),
+            )
+
+    def _sentence_insights(
+        self,
+        transcript_text: str,
+        transcript_index: TranscriptIndex,
+        index: SentenceEmbeddings,
+        trackers: List[TrackerEmbedding],
+        items: Optional[TranscriptItems],
+        sentences: slice = slice(None),
+    ) -> List[Dict[str, Any]]:
+        """
+        Build the insights of the sentences similar to the trackers as a whole.
+
+        Args:
+            transcript_text (str): The transcribed text.
+            transcript_index (TranscriptIndex): The sentences of the transcript.
+            index (SentenceEmbeddings): The index built by `build_index` for the text.
+            trackers (List[TrackerEmbedding]): The trackers.
+            items (Optional[TranscriptItems]): The words of the transcript with their
+                                               timings, adds the audio position of
+                                               the matching sentences when given.
+            sentences (slice): The consecutive sentences to compare, all by default.
+
+        Returns:
+            List[Dict[str, Any]]: A list of dictionaries containing insights.
+        """
+        insights = []
+        first_sentence = sentences.indices(len(index.sentence_spans))[0]
+        similarities = self._similarity_matrix(
+            index._replace(
+                sentence_spans=index.sentence_spans[sentences],
+                token_bounds=index.token_bounds[sentences],
+                vectors=index.vectors[sentences],
+            ),
+            trackers,
+        )
+        sentence_indexes, tracker_indexes = numpy.nonzero(
+            similarities > SIMILARITY_THRESHOLD
+        )
+        sentence_indexes += first_sentence
+
+        sentence_tokens_idexes = {}
+        for i, j in zip(sentence_indexes.tolist(), tracker_indexes.tolist()):
+            if i not in sentence_tokens_idexes:
+                start, end = index.token_bounds[i].tolist()
+                sentence_tokens_idexes[i] = {
+                    token: position
+                    for position, token in enumerate(index.tokens[start:end])
+                }
+            tracker = trackers[j]
+
+            start_word_index, end_word_index = self._find_word_indicies(
+                sentence_tokens_idexes[i], tracker.tokens
+            )
+
+            insights.append(
+                {
+                    "sentence_index": i,
+                    "start_word_index": start_word_index,
+                    "end_word_index": end_word_index,
+                    "tracker_value": tracker.text,
+                    "transcribe_value": transcript_index.sentence(i).strip(),
+                    "similarity_score": float(similarities[i - first_sentence, j]),
+                }
+            )
+
+        if items is not None:
+            spans = index.sentence_spans[sentence_indexes].tolist()
+            items.annotate(transcript_text, insights, spans)
+        return insights
+
+    def extract_insights_with_sentence_count(
+        self,
+        transcript_text: str,
+        trackers: List[str],
+        items: Optional[TranscriptItems] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        index = self.build_index(transcript_text)
+        return (
+            self.extract_insights_from_index(transcript_text, index, trackers, items),
+            len(index.sentence_spans),
+        )
+
+    def dump_index(self, index: SentenceEmbeddings) -> Dict[str, Any]:
+        return {
+            "sentence_spans": _encode_array(index.sentence_spans),
+            "token_bounds": _encode_array(index.token_bounds),
+            "token_spans": _encode_array(index.token_spans),
+            "keys": _encode_array(index.keys),
+            "tokens": index.tokens,
+            "vectors": _encode_array(index.vectors),
+        }
+
+    def load_index(self, data: Dict[str, Any]) -> SentenceEmbeddings:
+        return SentenceEmbeddings(
+            sentence_spans=_decode_array(data["sentence_spans"]),
+            token_bounds=_decode_array(data["token_bounds"]),
+            token_spans=_decode_array(data["token_spans"]),
+            keys=_decode_array(data["keys"]),
+            tokens=data["tokens"],
+            vectors=_decode_array(data["vectors"]),
+        )
+
+    def _similarity_matrix(
+        self, index: SentenceEmbeddings, trackers: List[TrackerEmbedding]
+    ) -> numpy.ndarray:
+        """
+        Compute the cosine similarity of every sentence and tracker at once.
+
+        Mirrors `Doc.similarity`: vectors are averages of the token vectors, a zero
+        vector has a similarity of 0 and a tracker with the same tokens as the
+        sentence has a similarity of 1.
+
+        Args:
+            index (SentenceEmbeddings): The sentences of the transcript.
+            trackers (List[TrackerEmbedding]): The trackers.
+
+        Returns:
+            numpy.ndarray: A (sentences x trackers) matrix of similarities.
+        """
+        sentence_vectors = index.vectors
+        tracker_vectors = numpy.array(
+            [tracker.vector for tracker in trackers], dtype="float32"
+        ).reshape(len(trackers), sentence_vectors.shape[1])
+
+        norms = numpy.outer(
+            numpy.linalg.norm(sentence_vectors, axis=1),
+            numpy.linalg.norm(tracker_vectors, axis=1),
+        )
+        similarities = numpy.divide(
+            sentence_vectors @ tracker_vectors.T,
+            norms,
+            out=numpy.zeros(norms.shape, dtype=norms.dtype),
+            where=norms != 0,
+        )
+
+        trackers_by_keys = {}
+        for j, tracker in enumerate(trackers):
+            trackers_by_keys.setdefault(tuple(tracker.keys.tolist()), []).append(j)
+        tracker_lengths = {len(tracker.keys) for tracker in trackers}
+        for i, (start, end) in enumerate(index.token_bounds.tolist()):
+            if end - start in tracker_lengths:
+                sentence_keys = tuple(index.keys[start:end].tolist())
+                for j in trackers_by_keys.get(sentence_keys, ()):
+                    similarities[i, j] = 1.0
+        return similarities
+
+    def _phrase_insights(
+        self,
+        transcript_text: str,
+        transcript_index: TranscriptIndex,
+        index: SentenceEmbeddings,
+        trackers: List[TrackerEmbedding],
+        items: Optional[TranscriptItems],
+        matches: List[Tuple[int, int, int, float]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Build the insights of the best matching token window of every sentence
+        and tracker.
+
+        Args:
+            transcript_text (str): The transcribed text.
+            transcript_index (TranscriptIndex): The sentences of the transcript.
+            index (SentenceEmbeddings): The index built by `build_index` for the text.
+            trackers (List[TrackerEmbedding]): The trackers.
+            items (Optional[TranscriptItems]): The words of the transcript with their
+                                               timings, adds the audio position of
+                                               the matching windows when given.
+            matches (List[Tuple[int, int, int, float]]): The windows, see
+                                                         `_phrase_matches`.
+
+        Returns:
+            List[Dict[str, Any]]: A list of dictionaries containing insights.
+        """
+        insights, spans = [], []
+        sentence_starts = index.token_bounds[:, 0]
+        for i, j, start, score in matches:
+            end = start + len(trackers[j].keys) - 1
+            insights.append(
+                {
+                    "sentence_index": i,
+                    "start_word_index": start - int(sentence_starts[i]),
+                    "end_word_index": end - int(sentence_starts[i]),
+                    "tracker_value": trackers[j].text,
+                    "transcribe_value": transcript_index.sentence(i).strip(),
+                    "similarity_score": score,
+                }
+            )
+            spans.append(
+                (int(index.token_spans[start, 0]), int(index.token_spans[end, 1]))
+            )
+
+        if items is not None:
+            items.annotate(transcript_text, insights, spans)
+        return insights
+
+    def _phrase_matches(
+        self, index: SentenceEmbeddings, trackers: List[TrackerEmbedding]
+    ) -> List[Tuple[int, int, int, float]]:
+        """
+        Find the window of consecutive tokens of every sentence most similar to
+        every tracker, a window having as many tokens as the tracker.
+
+        The token vectors are summed cumulatively, so the sum of any window is the
+        difference of two cumulative sums and all the windows of a length are
+        computed at once, in linear time whatever the length. The cosine similarity
+        does not depend on the scale of the vectors, so the sums are compared to
+        the trackers without averaging them. As for sentences, a window with the
+        same tokens as the tracker has a similarity of 1. Windows never cross
+        sentences, and a sentence shorter than a tracker has no window for it.
+
+        The transcript is processed in blocks of whole sentences to bound the
+        memory of the cumulative sums.
+
+        Args:
+            index (SentenceEmbeddings): The sentences of the transcript.
+            trackers (List[TrackerEmbedding]): The trackers.
+
+        Returns:
+            List[Tuple[int, int, int, float]]: The sentence index, tracker index,
+                first token position of the best window and its similarity, of the
+                windows above `SIMILARITY_THRESHOLD`, ordered by sentence and tracker.
+        """
+        return [
+            match
+            for matches in self._iter_phrase_matches(index, trackers)
+            for match in matches
+        ]
+
+    def _iter_phrase_matches(
+        self,
+        index: SentenceEmbeddings,
+        trackers: List[TrackerEmbedding],
+        start_sentence: int = 0,
+    ) -> Iterator[List[Tuple[int, int, int, float]]]:
+        """
+        Find the windows of `_phrase_matches` a block of sentences at a time, from
+        the sentence `start_sentence` on.
+
+        Args:
+            index (SentenceEmbeddings): The sentences of the transcript.
+            trackers (List[TrackerEmbedding]): The trackers.
+            start_sentence (int): Index of the first sentence to search.
+
+        Yields:
+            List[Tuple[int, int, int, float]]: The windows of every block holding
+                any, ordered by sentence and tracker.
+        """
+        if not trackers or not len(index.keys):
+            return
+
+        tracker_vectors = numpy.array(
+            [tracker.vector for tracker in trackers], dtype="float64"
+        ).reshape(len(trackers), -1)
+        tracker_norms = numpy.linalg.norm(tracker_vectors, axis=1)
+        tracker_lengths = numpy.array(
+            [len(tracker.keys) for tracker in trackers], dtype="int64"
+        )
+
+        token_bounds = index.token_bounds
+        token_sentences = numpy.repeat(
+            numpy.arange(len(token_bounds)), token_bounds[:, 1] - token_bounds[:, 0]
+        )
+
+        for block_start, block_end in self._sentence_blocks(
+            token_bounds[start_sentence:]
+        ):
+            matches = []
+            block_sentences = token_sentences[block_start:block_end]
+            token_vectors = self._token_vectors(
+                index._replace(
+                    keys=index.keys[block_start:block_end],
+                    tokens=index.tokens[block_start:block_end],
+                )
+            )
+            sums = numpy.zeros(
+                (block_end - block_start + 1, tracker_vectors.shape[1]),
+                dtype="float64",
+            )
+            numpy.cumsum(token_vectors, axis=0, out=sums[1:])
+
+            for length in numpy.unique(tracker_lengths).tolist():
+                if not 0 < length <= block_end - block_start:
+                    continue
+                # windows starting at every position, kept when within a sentence
+                within = block_sentences[: len(sums) - length] == (
+                    block_sentences[length - 1 :]
+                )
+                starts = numpy.flatnonzero(within)
+                if not len(starts):
+                    continue
+                window_vectors = sums[starts + length] - sums[starts]
+
+                columns = numpy.flatnonzero(tracker_lengths == length)
+                norms = numpy.outer(
+                    numpy.linalg.norm(window_vectors, axis=1), tracker_norms[columns]
+                )
+                similarities = numpy.divide(
+                    window_vectors @ tracker_vectors[columns].T,
+                    norms,
+                    out=numpy.zeros(norms.shape),
+                    where=norms != 0,
+                )
+                window_keys = numpy.lib.stride_tricks.sliding_window_view(
+                    index.keys[block_start:block_end], length
+                )[starts]
+                for column, j in enumerate(columns.tolist()):
+                    exact = (window_keys == trackers[j].keys).all(axis=1)
+                    similarities[exact, column] = 1.0
+
+                # best window of every sentence: the first one with the maximum
+                window_sentences = block_sentences[starts]
+                groups = numpy.flatnonzero(
+                    numpy.diff(window_sentences, prepend=-1) != 0
+                )
+                best = numpy.maximum.reduceat(similarities, groups, axis=0)
+                group_of_window = numpy.repeat(
+                    numpy.arange(len(groups)), numpy.diff(groups, append=len(starts))
+                )
+                first = numpy.minimum.reduceat(
+                    numpy.where(
+                        similarities == best[group_of_window],
+                        numpy.arange(len(starts))[:, None],
+                        len(starts),
+                    ),
+                    groups,
+                    axis=0,
+                )
+                for group, column in zip(*numpy.nonzero(best > SIMILARITY_THRESHOLD)):
+                    window = first[group, column]
+                    matches.append(
+                        (
+                            int(window_sentences[window]),
+                            int(columns[column]),
+                            block_start + int(starts[window]),
+                            float(best[group, column]),
+                        )
+                    )
+
+            if matches:
+                matches.sort(key=lambda match: match[:2])
+                yield matches
+
+    def _sentence_blocks(self, token_bounds: numpy.ndarray) -> List[Tuple[int, int]]:
+        """
+        Group consecutive sentences into blocks of at most
+        `PHRASE_MATCHING_BLOCK_TOKENS` tokens, a longer sentence being a block alone.
+
+        Args:
+            token_bounds (numpy.ndarray): Start and end token positions of the sentences.
+
+        Returns:
+            List[Tuple[int, int]]: Start and end token positions of the blocks.
+        """
+        blocks = []
+        for start, end in token_bounds.tolist():
+            if blocks and end - blocks[-1][0] <= PHRASE_MATCHING_BLOCK_TOKENS:
+                blocks[-1] = (blocks[-1][0], end)
+            else:
+                blocks.append((start, end))
+        return blocks
+
+    def _find_word_indicies(
+        self, sentence_token_indexes: Dict[str, int], tracker_tokens: Tuple[str, ...]
+    ) -> Tuple[int, int]:
+        """
+        Find the start and end indices of `tracker` tokens in the sentence.
+
+        Args:
+            sentence_token_indexes (Dict[str, int]): Token texts and their indices in the sentence.
+            tracker_tokens (Tuple[str, ...]): Lower-cased tokens to locate within the sentence.
+
+        Returns:
+            Tuple[int, int]: Start and end indices of the tokens. Returns (-1, -1) if not found.
+        """
+        start_index = float("inf")
+        end_index = float("-inf")
+        for tracker_token in tracker_tokens:
+            if tracker_token in sentence_token_indexes:
+                current_index = sentence_token_indexes[tracker_token]
+                if start_index > current_index:
+                    start_index = current_index
+                if end_index < current_index:
+                    end_index = current_index
+
+        start_index = start_index if start_index != float("inf") else -1
+        end_index = end_index if end_index != float("-inf") else -1
+
+        return start_index, end_index
@@ -25,6 +25,12 @@ class S3ClientError(BaseError):
     pass
 
 
+class S3ObjectNotFoundError(S3ClientError):
+    """Exception raised when an S3 object does not exist."""
+
+    pass
+
+
 class TranscribeClientError(BaseError):
     """Exception raised for transcribe client errors."""
 
@@ -35,3 +41,9 @@ class TranscriptionJobError(BaseError):
     """Transcription Job Failed."""
 
     pass
+
+
+class ExtractorError(BaseError):
+    """Exception raised when an insight extractor is not available."""
+
+    pass
@@ -1,34 +1,171 @@
 import re
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Tuple
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Sequence, Tuple)
 
-import spacy
-from spacy.language import Language
-from spacy.tokens import Span
-
-MODEL_NAME = "en_core_web_md"
-NATURAL_LANGUAGE_PROCESSING_PIPELINE = spacy.load(MODEL_NAME)
+from extras.matchers import TrackerMatcher
+from extras.transcript import (SENTENCE_SEPARATOR, TranscriptIndex,
+                               TranscriptItems)
 
 
 class InsightExtractor(ABC):
     """
     Abstract base class for insight extractors.
+
+    Extractors with an `index_name` can also precompute a per-transcript index
+    once and answer any tracker list from it, see `extras.insights_index`.
     """
 
+    # name of the index in the insights store, None if the extractor has no index
+    index_name: Optional[str] = None
+
     @abstractmethod
     def extract_insights(
-        self, transcript_text: str, trackers: List[str]
+        self,
+        transcript_text: str,
+        trackers: List[str],
+        items: Optional[TranscriptItems] = None,
     ) -> List[Dict[str, Any]]:
         pass
 
+    def index_model(self) -> str:
+        """
+        Returns:
+            str: Identifies what the index was built with, an index built with a
+                 different model is rebuilt.
+        """
+        return ""
+
+    @abstractmethod
+    def build_index(self, transcript_text: str) -> Any:
+        """
+        Args:
+            transcript_text (str): The transcribed text.
+
+        Returns:
+            Any: The index of the transcript.
+        """
+
+    @abstractmethod
+    def extract_insights_from_index(
+        self,
+        transcript_text: str,
+        index: Any,
+        trackers: List[str],
+        items: Optional[TranscriptItems] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract the same insights as `extract_insights` using a prebuilt index.
+
+        Args:
+            transcript_text (str): The transcribed text.
+            index (Any): The index built by `build_index` for the text.
+            trackers (List[str]): List of trackers to search for in the transcript.
+            items (Optional[TranscriptItems]): The words of the transcript with their
+                                               timings, adds the audio position of
+                                               the insights when given.
+
+        Returns:
+            List[Dict[str, Any]]: A list of dictionaries containing insights.
+        """
+
+    def iter_insights(
+        self,
+        transcript_text: str,
+        trackers: List[str],
+        items: Optional[TranscriptItems] = None,
+        index: Optional[Any] = None,
+        start_sentence: int = 0,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the insights of `extract_insights`, or of `extract_insights_from_index`
+        when an index is given, from the sentence `start_sentence` on, in order of
+        their sentence.
+
+        Extractors overriding it only search the next sentences when the previous
+        insights are consumed, so a caller stopping early does not pay for the
+        rest of the transcript. This default extracts all the insights first.
+
+        Args:
+            transcript_text (str): The transcribed text.
+            trackers (List[str]): List of trackers to search for in the transcript.
+            items (Optional[TranscriptItems]): The words of the transcript with their
+                                               timings, adds the audio position of
+                                               the insights when given.
+            index (Optional[Any]): The index built by `build_index` for the text.
+            start_sentence (int): Index of the first sentence to search.
+
+        Yields:
+            Dict[str, Any]: The insights.
+        """
+        if index is None:
+            insights = self.extract_insights(transcript_text, trackers, items)
+        else:
+            insights = self.extract_insights_from_index(
+                transcript_text, index, trackers, items
+            )
+        for insight in insights:
+            if insight["sentence_index"] >= start_sentence:
+                yield insight
+
+    @abstractmethod
+    def extract_insights_with_sentence_count(
+        self,
+        transcript_text: str,
+        trackers: List[str],
+        items: Optional[TranscriptItems] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Extract insights from a part of a transcript, see `extras.parallel`.
+
+        Args:
+            transcript_text (str): The part of the transcribed text.
+            trackers (List[str]): List of trackers to search for in the transcript.
+            items (Optional[TranscriptItems]): The words of the part with their timings.
+
+        Returns:
+            Tuple[List[Dict[str, Any]], int]: The insights, with sentence indexes
+                relative to the part, and the number of sentences of the part.
+        """
+
+    def dump_index(self, index: Any) -> Dict[str, Any]:
+        """
+        Args:
+            index (Any): The index built by `build_index`.
+
+        Returns:
+            Dict[str, Any]: The index as a JSON serializable dictionary.
+        """
+        return index
+
+    def load_index(self, data: Dict[str, Any]) -> Any:
+        """
+        Args:
+            data (Dict[str, Any]): The index as returned by `dump_index`.
+
+        Returns:
+            Any: The index.
+        """
+        return data
+
 
 class SimpleRegexInsightExtractor(InsightExtractor):
     """
-    Extract insights from the transcribed text with a simple regular expressions
+    Extract insights from the transcribed text with a simple regular expressions.
+
+    All trackers are matched in a single pass over the transcript and every
+    occurrence of a tracker is reported, not only the first one in a sentence.
     """
 
+    index_name = "regex"
+
+    _TOKEN = re.compile(r"\w+")
+
     def extract_insights(
-        self, transcript_text: str, trackers: List[str]
+        self,
+        transcript_text: str,
+        trackers: List[str],
+        items: Optional[TranscriptItems] = None,
     ) -> List[Dict[str, Any]]:
         """
         Extract insights from the transcribed text. Searches for specific trackers
@@ -37,113 +174,344 @@ class SimpleRegexInsightExtractor(InsightExtractor):
         Args:
             transcript_text (str): The transcribed text.
             trackers (List[str]): List of trackers to search for in the transcript.
+            items (Optional[TranscriptItems]): The words of the transcript with their
+                                               timings, adds the audio position of
+                                               the insights when given.
 
         Returns:
             List[Dict[str, Any]]: A list of dictionaries containing insights.
         """
-        insights = []
-        sentences = transcript_text.split(".")
-        for i, sentence in enumerate(sentences):
-            for tracker in trackers:
-                matched = re.search(rf"\b{tracker}\b", sentence)
-                if matched:
-                    insights.append(
-                        {
-                            "sentence_index": i,
-                            "start_word_index": len(
-                                sentence[: matched.start()].split()
-                            ),
-                            "end_word_index": len(sentence[: matched.end()].split()),
-                            "tracker_value": tracker,
-                            "transcribe_value": sentence.strip(),
-                        }
-                    )
-        return insights
+        transcript_index = TranscriptIndex.from_text(transcript_text)
 
+        matches = []
+        for tracker_index, start, end in TrackerMatcher(trackers).finditer(
+            transcript_text
+        ):
+            sentence_index = transcript_index.sentence_index(start)
+            # trackers never span a sentence boundary
+            if end > transcript_index.sentence_ends[sentence_index]:
+                continue
+            matches.append((sentence_index, tracker_index, start, end))
+        matches.sort()
 
-class SpacyNLPInsightExtractor(InsightExtractor):
-    """
-    Extracts insights from transcribed text using spaCy's NLP model.
+        insights = self._insights(
+            matches,
+            trackers,
+            sentence=transcript_index.sentence,
+            word_index=transcript_index.word_index,
+        )
+        return self._annotate(transcript_text, insights, matches, items)
 
-    This class uses a spaCy model to analyze text and extract insights based on semantic similarity.
-    It processes sentences in the transcript and compares them to tracker phrases to identify relevant insights.
+    def build_index(self, transcript_text: str) -> Dict[str, Any]:
+        """
+        Index the sentences every token (a run of word characters) occurs in.
 
-    Args:
-        nlp_model (spacy.language.Language): A spaCy model instance to be used for extracting insights.
-    """
+        A tracker match starts and ends on a word boundary, so all tokens of a
+        tracker occur in the sentence it matches; only the sentences holding all of
+        them have to be scanned.
 
-    def __init__(self, nlp_model: Language):
-        self.nlp = nlp_model
+        Args:
+            transcript_text (str): The transcribed text.
 
-    def extract_insights(
-        self, transcript_text: str, trackers: List[str]
+        Returns:
+            Dict[str, Any]: The start offsets of the sentences and the postings,
+                the sorted sentence indexes of every token.
+        """
+        sentence_starts, tokens, position = [], {}, 0
+        for sentence_index, sentence in enumerate(
+            transcript_text.split(SENTENCE_SEPARATOR)
+        ):
+            sentence_starts.append(position)
+            position += len(sentence) + len(SENTENCE_SEPARATOR)
+            for token in set(self._TOKEN.findall(sentence)):
+                tokens.setdefault(token, []).append(sentence_index)
+        return {"sentence_starts": sentence_starts, "tokens": tokens}
+
+    def extract_insights_from_index(
+        self,
+        transcript_text: str,
+        index: Dict[str, Any],
+        trackers: List[str],
+        items: Optional[TranscriptItems] = None,
     ) -> List[Dict[str, Any]]:
         """
-        Extract insights from the transcribed text using spaCy NLP sentence embeddings.
-        Searches for sentences semantically similar to the trackers.
+        Extract the same insights as `extract_insights`, scanning only the
+        sentences the index lists for the tokens of the trackers.
 
         Args:
             transcript_text (str): The transcribed text.
+            index (Dict[str, Any]): The index built by `build_index` for the text.
             trackers (List[str]): List of trackers to search for in the transcript.
+            items (Optional[TranscriptItems]): The words of the transcript with their
+                                               timings, adds the audio position of
+                                               the insights when given.
 
         Returns:
             List[Dict[str, Any]]: A list of dictionaries containing insights.
         """
-        insights = []
-        doc = self.nlp(transcript_text)
-        sentence_docs = list(doc.sents)
-        tracker_docs = [self.nlp(tracker) for tracker in trackers]
-
-        for i, sentence_doc in enumerate(sentence_docs):
-            sentence_tokens_idexes = {
-                token.text.lower(): index for index, token in enumerate(sentence_doc)
-            }
-            for tracker_doc in tracker_docs:
-                similarity = tracker_doc.similarity(sentence_doc)
-                if similarity > 0.7:
-
-                    start_word_index, end_word_index = self._find_word_indicies(
-                        sentence_tokens_idexes, tracker_doc
-                    )
-
-                    insights.append(
-                        {
-                            "sentence_index": i,
-                            "start_word_index": start_word_index,
-                            "end_word_index": end_word_index,
-                            "tracker_value": tracker_doc.text,
-                            "transcribe_value": sentence_doc.text.strip(),
-                            "similarity_score": similarity,
-                        }
-                    )
-        return insights
+        sentence_starts = index["sentence_starts"]
+        transcript_index = self._indexed_sentences(transcript_text, sentence_starts)
+        sentence_ends = transcript_index.sentence_ends
+
+        candidates = set()
+        for tracker in set(trackers):
+            candidates.update(self._candidate_sentences(index, tracker))
 
-    def _find_word_indicies(
-        self, sentence_token_indexes: Dict[str, int], tracker: Span
-    ) -> Tuple[int, int]:
+        matcher, matches = TrackerMatcher(trackers), []
+        for sentence_index in candidates:
+            for tracker_index, start, end in matcher.finditer(
+                transcript_text,
+                sentence_starts[sentence_index],
+                sentence_ends[sentence_index],
+            ):
+                matches.append((sentence_index, tracker_index, start, end))
+        matches.sort()
+
+        insights = self._insights(
+            matches,
+            trackers,
+            sentence=transcript_index.sentence,
+            word_index=transcript_index.word_index,
+        )
+        return self._annotate(transcript_text, insights, matches, items)
+
+    def iter_insights(
+        self,
+        transcript_text: str,
+        trackers: List[str],
+        items: Optional[TranscriptItems] = None,
+        index: Optional[Dict[str, Any]] = None,
+        start_sentence: int = 0,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the insights of `extract_insights` from the sentence `start_sentence`
+        on, a sentence at a time: the transcript, or the sentences the index lists
+        for the trackers, are only scanned as far as the insights are consumed.
+
+        Args:
+            transcript_text (str): The transcribed text.
+            trackers (List[str]): List of trackers to search for in the transcript.
+            items (Optional[TranscriptItems]): The words of the transcript with their
+                                               timings, adds the audio position of
+                                               the insights when given.
+            index (Optional[Dict[str, Any]]): The index built by `build_index` for
+                                              the text.
+            start_sentence (int): Index of the first sentence to search.
+
+        Yields:
+            Dict[str, Any]: The insights.
         """
-        Find the start and end indices of `tracker` tokens in the sentence.
+        if index is None:
+            transcript_index = TranscriptIndex.from_text(transcript_text)
+            sentence_matches = self._scanned_sentence_matches(
+                transcript_text, transcript_index, trackers, start_sentence
+            )
+        else:
+            transcript_index = self._indexed_sentences(
+                transcript_text, index["sentence_starts"]
+            )
+            sentence_matches = self._indexed_sentence_matches(
+                transcript_text,
+                index,
+                transcript_index.sentence_ends,
+                trackers,
+                start_sentence,
+            )
+
+        for matches in sentence_matches:
+            insights = self._insights(
+                matches,
+                trackers,
+                sentence=transcript_index.sentence,
+                word_index=transcript_index.word_index,
+            )
+            yield from self._annotate(transcript_text, insights, matches, items)
+
+    def extract_insights_with_sentence_count(
+        self,
+        transcript_text: str,
+        trackers: List[str],
+        items: Optional[TranscriptItems] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        return (
+            self.extract_insights(transcript_text, trackers, items),
+            transcript_text.count(SENTENCE_SEPARATOR) + 1,
+        )
+
+    def index_model(self) -> str:
+        return "regex"
 
+    def _indexed_sentences(
+        self, transcript_text: str, sentence_starts: List[int]
+    ) -> TranscriptIndex:
+        """
         Args:
-            sentence_token_indexes (Dict[str, int]): Token texts and their indices in the sentence.
-            tracker (Span): Tokens to locate within the sentence.
+            transcript_text (str): The transcribed text.
+            sentence_starts (List[int]): The start offsets of the sentences, from
+                                         the index.
 
         Returns:
-            Tuple[int, int]: Start and end indices of the tokens. Returns (-1, -1) if not found.
+            TranscriptIndex: The sentences of the index and the word offsets of
+                the text, mapping the offset of a match to its word index by
+                binary search.
+        """
+        sentence_ends = [start - len(SENTENCE_SEPARATOR) for start in sentence_starts]
+        sentence_ends = sentence_ends[1:] + [len(transcript_text)]
+        return TranscriptIndex(
+            transcript_text,
+            zip(sentence_starts, sentence_ends),
+            TranscriptIndex.find_word_starts(transcript_text),
+        )
+
+    def _scanned_sentence_matches(
+        self,
+        transcript_text: str,
+        transcript_index: TranscriptIndex,
+        trackers: List[str],
+        start_sentence: int,
+    ) -> Iterator[List[Tuple[int, int, int, int]]]:
+        """
+        Scan the transcript from the sentence `start_sentence` on.
+
+        Yields:
+            List[Tuple[int, int, int, int]]: The sorted matches of every sentence
+                holding any, in order of the sentences.
+        """
+        if start_sentence >= len(transcript_index):
+            return
+
+        matches: List[Tuple[int, int, int, int]] = []
+        for tracker_index, start, end in TrackerMatcher(trackers).finditer(
+            transcript_text, transcript_index.sentence_starts[start_sentence]
+        ):
+            sentence_index = transcript_index.sentence_index(start)
+            # trackers never span a sentence boundary
+            if end > transcript_index.sentence_ends[sentence_index]:
+                continue
+            if matches and matches[-1][0] != sentence_index:
+                yield sorted(matches)
+                matches = []
+            matches.append((sentence_index, tracker_index, start, end))
+        if matches:
+            yield sorted(matches)
+
+    def _indexed_sentence_matches(
+        self,
+        transcript_text: str,
+        index: Dict[str, Any],
+        sentence_ends: Sequence[int],
+        trackers: List[str],
+        start_sentence: int,
+    ) -> Iterator[List[Tuple[int, int, int, int]]]:
+        """
+        Scan the sentences the index lists for the tokens of the trackers, from the
+        sentence `start_sentence` on.
+
+        Yields:
+            List[Tuple[int, int, int, int]]: The sorted matches of every sentence
+                holding any, in order of the sentences.
         """
-        tracker_tokens = [token.text.lower() for token in tracker]
+        candidates = set()
+        for tracker in set(trackers):
+            candidates.update(self._candidate_sentences(index, tracker))
+
+        matcher = TrackerMatcher(trackers)
+        for sentence_index in sorted(candidates):
+            if sentence_index < start_sentence:
+                continue
+            matches = sorted(
+                (sentence_index, tracker_index, start, end)
+                for tracker_index, start, end in matcher.finditer(
+                    transcript_text,
+                    index["sentence_starts"][sentence_index],
+                    sentence_ends[sentence_index],
+                )
+            )
+            if matches:
+                yield matches
+
+    def _candidate_sentences(
+        self, index: Dict[str, Any], tracker: str
+    ) -> Iterable[int]:
+        postings = [
+            index["tokens"].get(token, ()) for token in self._TOKEN.findall(tracker)
+        ]
+        if not postings:
+            return range(len(index["sentence_starts"]))
+        candidates = set(min(postings, key=len))
+        for posting in postings:
+            candidates.intersection_update(posting)
+        return candidates
+
+    def _annotate(
+        self,
+        transcript_text: str,
+        insights: List[Dict[str, Any]],
+        matches: List[Tuple[int, int, int, int]],
+        items: Optional[TranscriptItems],
+    ) -> List[Dict[str, Any]]:
+        if items is None:
+            return insights
+        return items.annotate(
+            transcript_text, insights, [(start, end) for _, _, start, end in matches]
+        )
+
+    def _insights(
+        self,
+        matches: List[Tuple[int, int, int, int]],
+        trackers: List[str],
+        sentence: Callable[[int], str],
+        word_index: Callable[[int, int], int],
+    ) -> List[Dict[str, Any]]:
+        insights, sentences = [], {}
+        for sentence_index, tracker_index, start, end in matches:
+            if sentence_index not in sentences:
+                sentences[sentence_index] = sentence(sentence_index).strip()
+            insights.append(
+                {
+                    "sentence_index": sentence_index,
+                    "start_word_index": word_index(start, sentence_index),
+                    "end_word_index": word_index(end, sentence_index),
+                    "tracker_value": trackers[tracker_index],
+                    "transcribe_value": sentences[sentence_index],
+                }
+            )
+        return insights
 
-        start_index = float("inf")
-        end_index = float("-inf")
-        for tracker_token in tracker_tokens:
-            if tracker_token in sentence_token_indexes:
-                current_index = sentence_token_indexes[tracker_token]
-                if start_index > current_index:
-                    start_index = current_index
-                if end_index < current_index:
-                    end_index = current_index
 
-        start_index = start_index if start_index != float("inf") else -1
-        end_index = end_index if end_index != float("-inf") else -1
+def create_spacy_extractor(phrase_matching: bool = False) -> InsightExtractor:
+    """
+    Create the spaCy NLP extractor.
+
+    spaCy, NumPy and the NLP model are only imported and loaded on the first call,
+    so cold starts serving only regex requests do not pay for them.
+
+    Args:
+        phrase_matching (bool): Whether to match trackers to phrases of the
+                                sentences instead of whole sentences.
+
+    Returns:
+        InsightExtractor: The spaCy extractor with the shared NLP pipeline.
+    """
+    from extras.spacy_extractors import (SpacyNLPInsightExtractor,
+                                         load_nlp_pipeline)
+
+    return SpacyNLPInsightExtractor(load_nlp_pipeline(), phrase_matching)
+
+
+def create_static_vector_extractor(phrase_matching: bool = False) -> InsightExtractor:
+    """
+    Create the extractor of the static word vectors exported from the spaCy
+    model, see `extras.static_vectors`. Only NumPy is imported, on the first call.
+
+    Args:
+        phrase_matching (bool): Whether to match trackers to phrases of the
+                                sentences instead of whole sentences.
+
+    Returns:
+        InsightExtractor: The static vector extractor with the shared vector table.
+    """
+    from extras.static_vectors import (StaticVectorInsightExtractor,
+                                       load_static_vectors)
 
-        return start_index, end_index
+    return StaticVectorInsightExtractor(load_static_vectors(), phrase_matching)
@@ -0,0 +1,257 @@
+import os
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from extras.extractors import InsightExtractor, SimpleRegexInsightExtractor
+from extras.transcript import TranscriptItems
+
+FUZZY_MAX_DISTANCE = int(os.getenv("FUZZY_MAX_DISTANCE", "1"))
+# shorter tracker words match exactly, a single edit turns them into other words
+FUZZY_MIN_WORD_LENGTH = int(os.getenv("FUZZY_MIN_WORD_LENGTH", "4"))
+
+
+def edit_distance(source: str, target: str, max_distance: int) -> int:
+    """
+    Levenshtein distance of two words, computed only for the cells within
+    `max_distance` of the diagonal and stopped as soon as it exceeds it.
+
+    Args:
+        source (str): The first word.
+        target (str): The second word.
+        max_distance (int): The largest distance of interest.
+
+    Returns:
+        int: The distance, or `max_distance + 1` when it is larger.
+    """
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+
+    beyond = max_distance + 1
+    previous = [min(j, beyond) for j in range(len(target) + 1)]
+    for i, char in enumerate(source, 1):
+        current = [min(i, beyond)] + [beyond] * len(target)
+        for j in range(
+            max(1, i - max_distance), min(len(target), i + max_distance) + 1
+        ):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char != target[j - 1]),
+                beyond,
+            )
+        if min(current) > max_distance:
+            return beyond
+        previous = current
+    return previous[-1]
+
+
+def _bigrams(word: str) -> Set[str]:
+    padded = f" {word} "
+    return {padded[i : i + 2] for i in range(len(padded) - 1)}
+
+
+class FuzzyVocabulary:
+    """
+    Finds the words of a vocabulary within an edit distance of a word.
+
+    The words are indexed by their character bigrams (padded with a space, so the
+    first and last characters count too). An edit changes at most two bigrams of a
+    word, so a word within distance k shares all but 2k of its bigrams with the
+    searched word: only the words passing this count and the length difference
+    are compared with `edit_distance`, instead of the whole vocabulary.
+
+    Args:
+        words (Iterable[str]): The vocabulary.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.words = list(dict.fromkeys(words))
+        self._word_ids = {word: word_id for word_id, word in enumerate(self.words)}
+        self._postings: Dict[str, List[int]] = {}
+        for word_id, word in enumerate(self.words):
+            for bigram in _bigrams(word):
+                self._postings.setdefault(bigram, []).append(word_id)
+
+    def search(self, word: str, max_distance: int) -> Dict[str, int]:
+        """
+        Args:
+            word (str): The word to search for.
+            max_distance (int): The largest edit distance of the results.
+
+        Returns:
+            Dict[str, int]: The words of the vocabulary within the distance, with
+                their distance.
+        """
+        if max_distance <= 0:
+            return {word: 0} if word in self._word_ids else {}
+
+        bigrams = _bigrams(word)
+        min_shared = len(bigrams) - 2 * max_distance
+        if min_shared > 0:
+            shared = Counter()
+            for bigram in bigrams:
+                shared.update(self._postings.get(bigram, ()))
+            candidates = [
+                word_id for word_id, count in shared.items() if count >= min_shared
+            ]
+        else:
+            candidates = range(len(self.words))
+
+        matches = {}
+        for word_id in candidates:
+            distance = edit_distance(word, self.words[word_id], max_distance)
+            if distance <= max_distance:
+                matches[self.words[word_id]] = distance
+        return matches
+
+
+class FuzzyInsightExtractor(SimpleRegexInsightExtractor):
+    """
+    Extract insights from the transcribed text tolerating transcription errors,
+    such as misspelled product names.
+
+    A tracker matches consecutive words of a sentence when each of its words is
+    within `max_distance` edits of the transcript word, ignoring case; words shorter
+    than `min_word_length` must match exactly. Every insight has the `distance` of
+    the match, the sum of the edits of its words, 0 for an exact match.
+
+    The similar words are searched in the vocabulary of the transcript only, and
+    only the sentences holding similar words for all the words of a tracker are
+    scanned. The regex index of the transcript lists both, so the extractor shares
+    it with `SimpleRegexInsightExtractor`.
+
+    Args:
+        max_distance (int): Maximum edit distance of every tracker word.
+        min_word_length (int): Minimum length of the tracker words matched fuzzily.
+    """
+
+    # the exact scan of `SimpleRegexInsightExtractor.iter_insights` does not apply
+    iter_insights = InsightExtractor.iter_insights
+
+    def __init__(
+        self,
+        max_distance: int = FUZZY_MAX_DISTANCE,
+        min_word_length: int = FUZZY_MIN_WORD_LENGTH,
+    ):
+        self.max_distance = max_distance
+        self.min_word_length = min_word_length
+
+    def extract_insights(
+        self,
+        transcript_text: str,
+        trackers: List[str],
+        items: Optional[TranscriptItems] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract insights from the transcribed text. Searches for words similar to
+        the trackers within the transcript.
+
+        Args:
+            transcript_text (str): The transcribed text.
+            trackers (List[str]): List of trackers to search for in the transcript.
+            items (Optional[TranscriptItems]): The words of the transcript with their
+                                               timings, adds the audio position of
+                                               the insights when given.
+
+        Returns:
+            List[Dict[str, Any]]: A list of dictionaries containing insights.
+        """
+        return self.extract_insights_from_index(
+            transcript_text, self.build_index(transcript_text), trackers, items
+        )
+
+    def extract_insights_from_index(
+        self,
+        transcript_text: str,
+        index: Dict[str, Any],
+        trackers: List[str],
+        items: Optional[TranscriptItems] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract the same insights as `extract_insights` from the regex index of
+        the transcript.
+
+        Args:
+            transcript_text (str): The transcribed text.
+            index (Dict[str, Any]): The index built by `build_index` for the text.
+            trackers (List[str]): List of trackers to search for in the transcript.
+            items (Optional[TranscriptItems]): The words of the transcript with their
+                                               timings, adds the audio position of
+                                               the insights when given.
+
+        Returns:
+            List[Dict[str, Any]]: A list of dictionaries containing insights.
+        """
+        sentence_starts = index["sentence_starts"]
+        transcript_index = self._indexed_sentences(transcript_text, sentence_starts)
+        sentence_ends = transcript_index.sentence_ends
+
+        # lower-cased vocabulary of the transcript, to the tokens of the index
+        vocabulary: Dict[str, List[str]] = {}
+        for token in index["tokens"]:
+            vocabulary.setdefault(token.lower(), []).append(token)
+        fuzzy_vocabulary = FuzzyVocabulary(vocabulary)
+
+        tracker_positions: Dict[str, List[int]] = {}
+        for position, tracker in enumerate(trackers):
+            tracker_positions.setdefault(tracker, []).append(position)
+
+        similar_words: Dict[str, Dict[str, int]] = {}
+        sentence_tokens: Dict[int, List[Tuple[str, int, int]]] = {}
+        matches = []
+        for tracker, positions in tracker_positions.items():
+            words = self._TOKEN.findall(tracker.lower())
+            if not words:
+                continue
+
+            candidates = None
+            for word in words:
+                if word not in similar_words:
+                    similar_words[word] = fuzzy_vocabulary.search(
+                        word,
+                        self.max_distance if len(word) >= self.min_word_length else 0,
+                    )
+                sentences = {
+                    sentence_index
+                    for similar in similar_words[word]
+                    for token in vocabulary[similar]
+                    for sentence_index in index["tokens"][token]
+                }
+                candidates = sentences if candidates is None else candidates & sentences
+
+            for sentence_index in candidates:
+                if sentence_index not in sentence_tokens:
+                    sentence_tokens[sentence_index] = [
+                        (token.group().lower(), token.start(), token.end())
+                        for token in self._TOKEN.finditer(
+                            transcript_text,
+                            sentence_starts[sentence_index],
+                            sentence_ends[sentence_index],
+                        )
+                    ]
+                tokens = sentence_tokens[sentence_index]
+                for first in range(len(tokens) - len(words) + 1):
+                    distance = 0
+                    for word, (token, _, _) in zip(words, tokens[first:]):
+                        word_distance = similar_words[word].get(token)
+                        if word_distance is None:
+                            break
+                        distance += word_distance
+                    else:
+                        start, end = tokens[first][1], tokens[first + len(words) - 1][2]
+                        for position in positions:
+                            matches.append(
+                                (sentence_index, position, start, end, distance)
+                            )
+        matches.sort()
+
+        spans = [match[:4] for match in matches]
+        insights = self._insights(
+            spans,
+            trackers,
+            sentence=transcript_index.sentence,
+            word_index=transcript_index.word_index,
+        )
+        for insight, match in zip(insights, matches):
+            insight["distance"] = match[4]
+        return self._annotate(transcript_text, insights, spans, items)
@@ -1,20 +1,69 @@
 import json
 import logging
-from typing import Any, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from typing import (Any, Dict, Iterator, List, NamedTuple, Optional, Tuple,
+                    Union)
 
-from extras.exception import BaseError, S3ClientError, TranscriptionJobError
+from botocore.exceptions import ClientError
+from extras.deduplication import canonical_key, find_alias, register_upload
+from extras.exception import (BaseError, S3ClientError, S3ObjectNotFoundError,
+                              TranscribeClientError, TranscriptionJobError)
 from extras.extractors import InsightExtractor
+from extras.insights_index import get_insights_index
+from extras.job_status import (get_pending_job_status, media_duration_tags,
+                               tagged_media_duration, track_pending_job)
+from extras.media import inspect_media
+from extras.metrics import METRICS, span
+from extras.parallel import extract_insights_parallel, use_parallel_extraction
+from extras.transcribe_output import DEFAULT_CHUNK_SIZE, TranscribeOutputStream
+from extras.transcript import SENTENCE_SEPARATOR, TranscriptItems
+from extras.transcript_cache import (cache_transcript, get_cached_transcript,
+                                     get_fresh_transcript,
+                                     get_transcript_result)
+from extras.transcript_items import (TRANSCRIPT_ITEMS_ENABLED,
+                                     get_stored_transcript_items,
+                                     store_transcript_items)
 from extras.types import S3ClientType, TranscribeClientType
-from extras.validators import check_s3_object_exists
+from extras.validators import check_s3_object_exists, parse_s3_uri
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+TRANSCRIPTION_JOB_PREFIX = "transcriptionJob-"
 
+
+class Transcription(NamedTuple):
+    """
+    The transcription of an audio file, as handled by `handle_transcription_job`.
+
+    Attributes:
+        status (str): The status of the transcription job.
+        transcript (Optional[str]): The transcript text, None unless completed.
+        job_name (str): The name of the job, the one of the canonical key of a
+                        duplicate upload.
+        version (Optional[str]): Identifies the transcript, see
+                                 `transcript_version`.
+        items (Optional[TranscriptItems]): The words of the transcript, with
+                                           `TRANSCRIPT_ITEMS_ENABLED`.
+        index (Optional[Any]): The insights index of the transcript, when looked
+                               up by `handle_transcription_jobs_batch`.
+    """
+
+    status: str
+    transcript: Optional[str]
+    job_name: str
+    version: Optional[str] = None
+    items: Optional[TranscriptItems] = None
+    index: Optional[Any] = None
+
+
+@span("transcript_download")
 def handle_transcript_text_from_s3_job(
     bucket_name: str,
     transcript_key: str,
     s3_client: S3ClientType,
+    streaming: bool = True,
 ) -> str:
     """
     Retrieve the transcript text from an S3 object.
@@ -23,15 +72,61 @@ def handle_transcript_text_from_s3_job(
         bucket_name (str): The name of the S3 bucket.
         transcript_key (str): The key of the S3 object.
         s3_client (S3ClientType): client to interact with s3 bucket
+        streaming (bool): Whether to stream the Transcribe output and stop reading
+                          after the transcript, instead of loading the whole document
 
     Returns:
         str: The transcript text
     """
-    try:
+    with _transcribe_output_errors(bucket_name, transcript_key, s3_client):
         response = s3_client.get_object(Bucket=bucket_name, Key=transcript_key)
+        METRICS.put_metric(
+            "transcript_bytes", response.get("ContentLength", 0), "Bytes"
+        )
+        if streaming:
+            with closing(response["Body"]) as body:
+                return TranscribeOutputStream(
+                    body.iter_chunks(DEFAULT_CHUNK_SIZE)
+                ).transcript()
         data = response["Body"].read().decode("utf-8")
         transcript_json = json.loads(data)
         return transcript_json["results"]["transcripts"][0]["transcript"]
+
+
+@span("transcript_download")
+def handle_transcript_from_s3_job(
+    bucket_name: str, transcript_key: str, s3_client: S3ClientType
+) -> Tuple[str, TranscriptItems]:
+    """
+    Retrieve the transcript text and the word items from an S3 object, in a
+    single streaming pass over the Transcribe output.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        transcript_key (str): The key of the S3 object.
+        s3_client (S3ClientType): client to interact with s3 bucket
+
+    Returns:
+        Tuple[str, TranscriptItems]: The transcript text and its words with their
+            timings and confidences.
+    """
+    with _transcribe_output_errors(bucket_name, transcript_key, s3_client):
+        response = s3_client.get_object(Bucket=bucket_name, Key=transcript_key)
+        METRICS.put_metric(
+            "transcript_bytes", response.get("ContentLength", 0), "Bytes"
+        )
+        with closing(response["Body"]) as body:
+            output = TranscribeOutputStream(body.iter_chunks(DEFAULT_CHUNK_SIZE))
+            transcript = output.transcript()
+            return transcript, TranscriptItems.from_transcribe_items(output.items())
+
+
+@contextmanager
+def _transcribe_output_errors(
+    bucket_name: str, transcript_key: str, s3_client: S3ClientType
+) -> Iterator[None]:
+    try:
+        yield
     except s3_client.exceptions.NoSuchKey:
         raise S3ClientError(
             {
@@ -52,15 +147,61 @@ def handle_transcript_text_from_s3_job(
         )
 
 
+def handle_transcript_items(
+    bucket_name: str, job_name: str, transcript_version: str, s3_client: S3ClientType
+) -> Optional[TranscriptItems]:
+    """
+    Retrieve the word items of a completed transcription, from the columnar copy
+    stored next to the Transcribe output, or from the Transcribe output itself.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        job_name (str): The name of the transcription job.
+        transcript_version (str): Identifies the transcript, see
+                                  `transcript_version`.
+        s3_client (S3ClientType): client to interact with s3 bucket
+
+    Returns:
+        Optional[TranscriptItems]: The items, None if they are disabled or cannot
+            be read; the insights are then returned without timings.
+    """
+    if not TRANSCRIPT_ITEMS_ENABLED:
+        return None
+
+    items = get_stored_transcript_items(
+        bucket_name, job_name, transcript_version, s3_client
+    )
+    if items is None:
+        try:
+            _, items = handle_transcript_from_s3_job(
+                bucket_name, job_name + ".json", s3_client=s3_client
+            )
+        except BaseError as e:
+            logger.error(f"Cant read the items of {bucket_name} {job_name}: {e}")
+            return None
+        store_transcript_items(
+            bucket_name, job_name, transcript_version, items, s3_client
+        )
+    return items
+
+
+@span("transcription_job")
 def handle_transcription_job(
     bucket_name: str,
     key: str,
     s3_client: S3ClientType,
     transcribe_client: TranscribeClientType,
-) -> Tuple[str, Any]:
+) -> Transcription:
     """
     Handle the transcription job of the audio file.
 
+    A file with the content of a file transcribed before, see
+    `extras.deduplication.register_upload`, is answered with the transcription of
+    that file instead of starting a job of its own. With
+    `TRANSCRIPT_ITEMS_ENABLED`, a completed transcription comes with its word
+    items, read in the same pass over the Transcribe output as the transcript
+    when it is not cached.
+
     Args:
         bucket_name (str): The name of the S3 bucket.
         key (str): The key of the S3 object.
@@ -70,63 +211,400 @@ def handle_transcription_job(
         extractor (InsightExtractor): The strategy for extracting insights.
 
     Returns:
-        Tuple[str, Any]: The response with the satatus
+        Transcription: The status of the job and, once completed, its transcript.
     """
-    check_s3_object_exists(bucket_name=bucket_name, key=key, s3_client=s3_client)
+    transcription = _handle_transcription_job(
+        bucket_name, key, s3_client, transcribe_client
+    )
+    if transcription.status == "COMPLETED" and transcription.items is None:
+        transcription = transcription._replace(
+            items=handle_transcript_items(
+                bucket_name,
+                transcription.job_name,
+                transcription.version,
+                s3_client=s3_client,
+            )
+        )
+    return transcription
+
+
+def _handle_transcription_job(
+    bucket_name: str,
+    key: str,
+    s3_client: S3ClientType,
+    transcribe_client: TranscribeClientType,
+) -> Transcription:
+    canonical = canonical_key(bucket_name, key)
+    if canonical != key:
+        return _handle_alias_transcription_job(
+            bucket_name, key, canonical, s3_client, transcribe_client
+        )
+
+    job_name = transcription_job_name(bucket_name, key)
+    # a job seen pending moments ago is not asked for again, see `retry_after`
+    pending_status = get_pending_job_status(job_name)
+    METRICS.put_metric("job_status_cache_hit", int(pending_status is not None))
+    if pending_status is not None:
+        logger.info(f"Transcription job: {job_name} still {pending_status}.")
+        return Transcription(pending_status, None, job_name)
+
+    # a transcript read moments ago is served without checking its job again
+    cached = get_fresh_transcript(job_name)
+    if cached is not None:
+        logger.info(f"Transcript of {bucket_name} {key} served from cache.")
+        METRICS.put_metric("transcript_cache_hit", 1)
+        return Transcription("COMPLETED", cached.transcript, job_name, cached.version)
+
+    cached = get_transcript_result(bucket_name, key, job_name, s3_client)
+    if cached is not None:
+        logger.info(f"Transcript of {bucket_name} {key} served from stored results.")
+        METRICS.put_metric("transcript_cache_hit", 1)
+        return Transcription("COMPLETED", cached.transcript, job_name, cached.version)
 
-    job_name = f"transcriptionJob-{bucket_name}-{key.replace('/', '-')}"
     try:
         status = transcribe_client.get_transcription_job(TranscriptionJobName=job_name)
-        job_status = status["TranscriptionJob"]["TranscriptionJobStatus"]
-        if job_status == "COMPLETED":
-            logger.info(f"Transcription job: {job_name} completed.")
+    except transcribe_client.exceptions.NotFoundException:
+        canonical = find_alias(bucket_name, key, s3_client)
+        if canonical is not None:
+            return _handle_alias_transcription_job(
+                bucket_name, key, canonical, s3_client, transcribe_client
+            )
+        return _start_upload_transcription(
+            bucket_name, key, s3_client, transcribe_client
+        )
 
-            transcript_key = job_name + ".json"
+    job_status = status["TranscriptionJob"]["TranscriptionJobStatus"]
+    if job_status == "COMPLETED":
+        logger.info(f"Transcription job: {job_name} completed.")
+
+        version = transcript_version(status["TranscriptionJob"])
+        transcript_result = get_cached_transcript(
+            bucket_name, job_name, version, s3_client
+        )
+        if transcript_result is not None:
+            logger.info(f"Transcript of {bucket_name} {key} served from cache.")
+            METRICS.put_metric("transcript_cache_hit", 1)
+            return Transcription(job_status, transcript_result, job_name, version)
+
+        METRICS.put_metric("transcript_cache_hit", 0)
+
+        transcript_key = job_name + ".json"
+        items = None
+        if TRANSCRIPT_ITEMS_ENABLED:
+            transcript_result, items = handle_transcript_from_s3_job(
+                bucket_name, transcript_key, s3_client=s3_client
+            )
+            store_transcript_items(bucket_name, job_name, version, items, s3_client)
+        else:
             transcript_result = handle_transcript_text_from_s3_job(
                 bucket_name, transcript_key, s3_client=s3_client
             )
+        cache_transcript(bucket_name, job_name, version, transcript_result, s3_client)
+
+        return Transcription(job_status, transcript_result, job_name, version, items)
+    elif job_status == "FAILED":
+        msg = "Transcription job failed"
+        logger.error(msg)
+        raise TranscriptionJobError(
+            {
+                "error": {
+                    "error_message": "Transcription job failed",
+                    "job_status": job_status,
+                    "job_name": job_name,
+                }
+            }
+        )
+    else:
+        msg = "Job still pending"
+        logger.info(msg)
+        track_pending_job(
+            job_name,
+            job_status,
+            tagged_media_duration(status["TranscriptionJob"]),
+            created=status["TranscriptionJob"].get("CreationTime"),
+        )
+        return Transcription(job_status, None, job_name)
 
-            return job_status, transcript_result
-        elif job_status == "FAILED":
-            msg = "Transcription job failed"
-            logger.error(msg)
-            raise TranscriptionJobError(
+
+def _handle_alias_transcription_job(
+    bucket_name: str,
+    key: str,
+    canonical: str,
+    s3_client: S3ClientType,
+    transcribe_client: TranscribeClientType,
+) -> Transcription:
+    try:
+        return _handle_transcription_job(
+            bucket_name, canonical, s3_client, transcribe_client
+        )
+    except S3ObjectNotFoundError:
+        # the canonical object was deleted or expired before its job was started
+        # again, the alias is transcribed on its own
+        logger.info(f"{bucket_name} {canonical} is gone, transcribing {key}.")
+        return _start_upload_transcription(
+            bucket_name, key, s3_client, transcribe_client, stale_key=canonical
+        )
+
+
+def _start_upload_transcription(
+    bucket_name: str,
+    key: str,
+    s3_client: S3ClientType,
+    transcribe_client: TranscribeClientType,
+    stale_key: Optional[str] = None,
+) -> Transcription:
+    # the source object is only validated when a job has to be started
+    head_response = check_s3_object_exists(
+        bucket_name=bucket_name, key=key, s3_client=s3_client
+    )
+    canonical = register_upload(
+        bucket_name, key, head_response, s3_client, stale_key=stale_key
+    )
+    if canonical != key:
+        return _handle_transcription_job(
+            bucket_name, canonical, s3_client, transcribe_client
+        )
+    media = inspect_media(bucket_name, key, head_response, s3_client)
+    job_name = start_transcription_job(
+        bucket_name, key, transcribe_client, media.media_format, media.duration
+    )
+    track_pending_job(job_name, "STARTED", media.duration)
+    return Transcription("STARTED", None, job_name)
+
+
+def transcript_version(transcription_job: Dict[str, Any]) -> str:
+    """
+    Args:
+        transcription_job (Dict[str, Any]): The `TranscriptionJob` of a completed job.
+
+    Returns:
+        str: Identifies the transcript of the job, it changes when the job of the
+             same audio file is run again.
+    """
+    return str(
+        transcription_job.get("CompletionTime")
+        or transcription_job.get("CreationTime", "")
+    )
+
+
+def transcription_job_name(bucket_name: str, key: str) -> str:
+    """
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        key (str): The key of the audio S3 object.
+
+    Returns:
+        str: The name of the transcription job of the audio file.
+    """
+    return f"{TRANSCRIPTION_JOB_PREFIX}{bucket_name}-{key.replace('/', '-')}"
+
+
+def start_transcription_job(
+    bucket_name: str,
+    key: str,
+    transcribe_client: TranscribeClientType,
+    media_format: str = "mp3",
+    media_duration: Optional[float] = None,
+) -> str:
+    """
+    Start the transcription job of the audio file.
+
+    The job name is derived from the file, so concurrent requests for a new file
+    all try to start the same job: a conflict means another one already did.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        key (str): The key of the audio S3 object.
+        transcribe_client (TranscribeClientType): client for transcribe service
+        media_format (str): The format of the audio file, see
+                            `extras.media.inspect_media`.
+        media_duration (Optional[float]): The estimated duration of the audio,
+                                          tagged on the job for
+                                          `extras.job_status.track_pending_job`.
+
+    Returns:
+        str: The name of the started job.
+    """
+    job_name = transcription_job_name(bucket_name, key)
+    logger.info(f"Starting new transcription job: {job_name}")
+    job = {
+        "TranscriptionJobName": job_name,
+        "Media": {"MediaFileUri": f"s3://{bucket_name}/{key}"},
+        "MediaFormat": media_format,
+        "LanguageCode": "en-US",
+    }
+    if media_duration is not None:
+        job["Tags"] = media_duration_tags(media_duration)
+    try:
+        transcribe_client.start_transcription_job(**job)
+    except transcribe_client.exceptions.ConflictException:
+        logger.info(f"Transcription job already started: {job_name}")
+    return job_name
+
+
+def handle_transcription_jobs_batch(
+    interaction_urls: List[str],
+    s3_client: S3ClientType,
+    transcribe_client: TranscribeClientType,
+    max_workers: int,
+    extractor: Optional[InsightExtractor] = None,
+) -> List[Union[Transcription, BaseError]]:
+    """
+    Handle the transcription jobs of many audio files concurrently.
+
+    The S3 and Transcribe lookups of every interaction, and the word items and
+    insights index of every completed transcript, run on a thread pool sharing the given clients,
+    so their connection pools should be sized for `max_workers`. A failing
+    interaction does not fail the others, and an interaction listed several times
+    is looked up once.
+
+    Args:
+        interaction_urls (List[str]): The S3 URIs of the audio files.
+        s3_client (S3ClientType): client to interact with s3 bucket
+        transcribe_client (TranscribeClientType): client for transcribe service
+        max_workers (int): Maximum number of concurrent lookups.
+        extractor (Optional[InsightExtractor]): The extractor to get the insights
+                                                index of the transcripts for, see
+                                                `extras.insights_index`.
+
+    Returns:
+        List[Union[Transcription, BaseError]]: For every interaction, in order,
+            the transcription as returned by `handle_transcription_job` with its
+            items and index, or the error that occurred.
+    """
+
+    def handle(interaction_url: str) -> Union[Transcription, BaseError]:
+        try:
+            bucket_name, key = parse_s3_uri(interaction_url)
+            transcription = handle_transcription_job(
+                bucket_name,
+                key,
+                s3_client=s3_client,
+                transcribe_client=transcribe_client,
+            )
+            if extractor is not None and transcription.status == "COMPLETED":
+                transcription = transcription._replace(
+                    index=get_insights_index(
+                        bucket_name,
+                        transcription.job_name,
+                        transcription.version,
+                        transcription.transcript,
+                        extractor,
+                        s3_client=s3_client,
+                    )
+                )
+            return transcription
+        except BaseError as e:
+            return e
+        except ClientError as e:
+            logger.error(f"Transcription lookup failed for {interaction_url}: {e}")
+            return TranscribeClientError(
                 {
                     "error": {
-                        "error_message": "Transcription job failed",
-                        "job_status": job_status,
-                        "job_name": job_name,
+                        "error": str(e),
+                        "error_message": f"Cant retrive the transcription: {interaction_url}",
                     }
                 }
             )
-        else:
-            msg = "Job still pending"
-            logger.info(msg)
-            return job_status, None
 
-    except transcribe_client.exceptions.NotFoundException:
-        logger.info(f"Starting new transcription job: {job_name}")
-        transcribe_client.start_transcription_job(
-            TranscriptionJobName=job_name,
-            Media={"MediaFileUri": f"s3://{bucket_name}/{key}"},
-            MediaFormat="mp3",
-            LanguageCode="en-US",
-        )
-        return "STARTED", None
+    unique_urls = list(dict.fromkeys(interaction_urls))
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(unique_urls)))
+    ) as executor:
+        results = dict(zip(unique_urls, executor.map(handle, unique_urls)))
+    return [results[interaction_url] for interaction_url in interaction_urls]
 
 
+@span("insights_extraction")
 def handle_insights_extraction(
-    transcript_result: str, trackers: list[str], extractor: InsightExtractor
+    transcript_result: str,
+    trackers: list[str],
+    extractor: InsightExtractor,
+    index: Optional[Any] = None,
+    items: Optional[TranscriptItems] = None,
 ) -> List[Dict[str, Any]]:
     """
     Extract insights from the transcribed text using the specified extractor.
 
+    Without an index, transcripts longer than `PARALLEL_EXTRACTION_MIN_LENGTH`
+    are extracted by `PARALLEL_EXTRACTION_WORKERS` processes when it is above 1.
+
     Args:
         transcript_result (str): The transcribed text from the audio file.
         trackers (list[str]): The list of trackers to extract insights.
         extractor (InsightExtractor): The strategy for extracting insights.
+        index (Optional[Any]): The precomputed index of the transcript, answering
+                               the trackers by lookup instead of rescanning the text.
+        items (Optional[TranscriptItems]): The words of the transcript, adds their
+                                           `start_time`, `end_time` and mean
+                                           `confidence` to the insights.
 
     Returns:
         List[Dict[str, Any]]: A list of dictionaries containing the extracted insights.
     """
-    return extractor.extract_insights(transcript_result, trackers)
+    METRICS.put_metric("trackers", len(trackers))
+    METRICS.put_metric("sentences", transcript_result.count(SENTENCE_SEPARATOR) + 1)
+    if index is not None:
+        insights = extractor.extract_insights_from_index(
+            transcript_result, index, trackers, items
+        )
+    elif use_parallel_extraction(transcript_result):
+        insights = extract_insights_parallel(
+            extractor, transcript_result, trackers, items
+        )
+    else:
+        insights = extractor.extract_insights(transcript_result, trackers, items)
+    METRICS.put_metric("insights", len(insights))
+    return insights
+
+
+@span("insights_extraction")
+def handle_insights_page(
+    transcript_result: str,
+    trackers: list[str],
+    extractor: InsightExtractor,
+    limit: Optional[int],
+    cursor: int = 0,
+    index: Optional[Any] = None,
+    items: Optional[TranscriptItems] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    Extract a page of the insights of `handle_insights_extraction`, stopping the
+    extractor once the page is full.
+
+    A page holds `limit` insights from the sentence `cursor` on, and the other
+    insights of its last sentence, so the next page starts on a sentence boundary.
+
+    Args:
+        transcript_result (str): The transcribed text from the audio file.
+        trackers (list[str]): The list of trackers to extract insights.
+        extractor (InsightExtractor): The strategy for extracting insights.
+        limit (Optional[int]): The number of insights of the page, None for all.
+        cursor (int): Index of the sentence the page starts at.
+        index (Optional[Any]): The precomputed index of the transcript.
+        items (Optional[TranscriptItems]): The words of the transcript, adds their
+                                           timings to the insights.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Optional[int]]: The insights of the page and the
+            cursor of the next page, the sentence of its first insight, None when
+            there is no insight left.
+    """
+    METRICS.put_metric("trackers", len(trackers))
+    METRICS.put_metric("sentences", transcript_result.count(SENTENCE_SEPARATOR) + 1)
+    insights: List[Dict[str, Any]] = []
+    next_cursor = None
+    with closing(
+        extractor.iter_insights(transcript_result, trackers, items, index, cursor)
+    ) as extracted:
+        for insight in extracted:
+            if (
+                limit is not None
+                and len(insights) >= limit
+                and insight["sentence_index"] != insights[-1]["sentence_index"]
+            ):
+                next_cursor = insight["sentence_index"]
+                break
+            insights.append(insight)
+    METRICS.put_metric("insights", len(insights))
+    return insights, next_cursor
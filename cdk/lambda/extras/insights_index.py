@@ -0,0 +1,168 @@
+import gzip
+import json
+import logging
+import os
+from typing import Any, Optional
+
+from botocore.exceptions import ClientError
+from extras.cache import LRUCache
+from extras.extractors import InsightExtractor
+from extras.metrics import METRICS
+from extras.types import S3ClientType
+
+# bump when the layout of the stored indexes changes, older indexes are rebuilt
+INSIGHTS_INDEX_VERSION = 3
+INSIGHTS_INDEX_ENABLED = os.getenv("INSIGHTS_INDEX_ENABLED", "False") == "True"
+# indexes of warm containers, keyed by job name, extractor and transcript version
+INSIGHTS_INDEX_CACHE = LRUCache(
+    maxsize=int(os.getenv("INSIGHTS_INDEX_CACHE_SIZE", "32"))
+)
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def insights_index_key(job_name: str, extractor: InsightExtractor) -> str:
+    """
+    Args:
+        job_name (str): The name of the transcription job of the interaction.
+        extractor (InsightExtractor): The extractor the index is built for.
+
+    Returns:
+        str: The key of the index, next to the Transcribe output `{job_name}.json`.
+    """
+    return f"{job_name}.{extractor.index_name}.index.json.gz"
+
+
+def load_insights_index(
+    bucket_name: str,
+    job_name: str,
+    transcript_version: str,
+    extractor: InsightExtractor,
+    s3_client: S3ClientType,
+) -> Optional[Any]:
+    """
+    Load the stored index of a transcript. An index of another version, model or
+    transcript is ignored.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        job_name (str): The name of the transcription job of the interaction.
+        transcript_version (str): Identifies the transcript, see
+                                  `extras.handlers.transcript_version`.
+        extractor (InsightExtractor): The extractor the index is built for.
+        s3_client (S3ClientType): client to interact with s3 bucket
+
+    Returns:
+        Optional[Any]: The index, None if there is no up-to-date index.
+    """
+    index_key = insights_index_key(job_name, extractor)
+    try:
+        response = s3_client.get_object(Bucket=bucket_name, Key=index_key)
+        stored = json.loads(gzip.decompress(response["Body"].read()))
+    except s3_client.exceptions.NoSuchKey:
+        return None
+    except (ClientError, ValueError) as e:
+        logger.error(f"Cant read the insights index {bucket_name} {index_key}: {e}")
+        return None
+
+    if (
+        stored.get("version") != INSIGHTS_INDEX_VERSION
+        or stored.get("model") != extractor.index_model()
+        or stored.get("transcript_version") != transcript_version
+    ):
+        logger.info(f"Insights index {index_key} is outdated, it will be rebuilt.")
+        return None
+    return extractor.load_index(stored["index"])
+
+
+def store_insights_index(
+    bucket_name: str,
+    job_name: str,
+    transcript_version: str,
+    extractor: InsightExtractor,
+    index: Any,
+    s3_client: S3ClientType,
+) -> None:
+    """
+    Store the index of a transcript with the version, model and transcript it was
+    built with. Failing to store it is not an error.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        job_name (str): The name of the transcription job of the interaction.
+        transcript_version (str): Identifies the transcript, see
+                                  `extras.handlers.transcript_version`.
+        extractor (InsightExtractor): The extractor the index was built by.
+        index (Any): The index.
+        s3_client (S3ClientType): client to interact with s3 bucket
+    """
+    index_key = insights_index_key(job_name, extractor)
+    stored = {
+        "version": INSIGHTS_INDEX_VERSION,
+        "model": extractor.index_model(),
+        "transcript_version": transcript_version,
+        "index": extractor.dump_index(index),
+    }
+    try:
+        s3_client.put_object(
+            Bucket=bucket_name,
+            Key=index_key,
+            Body=gzip.compress(json.dumps(stored).encode("utf-8")),
+            ContentType="application/json",
+            ContentEncoding="gzip",
+        )
+    except ClientError as e:
+        logger.error(f"Cant store the insights index {bucket_name} {index_key}: {e}")
+
+
+def get_insights_index(
+    bucket_name: str,
+    job_name: str,
+    transcript_version: str,
+    transcript_text: str,
+    extractor: InsightExtractor,
+    s3_client: S3ClientType,
+) -> Optional[Any]:
+    """
+    Get the index of a transcript from the in-process cache or the bucket, building
+    and storing it when it is missing or outdated.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        job_name (str): The name of the transcription job of the interaction.
+        transcript_version (str): Identifies the transcript, see
+                                  `extras.handlers.transcript_version`.
+        transcript_text (str): The transcribed text, to build a missing index.
+        extractor (InsightExtractor): The extractor the index is built for.
+        s3_client (S3ClientType): client to interact with s3 bucket
+
+    Returns:
+        Optional[Any]: The index, None if the index is disabled or the extractor
+            has none.
+    """
+    if not INSIGHTS_INDEX_ENABLED or extractor.index_name is None:
+        return None
+
+    cache_key = (
+        bucket_name,
+        job_name,
+        extractor.index_name,
+        extractor.index_model(),
+        transcript_version,
+    )
+    index = INSIGHTS_INDEX_CACHE.get(cache_key)
+    if index is None:
+        index = load_insights_index(
+            bucket_name, job_name, transcript_version, extractor, s3_client
+        )
+    METRICS.put_metric("insights_index_hit", int(index is not None))
+    if index is None:
+        index = extractor.build_index(transcript_text)
+        store_insights_index(
+            bucket_name, job_name, transcript_version, extractor, index, s3_client
+        )
+    INSIGHTS_INDEX_CACHE.put(cache_key, index)
+
+    logger.info(f"Insights index cache: {INSIGHTS_INDEX_CACHE.stats()}")
+    return index
@@ -0,0 +1,134 @@
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from extras.cache import LRUCache
+
+# seconds a pending job status is answered without asking Transcribe again
+JOB_STATUS_CACHE_SECONDS = float(os.getenv("JOB_STATUS_CACHE_SECONDS", "5"))
+# expected transcription time, relative to the duration of the audio
+TRANSCRIPTION_DURATION_RATIO = float(os.getenv("TRANSCRIPTION_DURATION_RATIO", "0.5"))
+RETRY_AFTER_MIN_SECONDS = int(os.getenv("RETRY_AFTER_MIN_SECONDS", "5"))
+RETRY_AFTER_MAX_SECONDS = int(os.getenv("RETRY_AFTER_MAX_SECONDS", "300"))
+# tag of the transcription jobs holding the estimated duration of their audio
+MEDIA_DURATION_TAG = "media-duration"
+
+# pending jobs of warm containers, keyed by job name
+PENDING_JOBS = LRUCache(maxsize=1024)
+
+
+class PendingJob(NamedTuple):
+    """
+    A transcription job that is not completed yet.
+
+    Attributes:
+        status (str): The status of the job.
+        started (float): When the job was created, in seconds since the epoch.
+        checked (float): When the status was read, in seconds since the epoch.
+        media_duration (float): The estimated duration of the audio, 0 if unknown.
+    """
+
+    status: str
+    started: float
+    checked: float
+    media_duration: float
+
+    @property
+    def expected_completion(self) -> float:
+        return self.started + self.media_duration * TRANSCRIPTION_DURATION_RATIO
+
+
+def get_pending_job_status(job_name: str) -> Optional[str]:
+    """
+    Args:
+        job_name (str): The name of the transcription job.
+
+    Returns:
+        Optional[str]: The status of the job if it was pending less than
+            `JOB_STATUS_CACHE_SECONDS` ago, None otherwise.
+    """
+    pending = PENDING_JOBS.get(job_name)
+    if pending is None or time.time() - pending.checked > JOB_STATUS_CACHE_SECONDS:
+        return None
+    return pending.status
+
+
+def track_pending_job(
+    job_name: str,
+    status: str,
+    media_duration: Optional[float] = None,
+    created: Optional[datetime] = None,
+) -> PendingJob:
+    """
+    Remember the status of a pending job and when it should be completed, from
+    the duration of its audio file. No AWS call is made: the duration is
+    estimated when the job is started, see `extras.media.inspect_media`, and
+    read back from its `MEDIA_DURATION_TAG` afterwards.
+
+    Args:
+        job_name (str): The name of the transcription job.
+        status (str): The status of the job.
+        media_duration (Optional[float]): The estimated duration of the audio in
+                                          seconds, the tracked one if None.
+        created (Optional[datetime]): The creation time of the job, now by default.
+
+    Returns:
+        PendingJob: The tracked job.
+    """
+    now = time.time()
+    if media_duration is None:
+        previous = PENDING_JOBS.get(job_name)
+        media_duration = previous.media_duration if previous is not None else 0.0
+
+    pending = PendingJob(
+        status,
+        created.timestamp() if created is not None else now,
+        now,
+        media_duration,
+    )
+    PENDING_JOBS.put(job_name, pending)
+    return pending
+
+
+def media_duration_tags(media_duration: float) -> List[Dict[str, str]]:
+    """
+    Args:
+        media_duration (float): The estimated duration of the audio in seconds.
+
+    Returns:
+        List[Dict[str, str]]: The `Tags` of the transcription job of the audio.
+    """
+    return [{"Key": MEDIA_DURATION_TAG, "Value": f"{media_duration:.1f}"}]
+
+
+def tagged_media_duration(transcription_job: Dict[str, Any]) -> Optional[float]:
+    """
+    Args:
+        transcription_job (Dict[str, Any]): The `TranscriptionJob` of a job.
+
+    Returns:
+        Optional[float]: The duration of its audio from its `MEDIA_DURATION_TAG`,
+            None if it was not tagged.
+    """
+    for tag in transcription_job.get("Tags", []):
+        if tag.get("Key") == MEDIA_DURATION_TAG:
+            try:
+                return float(tag["Value"])
+            except (KeyError, ValueError):
+                return None
+    return None
+
+
+def retry_after(job_name: str) -> int:
+    """
+    Args:
+        job_name (str): The name of a job tracked by `track_pending_job`.
+
+    Returns:
+        int: The seconds a client should wait before asking for the job again,
+            between `RETRY_AFTER_MIN_SECONDS` and `RETRY_AFTER_MAX_SECONDS`.
+    """
+    pending = PENDING_JOBS.get(job_name)
+    remaining = pending.expected_completion - time.time() if pending else 0
+    return int(min(max(remaining, RETRY_AFTER_MIN_SECONDS), RETRY_AFTER_MAX_SECONDS))
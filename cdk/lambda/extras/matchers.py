@@ -0,0 +1,117 @@
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class TrackerMatcher:
+    """
+    Finds every whole-word occurrence of many trackers in a single pass.
+
+    All trackers are compiled once into one regular expression shaped as a prefix
+    trie of the escaped tracker texts, so the text is scanned a single time no
+    matter how many trackers are requested. The expression only reports the longest
+    tracker starting at a given position; shorter trackers that are prefixes of it
+    (e.g. "cancel" inside "cancel subscription") are resolved from a precomputed
+    prefix table, so overlapping trackers are all reported.
+
+    Args:
+        trackers (List[str]): Trackers to search for. Duplicates are reported once
+                              per position they occupy in the list.
+    """
+
+    _WORD_BOUNDARY = re.compile(r"\b")
+
+    def __init__(self, trackers: List[str]):
+        self.trackers = trackers
+        self._tracker_positions: Dict[str, List[int]] = {}
+        for position, tracker in enumerate(trackers):
+            if tracker:
+                self._tracker_positions.setdefault(tracker, []).append(position)
+
+        self._shorter_prefixes: Dict[str, List[str]] = {
+            tracker: [
+                other
+                for other in self._tracker_positions
+                if len(other) < len(tracker) and tracker.startswith(other)
+            ]
+            for tracker in self._tracker_positions
+        }
+
+        self._pattern = (
+            re.compile(rf"\b(?=({self._trie_pattern(self._tracker_positions)})\b)")
+            if self._tracker_positions
+            else None
+        )
+
+    def finditer(
+        self, text: str, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[Tuple[int, int, int]]:
+        """
+        Iterate over all tracker occurrences in the text, in order of their start.
+
+        Args:
+            text (str): The text to scan.
+            start (int): Character offset to start scanning at.
+            end (Optional[int]): Character offset to stop scanning at, the end of
+                                 the text by default.
+
+        Yields:
+            Tuple[int, int, int]: The position of the tracker in the trackers list,
+                                  and the start and end character offsets of the match.
+        """
+        if self._pattern is None:
+            return
+
+        end = len(text) if end is None else end
+        for matched in self._pattern.finditer(text, start, end):
+            match_start = matched.start(1)
+            longest = matched.group(1)
+            for tracker in self._shorter_prefixes[longest]:
+                match_end = match_start + len(tracker)
+                if self._WORD_BOUNDARY.match(text, match_end, end):
+                    for position in self._tracker_positions[tracker]:
+                        yield position, match_start, match_end
+            for position in self._tracker_positions[longest]:
+                yield position, match_start, matched.end(1)
+
+    @classmethod
+    def _trie_pattern(cls, words: Dict[str, List[int]]) -> str:
+        """
+        Build a regular expression matching any of the words, factored as a trie.
+
+        Args:
+            words (Dict[str, List[int]]): The words to match (only keys are used).
+
+        Returns:
+            str: The regular expression source.
+        """
+        trie: Dict[str, dict] = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        return cls._node_pattern(trie)
+
+    @classmethod
+    def _node_pattern(cls, node: Dict[str, dict]) -> str:
+        """
+        Recursively render a trie node; longer branches are tried first.
+
+        Args:
+            node (Dict[str, dict]): The trie node, "" marks the end of a word.
+
+        Returns:
+            str: The regular expression source for the node.
+        """
+        branches = [
+            re.escape(char) + cls._node_pattern(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+
+        pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if "" in node:
+            return f"(?:{pattern})?"
+        return pattern
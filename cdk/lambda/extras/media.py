@@ -0,0 +1,122 @@
+import logging
+import re
+from typing import Any, Dict, NamedTuple, Optional
+
+from botocore.exceptions import ClientError
+from extras.audio import (CONTENT_TYPE_FORMATS, MEDIA_FORMATS,
+                          estimate_duration, id3_length, sniff_media_format)
+from extras.exception import ValidationError
+from extras.types import S3ClientType
+
+# bytes of the audio file read to detect its format and estimate its duration
+MEDIA_PROBE_BYTES = 65536
+
+_CONTENT_RANGE_SIZE = re.compile(r"/(\d+)$")
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+class MediaProbe(NamedTuple):
+    """
+    What the first bytes of an audio file tell about it.
+
+    Attributes:
+        media_format (Optional[str]): The MediaFormat of Transcribe, None if the
+                                      magic number is not recognized.
+        duration (Optional[float]): The estimated duration in seconds, None if
+                                    unknown.
+    """
+
+    media_format: Optional[str]
+    duration: Optional[float]
+
+
+def probe_media(
+    bucket_name: str,
+    key: str,
+    s3_client: S3ClientType,
+    size: Optional[int] = None,
+) -> MediaProbe:
+    """
+    Detect the format and estimate the duration of an audio file from its first
+    `MEDIA_PROBE_BYTES`, read with a ranged GET (a second one when a large ID3
+    tag, e.g. with cover art, comes first) instead of downloading it.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        key (str): The key of the audio S3 object.
+        s3_client (S3ClientType): client to interact with s3 bucket
+        size (Optional[int]): The size of the object from its HEAD response, else
+                              from the range of the GET.
+
+    Returns:
+        MediaProbe: The format and duration, both None if the file cannot be read.
+    """
+    try:
+        response = s3_client.get_object(
+            Bucket=bucket_name, Key=key, Range=f"bytes=0-{MEDIA_PROBE_BYTES - 1}"
+        )
+        data = response["Body"].read()
+        if size is None:
+            size = _object_size(response, len(data))
+        audio_start = id3_length(data)
+        if len(data) < size and len(data) - audio_start < MEDIA_PROBE_BYTES // 2:
+            response = s3_client.get_object(
+                Bucket=bucket_name,
+                Key=key,
+                Range=f"bytes={audio_start}-{audio_start + MEDIA_PROBE_BYTES - 1}",
+            )
+            data, size = response["Body"].read(), size - audio_start
+    except ClientError as e:
+        logger.error(f"Cant read the start of {bucket_name} {key}: {e}")
+        return MediaProbe(None, None)
+
+    media_format = sniff_media_format(data)
+    probe = MediaProbe(media_format, estimate_duration(data, size, media_format))
+    logger.info(f"Probed {bucket_name} {key}: {probe}")
+    return probe
+
+
+def inspect_media(
+    bucket_name: str,
+    key: str,
+    head_response: Dict[str, Any],
+    s3_client: S3ClientType,
+) -> MediaProbe:
+    """
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        key (str): The key of the audio S3 object.
+        head_response (Dict[str, Any]): The head response of the object.
+        s3_client (S3ClientType): client to interact with s3 bucket
+
+    Returns:
+        MediaProbe: The MediaFormat of the transcription job of the file, from its
+            magic number, else from its extension, else from its content type,
+            and its estimated duration.
+    """
+    probe = probe_media(
+        bucket_name, key, s3_client, size=head_response.get("ContentLength")
+    )
+    extension = key.rpartition(".")[2].lower()
+    media_format = (
+        probe.media_format
+        or (extension if extension in MEDIA_FORMATS else None)
+        or CONTENT_TYPE_FORMATS.get(head_response.get("ContentType"))
+    )
+    if media_format is None:
+        raise ValidationError(
+            {
+                "error": {
+                    "error": f"The format of {bucket_name} {key} is not supported",
+                    "error_message": f"Supported formats: {', '.join(MEDIA_FORMATS)}",
+                }
+            }
+        )
+    return probe._replace(media_format=media_format)
+
+
+def _object_size(response: Dict[str, Any], default: int) -> int:
+    matched = _CONTENT_RANGE_SIZE.search(response.get("ContentRange", ""))
+    return int(matched.group(1)) if matched else default
@@ -0,0 +1,169 @@
+import json
+import os
+import sys
+import time
+from contextlib import ContextDecorator
+from threading import Lock
+from typing import Any, Dict, List, Optional, TextIO
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "TranscriptionInsights")
+
+
+class RequestMetrics:
+    """
+    The metrics of the current invocation, written to the logs as a single
+    CloudWatch Embedded Metric Format (EMF) line by `flush`. CloudWatch extracts
+    the metrics from the line asynchronously, without any API call from the
+    Lambda.
+
+    Values are appended under a lock, the threads of a batch request share the
+    instance. A metric recorded several times in an invocation is written as a
+    list of values.
+
+    Args:
+        output (Optional[TextIO]): Where the lines are written, stdout by default.
+    """
+
+    def __init__(self, output: Optional[TextIO] = None):
+        self.output = output
+        self._values: Dict[str, List[float]] = {}
+        self._units: Dict[str, str] = {}
+        self._properties: Dict[str, Any] = {}
+        self._lock = Lock()
+
+    def put_metric(self, name: str, value: float, unit: str = "Count") -> None:
+        """
+        Args:
+            name (str): The name of the metric.
+            value (float): The value.
+            unit (str): A CloudWatch unit, e.g. `Milliseconds`, `Bytes`, `Count`.
+        """
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values.setdefault(name, []).append(round(value, 3))
+            self._units[name] = unit
+
+    def put_property(self, name: str, value: Any) -> None:
+        """
+        Add a field to the log line that is not a metric, searchable with
+        CloudWatch Logs Insights.
+
+        Args:
+            name (str): The name of the field.
+            value (Any): A JSON serializable value.
+        """
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._properties[name] = value
+
+    def flush(self, dimensions: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Write the metrics of the invocation to stdout and forget them.
+
+        Args:
+            dimensions (Dict[str, str]): The dimensions of all the metrics.
+
+        Returns:
+            Optional[Dict[str, Any]]: The EMF document, None if there is nothing
+                to write.
+        """
+        with self._lock:
+            values, units, properties = self._values, self._units, self._properties
+            self._values, self._units, self._properties = {}, {}, {}
+        if not METRICS_ENABLED or not values:
+            return None
+
+        document = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": METRICS_NAMESPACE,
+                        "Dimensions": [list(dimensions)],
+                        "Metrics": [
+                            {"Name": name, "Unit": units[name]} for name in values
+                        ],
+                    }
+                ],
+            },
+            **properties,
+            **dimensions,
+        }
+        for name, metric_values in values.items():
+            document[name] = (
+                metric_values[0] if len(metric_values) == 1 else metric_values
+            )
+        # EMF lines must be raw JSON, without the prefix of the Lambda log handler
+        (self.output or sys.stdout).write(json.dumps(document, default=str) + "\n")
+        return document
+
+
+METRICS = RequestMetrics()
+
+
+class span(ContextDecorator):
+    """
+    Time a block, or every call of the decorated function, into the
+    `<name>_ms` metric of the invocation.
+
+    Args:
+        name (str): The name of the span.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._started = 0.0
+
+    def _recreate_cm(self) -> "span":
+        # a new span for every call of a decorated function, calls may overlap
+        return span(self.name)
+
+    def __enter__(self) -> "span":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        METRICS.put_metric(
+            f"{self.name}_ms",
+            (time.perf_counter() - self._started) * 1000,
+            "Milliseconds",
+        )
+        return False
+
+
+def flush_invocation_metrics(
+    context: Any,
+    call_latencies: Dict[str, Dict[str, float]],
+    duration_ms: Optional[float] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Add the AWS calls and the duration of an invocation to its metrics and log
+    them, with the name of the function as dimension.
+
+    Args:
+        context (Any): The context object provided by AWS Lambda.
+        call_latencies (Dict[str, Dict[str, float]]): The AWS calls of the
+                                                      invocation, see `CallLatencies`.
+        duration_ms (Optional[float]): The duration of the invocation.
+
+    Returns:
+        Optional[Dict[str, Any]]: The EMF document, see `RequestMetrics.flush`.
+    """
+    if duration_ms is not None:
+        METRICS.put_metric("request_ms", duration_ms, "Milliseconds")
+    METRICS.put_metric(
+        "aws_calls", sum(stats["calls"] for stats in call_latencies.values())
+    )
+    METRICS.put_metric(
+        "aws_call_ms",
+        sum(stats["total_ms"] for stats in call_latencies.values()),
+        "Milliseconds",
+    )
+    METRICS.put_property("aws_call_latencies", call_latencies)
+    function_name = getattr(context, "function_name", None) or os.getenv(
+        "AWS_LAMBDA_FUNCTION_NAME", "local"
+    )
+    return METRICS.flush({"function": function_name})
@@ -0,0 +1,148 @@
+import logging
+import multiprocessing
+import os
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Tuple
+
+from extras.extractors import InsightExtractor
+from extras.transcript import SENTENCE_SEPARATOR, TranscriptItems
+
+# opt-in, extraction runs in the calling process with fewer than 2 workers
+PARALLEL_EXTRACTION_WORKERS = int(os.getenv("PARALLEL_EXTRACTION_WORKERS", "1"))
+# shorter transcripts are not worth the cost of starting the workers
+PARALLEL_EXTRACTION_MIN_LENGTH = int(
+    os.getenv("PARALLEL_EXTRACTION_MIN_LENGTH", "200000")
+)
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def use_parallel_extraction(transcript_text: str) -> bool:
+    """
+    Args:
+        transcript_text (str): The transcribed text.
+
+    Returns:
+        bool: Whether the transcript is long enough to be extracted in parallel.
+    """
+    return (
+        PARALLEL_EXTRACTION_WORKERS > 1
+        and len(transcript_text) >= PARALLEL_EXTRACTION_MIN_LENGTH
+    )
+
+
+def shard_transcript(transcript_text: str, shards: int) -> List[Tuple[int, int]]:
+    """
+    Split a transcript into parts of about the same length, cut on sentence
+    separators. The separators themselves are left out of the parts, so the
+    sentences of the parts are exactly the sentences of the transcript.
+
+    Args:
+        transcript_text (str): The transcribed text.
+        shards (int): The maximum number of parts.
+
+    Returns:
+        List[Tuple[int, int]]: Start and end character offsets of the parts.
+    """
+    spans, start = [], 0
+    for shard in range(1, shards):
+        cut = transcript_text.find(
+            SENTENCE_SEPARATOR, max(start, len(transcript_text) * shard // shards)
+        )
+        if cut < 0:
+            break
+        spans.append((start, cut))
+        start = cut + len(SENTENCE_SEPARATOR)
+    spans.append((start, len(transcript_text)))
+    return spans
+
+
+def extract_insights_parallel(
+    extractor: InsightExtractor,
+    transcript_text: str,
+    trackers: List[str],
+    items: Optional[TranscriptItems] = None,
+    workers: int = PARALLEL_EXTRACTION_WORKERS,
+) -> List[Dict[str, Any]]:
+    """
+    Extract insights from a long transcript on several cores.
+
+    The transcript is sharded on sentence boundaries and every shard is extracted
+    by a forked worker process, which inherits the extractor, and so the loaded
+    spaCy model, from the calling process instead of loading it again. The
+    sentence indexes of the shards are offset by the sentences of the previous
+    shards. Lambda has no shared memory for `multiprocessing.Pool` or queues, so
+    the workers are plain processes answering through pipes.
+
+    The regex extractor returns exactly the insights of a single pass. spaCy
+    segments every shard on its own, so sentences next to a shard boundary may be
+    split differently than in a single pass.
+
+    Args:
+        extractor (InsightExtractor): The strategy for extracting insights.
+        transcript_text (str): The transcribed text.
+        trackers (List[str]): List of trackers to search for in the transcript.
+        items (Optional[TranscriptItems]): The words of the transcript with their
+                                           timings, adds the audio position of
+                                           the insights when given.
+        workers (int): Number of worker processes.
+
+    Returns:
+        List[Dict[str, Any]]: A list of dictionaries containing insights.
+    """
+    spans = shard_transcript(transcript_text, workers)
+    shard_items = [
+        items.slice(transcript_text, start, end) if items is not None else None
+        for start, end in spans
+    ]
+    logger.info(f"Extracting insights from {len(spans)} shards in parallel.")
+
+    context = multiprocessing.get_context("fork")
+    processes, connections = [], []
+    for (start, end), part_items in zip(spans, shard_items):
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_extract_shard,
+            args=(sender, extractor, transcript_text, start, end, trackers, part_items),
+            daemon=True,
+        )
+        process.start()
+        sender.close()
+        processes.append(process)
+        connections.append(receiver)
+
+    # receive before joining, a worker blocks until its result is read
+    results = [connection.recv() for connection in connections]
+    for process in processes:
+        process.join()
+
+    insights, sentence_offset = [], 0
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+        shard_insights, sentence_count = result
+        for insight in shard_insights:
+            insight["sentence_index"] += sentence_offset
+        insights.extend(shard_insights)
+        sentence_offset += sentence_count
+    return insights
+
+
+def _extract_shard(
+    connection: Connection,
+    extractor: InsightExtractor,
+    transcript_text: str,
+    start: int,
+    end: int,
+    trackers: List[str],
+    items: Optional[TranscriptItems],
+) -> None:
+    try:
+        result = extractor.extract_insights_with_sentence_count(
+            transcript_text[start:end], trackers, items
+        )
+    except Exception as e:
+        result = e
+    connection.send(result)
+    connection.close()
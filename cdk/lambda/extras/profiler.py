@@ -0,0 +1,110 @@
+import logging
+import os
+import sys
+import threading
+from collections import Counter
+from functools import wraps
+from typing import Any, Callable, Tuple
+
+# opt-in, 0 disables the profiler
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "0"))
+PROFILER_TOP_STACKS = int(os.getenv("PROFILER_TOP_STACKS", "20"))
+PROFILER_MAX_DEPTH = 64
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+class SamplingProfiler:
+    """
+    A statistical profiler: a daemon thread samples the Python stacks of the
+    other threads every `interval` seconds, and the stacks are counted.
+
+    Unlike `cProfile`, the profiled code is not slowed down by a hook on every
+    function call; the cost is a thread waking up at every interval. The stacks
+    are reported in the folded format (`frame;frame;frame count`) read by flame
+    graph tools such as speedscope or flamegraph.pl.
+
+    Args:
+        interval (float): Seconds between two samples.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        """
+        Returns:
+            Counter: The number of samples of every stack, outermost frame first.
+        """
+        self._stopped.set()
+        self._thread.join()
+        return self.samples
+
+    def folded_stacks(self, top: int) -> str:
+        """
+        Args:
+            top (int): Number of stacks to report, the most sampled first.
+
+        Returns:
+            str: The stacks in the folded format, one per line.
+        """
+        return "\n".join(
+            f"{';'.join(stack)} {count}"
+            for stack, count in self.samples.most_common(top)
+        )
+
+    def _sample(self) -> None:
+        own_thread = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_thread:
+                    self.samples[_stack(frame)] += 1
+
+
+def _stack(frame: Any) -> Tuple[str, ...]:
+    stack = []
+    while frame is not None and len(stack) < PROFILER_MAX_DEPTH:
+        code = frame.f_code
+        stack.append(
+            f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+        )
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+
+def profiled(handler: Callable) -> Callable:
+    """
+    Profile every invocation of a Lambda handler with a `SamplingProfiler` when
+    `PROFILER_INTERVAL_MS` is set, and log its most sampled stacks.
+
+    Args:
+        handler (Callable): The handler.
+
+    Returns:
+        Callable: The handler, unchanged when the profiler is disabled.
+    """
+    if PROFILER_INTERVAL_MS <= 0:
+        return handler
+
+    @wraps(handler)
+    def profiled_handler(*args, **kwargs):
+        profiler = SamplingProfiler(PROFILER_INTERVAL_MS / 1000).start()
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            profiler.stop()
+            logger.info(
+                f"Profile of {handler.__name__}, {sum(profiler.samples.values())} "
+                f"samples every {PROFILER_INTERVAL_MS} ms:\n"
+                f"{profiler.folded_stacks(PROFILER_TOP_STACKS)}"
+            )
+
+    return profiled_handler
@@ -1,15 +1,160 @@
+import base64
+import gzip
 import json
-from typing import Any, Dict
+import os
+from typing import Any, Dict, List, Mapping, Optional
+
+try:
+    import orjson
+except ImportError:  # optional, see requirements/orjson-requirements.txt
+    orjson = None
+
+RESPONSE_GZIP_MIN_BYTES = int(os.getenv("RESPONSE_GZIP_MIN_BYTES", "1024"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
 
 
 class ResponseAWS:
     """
     Creates and formats HTTP responses for AWS Lambda functions.
+
+    The body is serialized with `orjson` when it is installed, and gzip encoded
+    when the client accepts it and it has at least `RESPONSE_GZIP_MIN_BYTES`.
+    A gzip encoded body is returned base64 encoded, API Gateway decodes it.
+
+    Args:
+        status_code (int): The HTTP status code.
+        body (Dict[str, Any]): The JSON serializable body.
+        accept_encoding (Optional[str]): The `Accept-Encoding` header of the request.
+        headers (Optional[Dict[str, str]]): Headers of the response.
     """
 
-    def __init__(self, status_code: int, body: Dict[str, Any]):
+    def __init__(
+        self,
+        status_code: int,
+        body: Dict[str, Any],
+        accept_encoding: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ):
         self.status_code = status_code
         self.body = body
+        self.accept_encoding = accept_encoding
+        self.headers = headers or {}
 
     def create_response(self) -> Dict[str, Any]:
-        return {"statusCode": self.status_code, "body": json.dumps(self.body)}
+        body = dumps(self.body)
+        if len(body) < RESPONSE_GZIP_MIN_BYTES or not accepts_gzip(
+            self.accept_encoding
+        ):
+            response = {"statusCode": self.status_code, "body": body.decode("utf-8")}
+            if self.headers:
+                response["headers"] = self.headers
+            return response
+
+        compressed = gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+        return {
+            "statusCode": self.status_code,
+            "headers": {
+                **self.headers,
+                "Content-Type": "application/json",
+                "Content-Encoding": "gzip",
+                "Vary": "Accept-Encoding",
+            },
+            "isBase64Encoded": True,
+            "body": base64.b64encode(compressed).decode("ascii"),
+        }
+
+
+def dumps(body: Any) -> bytes:
+    """
+    Args:
+        body (Any): A JSON serializable value.
+
+    Returns:
+        bytes: The UTF-8 JSON document, from `orjson` when it is installed.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                body, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            )
+        except orjson.JSONEncodeError:
+            pass  # e.g. integers over 64 bits, left to the standard library
+    return json.dumps(body).encode("utf-8")
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Args:
+        accept_encoding (Optional[str]): An `Accept-Encoding` header,
+                                         e.g. `gzip, deflate;q=0.5`.
+
+    Returns:
+        bool: Whether the header allows a gzip encoded response.
+    """
+    if not accept_encoding:
+        return False
+
+    qualities = {}
+    for coding in accept_encoding.split(","):
+        name, _, parameters = coding.partition(";")
+        quality = 1.0
+        for parameter in parameters.split(";"):
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+def get_header(headers: Optional[Mapping[str, str]], name: str) -> Optional[str]:
+    """
+    Look up a request header whatever the case of its name, HTTP/2 clients send
+    lowercase names.
+
+    Args:
+        headers (Optional[Mapping[str, str]]): The headers of the event.
+        name (str): The header name.
+
+    Returns:
+        Optional[str]: The value of the header, None if it is missing.
+    """
+    if not headers:
+        return None
+    if name in headers:
+        return headers[name]
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def insights_body(insights: List[Dict[str, Any]], compact: bool) -> Dict[str, Any]:
+    """
+    The response fields of the insights of an interaction.
+
+    In the compact format, the text of every sentence holding insights is written
+    once in a `sentences` table keyed by `sentence_index`, instead of in the
+    `transcribe_value` of each of its insights.
+
+    Args:
+        insights (List[Dict[str, Any]]): The extracted insights.
+        compact (bool): Whether to use the compact format.
+
+    Returns:
+        Dict[str, Any]: `insights`, and `sentences` in the compact format.
+    """
+    if not compact:
+        return {"insights": insights}
+
+    sentences: Dict[int, str] = {}
+    compact_insights = []
+    for insight in insights:
+        insight = dict(insight)
+        sentences.setdefault(insight["sentence_index"], insight.pop("transcribe_value"))
+        compact_insights.append(insight)
+    return {"sentences": sentences, "insights": compact_insights}
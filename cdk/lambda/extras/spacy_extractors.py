@@ -0,0 +1,223 @@
+import logging
+import os
+from functools import lru_cache
+from itertools import accumulate, pairwise
+from typing import List, Tuple, Union
+
+import numpy
+import spacy
+from extras.cache import LRUCache
+from extras.embeddings import (EmbeddingInsightExtractor, SentenceEmbeddings,
+                               TrackerEmbedding)
+from spacy.attrs import ORTH
+from spacy.language import Language
+from spacy.tokens import Doc, Span
+
+MODEL_NAME = "en_core_web_md"
+# only static vectors and sentence boundaries (tok2vec + parser) are used
+EXCLUDED_COMPONENTS = ("tagger", "attribute_ruler", "lemmatizer", "ner", "senter")
+# components the transcript needs for sentence boundaries, the rest is disabled
+SENTENCE_SEGMENTATION_COMPONENTS = ("tok2vec", "parser", "senter", "sentencizer")
+# tracker embeddings survive warm invocations, trackers repeat across requests
+TRACKER_EMBEDDING_CACHE = LRUCache(
+    maxsize=int(os.getenv("TRACKER_EMBEDDING_CACHE_SIZE", "1024"))
+)
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+@lru_cache(maxsize=None)
+def load_nlp_pipeline() -> Language:
+    """
+    Load the spaCy model once per container, without the components the
+    extractor does not use.
+
+    Returns:
+        Language: The NLP pipeline.
+    """
+    logger.info(f"Loading spaCy model: {MODEL_NAME}")
+    return spacy.load(MODEL_NAME, exclude=EXCLUDED_COMPONENTS)
+
+
+class SpacyNLPInsightExtractor(EmbeddingInsightExtractor):
+    """
+    Extracts insights from transcribed text using spaCy's NLP model.
+
+    This class uses a spaCy model to analyze text and extract insights based on semantic similarity.
+    It processes sentences in the transcript and compares them to tracker phrases to identify relevant insights.
+
+    Args:
+        nlp_model (spacy.language.Language): A spaCy model instance to be used for extracting insights.
+        phrase_matching (bool): Whether to match trackers to token windows instead
+                                of whole sentences.
+    """
+
+    index_name = "spacy"
+
+    def __init__(self, nlp_model: Language, phrase_matching: bool = False):
+        super().__init__(phrase_matching)
+        self.nlp = nlp_model
+
+    def build_index(self, transcript_text: str) -> SentenceEmbeddings:
+        """
+        Process the transcript once: split it into sentences and average their
+        token vectors.
+
+        Args:
+            transcript_text (str): The transcribed text.
+
+        Returns:
+            SentenceEmbeddings: The sentences of the transcript and their vectors.
+        """
+        doc = self.nlp(
+            transcript_text,
+            disable=[
+                name
+                for name in self.nlp.pipe_names
+                if name not in SENTENCE_SEGMENTATION_COMPONENTS
+            ],
+        )
+        sentence_docs = list(doc.sents)
+        token_bounds = numpy.array(
+            [(sentence.start, sentence.end) for sentence in sentence_docs],
+            dtype="int64",
+        ).reshape(len(sentence_docs), 2)
+        attr = getattr(self.nlp.vocab.vectors, "attr", ORTH)
+        keys = doc.to_array(attr).astype("uint64")
+        return SentenceEmbeddings(
+            sentence_spans=numpy.array(
+                [
+                    (sentence.start_char, sentence.end_char)
+                    for sentence in sentence_docs
+                ],
+                dtype="int64",
+            ).reshape(len(sentence_docs), 2),
+            token_bounds=token_bounds,
+            token_spans=numpy.array(
+                [(token.idx, token.idx + len(token)) for token in doc], dtype="uint32"
+            ).reshape(len(doc), 2),
+            keys=keys,
+            tokens=[token.text.lower() for token in doc],
+            vectors=self._mean_vectors(
+                [keys], token_bounds.tolist(), fallback=sentence_docs
+            ),
+        )
+
+    def index_model(self) -> str:
+        meta = self.nlp.meta
+        vectors = self.nlp.vocab.vectors
+        return (
+            f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}"
+            f"/vectors-{vectors.shape[0]}x{vectors.shape[1]}"
+        )
+
+    def _embed_trackers(self, trackers: List[str]) -> List[TrackerEmbedding]:
+        """
+        Process the trackers, reusing embeddings cached by previous invocations.
+
+        Trackers missing from the cache are processed in one batch through
+        `nlp.pipe`; only the tokenizer and the static word vectors are needed, so
+        every pipeline component is disabled.
+
+        Args:
+            trackers (List[str]): The trackers.
+
+        Returns:
+            List[TrackerEmbedding]: The embeddings, in the order of the trackers.
+        """
+        embeddings = {}
+        for tracker in trackers:
+            if tracker not in embeddings:
+                embeddings[tracker] = TRACKER_EMBEDDING_CACHE.get(
+                    (id(self.nlp), tracker)
+                )
+        missing = [tracker for tracker, cached in embeddings.items() if cached is None]
+
+        if missing:
+            attr = getattr(self.nlp.vocab.vectors, "attr", ORTH)
+            tracker_docs = list(self.nlp.pipe(missing, disable=self.nlp.pipe_names))
+            tracker_keys = [tracker_doc.to_array(attr) for tracker_doc in tracker_docs]
+            tracker_bounds = list(
+                pairwise(accumulate((len(keys) for keys in tracker_keys), initial=0))
+            )
+            tracker_vectors = self._mean_vectors(
+                tracker_keys, tracker_bounds, fallback=tracker_docs
+            )
+            for tracker, tracker_doc, keys, vector in zip(
+                missing, tracker_docs, tracker_keys, tracker_vectors
+            ):
+                embedding = TrackerEmbedding(
+                    text=tracker,
+                    keys=keys,
+                    tokens=tuple(token.text.lower() for token in tracker_doc),
+                    vector=vector,
+                )
+                embeddings[tracker] = embedding
+                TRACKER_EMBEDDING_CACHE.put((id(self.nlp), tracker), embedding)
+
+        logger.info(f"Tracker embedding cache: {TRACKER_EMBEDDING_CACHE.stats()}")
+        return [embeddings[tracker] for tracker in trackers]
+
+    def _token_vectors(self, index: SentenceEmbeddings) -> numpy.ndarray:
+        """
+        Look up the static vector of every token of the transcript.
+
+        Args:
+            index (SentenceEmbeddings): The tokens of the transcript.
+
+        Returns:
+            numpy.ndarray: A (tokens x vector width) matrix, zero for tokens
+                without a vector.
+        """
+        vectors = self.nlp.vocab.vectors
+        if vectors.size == 0 or vectors.mode != "default":
+            # vectors computed from the token text, e.g. floret subword vectors
+            return numpy.array(
+                [self.nlp.vocab.get_vector(token) for token in index.tokens],
+                dtype="float32",
+            ).reshape(len(index.tokens), -1)
+
+        rows = vectors.find(keys=index.keys)
+        token_vectors = numpy.asarray(vectors.data)[rows]
+        token_vectors[rows < 0] = 0
+        return token_vectors
+
+    def _mean_vectors(
+        self,
+        keys: List[numpy.ndarray],
+        bounds: List[Tuple[int, int]],
+        fallback: List[Union[Doc, Span]],
+    ) -> numpy.ndarray:
+        """
+        Average the static vectors of consecutive token ranges.
+
+        Args:
+            keys (List[numpy.ndarray]): Vector keys of the tokens, concatenated in order.
+            bounds (List[Tuple[int, int]]): Start and end token positions of each range.
+            fallback (List[Union[Doc, Span]]): The ranges as spaCy objects, used when
+                                               the vectors cannot be looked up directly.
+
+        Returns:
+            numpy.ndarray: A (ranges x vector width) matrix of mean vectors.
+        """
+        vectors = self.nlp.vocab.vectors
+        if vectors.size == 0 or vectors.mode != "default":
+            return numpy.array(
+                [span.vector for span in fallback], dtype="float32"
+            ).reshape(len(fallback), -1)
+
+        if not bounds:
+            return numpy.zeros((0, vectors.shape[1]), dtype="float32")
+
+        rows = vectors.find(keys=numpy.concatenate(keys))
+        token_vectors = numpy.asarray(vectors.data)[rows]
+        token_vectors[rows < 0] = 0
+
+        starts = numpy.array([start for start, _ in bounds], dtype="int64")
+        lengths = numpy.array([end - start for start, end in bounds], dtype="int64")
+        sums = numpy.zeros((len(bounds), vectors.shape[1]), dtype="float32")
+        non_empty = lengths > 0
+        if non_empty.any():
+            sums[non_empty] = numpy.add.reduceat(token_vectors, starts[non_empty])
+        return sums / numpy.maximum(lengths, 1)[:, None]
@@ -0,0 +1,249 @@
+import json
+import logging
+import os
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy
+from extras.embeddings import (EmbeddingInsightExtractor, SentenceEmbeddings,
+                               TrackerEmbedding)
+from extras.exception import ExtractorError
+
+# written by `scripts/export_static_vectors.py`, packaged next to the lambda code
+STATIC_VECTORS_DIR = os.getenv(
+    "STATIC_VECTORS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "static-vectors"),
+)
+VECTORS_FILE = "vectors.npy"
+ROWS_FILE = "rows.npy"
+VOCABULARY_FILE = "vocabulary.txt"
+META_FILE = "meta.json"
+
+# numbers, words, the contractions spaCy splits off ("do" "n't", "i" "'m") and punctuation
+_TOKEN = re.compile(r"\d+(?:[.,]\d+)+|\w+(?=n't\b)|n't\b|'\w+|\w+|[^\w\s]")
+# a sentence ends with its punctuation when followed by a space, not "3.5"
+_SENTENCE_END = re.compile(r"[.?!]+(?=\s|$)")
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+class StaticVectors(NamedTuple):
+    """
+    A pruned table of static word vectors.
+
+    Attributes:
+        name (str): Identifies the model and vocabulary the table was exported from.
+        table (numpy.ndarray): The vectors, memory-mapped from the `.npy` file, so
+                               only the pages of the rows looked up are read.
+        rows (Dict[str, int]): The table row of every lower-cased word.
+    """
+
+    name: str
+    table: numpy.ndarray
+    rows: Dict[str, int]
+
+
+@lru_cache(maxsize=None)
+def load_static_vectors(path: str = STATIC_VECTORS_DIR) -> StaticVectors:
+    """
+    Load the static vectors once per container.
+
+    Args:
+        path (str): The directory written by the export tool.
+
+    Returns:
+        StaticVectors: The vector table and its vocabulary.
+    """
+    if not os.path.isdir(path):
+        raise ExtractorError(
+            {"error": f"The static vectors are not deployed, missing: {path}"}
+        )
+
+    logger.info(f"Loading static vectors: {path}")
+    with open(os.path.join(path, META_FILE), encoding="utf-8") as meta_file:
+        meta = json.load(meta_file)
+    with open(os.path.join(path, VOCABULARY_FILE), encoding="utf-8") as words_file:
+        words = words_file.read().split("\n")
+    rows = numpy.load(os.path.join(path, ROWS_FILE))
+    table = numpy.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+    return StaticVectors(
+        name=f"{meta['model']}/vectors-{table.shape[0]}x{table.shape[1]}"
+        f"/words-{len(rows)}",
+        table=table,
+        rows=dict(zip(words, rows.tolist())),
+    )
+
+
+def split_sentences(transcript_text: str) -> numpy.ndarray:
+    """
+    Split a transcript into sentences after their final punctuation. Transcribe
+    punctuates every sentence, so the rule replaces the dependency parser.
+
+    Args:
+        transcript_text (str): The transcribed text.
+
+    Returns:
+        numpy.ndarray: Start and end character offsets of the sentences, without
+            the surrounding whitespace.
+    """
+    ends = [match.end() for match in _SENTENCE_END.finditer(transcript_text)]
+    if not ends or ends[-1] != len(transcript_text):
+        ends.append(len(transcript_text))
+
+    spans, start = [], 0
+    for end in ends:
+        sentence = transcript_text[start:end]
+        stripped = sentence.lstrip()
+        if stripped.strip():
+            spans.append((start + len(sentence) - len(stripped), end))
+        start = end
+    return numpy.array(spans, dtype="int64").reshape(len(spans), 2)
+
+
+def tokenize(text: str) -> Tuple[numpy.ndarray, List[str]]:
+    """
+    Args:
+        text (str): The text.
+
+    Returns:
+        Tuple[numpy.ndarray, List[str]]: Start and end character offsets of the
+            tokens and their lower-cased texts.
+    """
+    spans, tokens = [], []
+    for match in _TOKEN.finditer(text):
+        spans.append(match.span())
+        tokens.append(match.group().lower())
+    return numpy.array(spans, dtype="uint32").reshape(len(spans), 2), tokens
+
+
+class StaticVectorInsightExtractor(EmbeddingInsightExtractor):
+    """
+    Extracts insights with the static word vectors of a spaCy model exported to
+    a memory-mapped table, without spaCy.
+
+    The transcript is split into sentences by punctuation and into tokens by a
+    regular expression. Sentences, tokens and vectors mostly match the spaCy
+    extractor, so are the similarities, but the lighter package and the mapped
+    table load much faster and use less memory.
+
+    Args:
+        vectors (StaticVectors): The vector table.
+        phrase_matching (bool): Whether to match trackers to token windows instead
+                                of whole sentences.
+    """
+
+    index_name = "static"
+
+    def __init__(self, vectors: StaticVectors, phrase_matching: bool = False):
+        super().__init__(phrase_matching)
+        self.vectors = vectors
+
+    def build_index(self, transcript_text: str) -> SentenceEmbeddings:
+        """
+        Split the transcript into sentences and tokens and average the token
+        vectors of every sentence.
+
+        Args:
+            transcript_text (str): The transcribed text.
+
+        Returns:
+            SentenceEmbeddings: The sentences of the transcript and their vectors.
+        """
+        token_spans, tokens = tokenize(transcript_text)
+        sentence_spans = split_sentences(transcript_text)
+        # every token lies in a sentence, its bounds are the first tokens starting
+        # at or after the start and the end of the sentence
+        token_bounds = numpy.searchsorted(token_spans[:, 0], sentence_spans).astype(
+            "int64"
+        )
+        return SentenceEmbeddings(
+            sentence_spans=sentence_spans,
+            token_bounds=token_bounds,
+            token_spans=token_spans,
+            keys=self._keys(tokens),
+            tokens=tokens,
+            vectors=self._mean_vectors(self._lookup(tokens), token_bounds),
+        )
+
+    def index_model(self) -> str:
+        return self.vectors.name
+
+    def _embed_trackers(self, trackers: List[str]) -> List[TrackerEmbedding]:
+        embeddings = []
+        for tracker in trackers:
+            _, tokens = tokenize(tracker)
+            embeddings.append(
+                TrackerEmbedding(
+                    text=tracker,
+                    keys=self._keys(tokens),
+                    tokens=tuple(tokens),
+                    vector=self._mean_vectors(
+                        self._lookup(tokens),
+                        numpy.array([(0, len(tokens))], dtype="int64"),
+                    )[0],
+                )
+            )
+        return embeddings
+
+    def _token_vectors(self, index: SentenceEmbeddings) -> numpy.ndarray:
+        return self._lookup(index.tokens)
+
+    def _keys(self, tokens: List[str]) -> numpy.ndarray:
+        """
+        Args:
+            tokens (List[str]): Lower-cased token texts.
+
+        Returns:
+            numpy.ndarray: A key per token, equal for equal texts across processes,
+                unlike `hash`, as indexes are stored.
+        """
+        return numpy.fromiter(
+            (zlib.crc32(token.encode("utf-8")) for token in tokens),
+            dtype="uint64",
+            count=len(tokens),
+        )
+
+    def _lookup(self, tokens: List[str]) -> numpy.ndarray:
+        """
+        Args:
+            tokens (List[str]): Lower-cased token texts.
+
+        Returns:
+            numpy.ndarray: A (tokens x vector width) matrix, zero for tokens
+                without a vector.
+        """
+        rows = numpy.fromiter(
+            (self.vectors.rows.get(token, -1) for token in tokens),
+            dtype="int64",
+            count=len(tokens),
+        )
+        token_vectors = numpy.array(
+            self.vectors.table[numpy.maximum(rows, 0)], dtype="float32"
+        )
+        token_vectors[rows < 0] = 0
+        return token_vectors
+
+    def _mean_vectors(
+        self, token_vectors: numpy.ndarray, bounds: numpy.ndarray
+    ) -> numpy.ndarray:
+        """
+        Average the vectors of consecutive token ranges.
+
+        Args:
+            token_vectors (numpy.ndarray): The vectors of the tokens.
+            bounds (numpy.ndarray): Start and end token positions of each range.
+
+        Returns:
+            numpy.ndarray: A (ranges x vector width) matrix of mean vectors.
+        """
+        lengths = bounds[:, 1] - bounds[:, 0]
+        sums = numpy.zeros((len(bounds), token_vectors.shape[1]), dtype="float32")
+        non_empty = lengths > 0
+        if non_empty.any():
+            sums[non_empty] = numpy.add.reduceat(
+                token_vectors, bounds[non_empty, 0], axis=0
+            )
+        return sums / numpy.maximum(lengths, 1)[:, None]
@@ -0,0 +1,259 @@
+import asyncio
+import os
+from typing import (Any, AsyncIterable, AsyncIterator, Dict, List, NamedTuple,
+                    Optional, Sequence, Tuple)
+
+from extras.extractors import InsightExtractor
+from extras.transcript import SENTENCE_SEPARATOR, TranscriptItems
+
+
+class TranscriptSegment(NamedTuple):
+    """
+    A result of a streaming transcription.
+
+    Transcribe streaming sends every result several times while the speaker talks,
+    partial and revised, until a last time with `is_partial` False; a final result
+    never changes again.
+
+    Attributes:
+        result_id (str): Identifies the result across its revisions.
+        text (str): The transcript of the result.
+        is_partial (bool): Whether the result may still change.
+        items (Sequence[Dict[str, Any]]): The words of the result, in the format of
+                                          the `results.items` of a Transcribe output.
+    """
+
+    result_id: str
+    text: str
+    is_partial: bool
+    items: Sequence[Dict[str, Any]] = ()
+
+
+class LiveInsightSession:
+    """
+    Extract insights from a transcript while it is being transcribed.
+
+    The final segments are appended to the transcript. Only the sentences completed
+    since the previous update are scanned, once, so the cost of an update depends
+    on the new text, not on the length of the call; their insights are final. The
+    unfinished last sentence and the partial segments are scanned again at every
+    update, their insights are provisional and replaced by the next update.
+
+    The final insights of the session are those a single pass over the finalized
+    transcript would extract, with the same sentence indexes (as for
+    `extras.parallel`, spaCy segments every part on its own).
+
+    Args:
+        extractor (InsightExtractor): The strategy for extracting insights.
+        trackers (List[str]): List of trackers to search for in the transcript.
+    """
+
+    def __init__(self, extractor: InsightExtractor, trackers: List[str]):
+        self.extractor = extractor
+        self.trackers = trackers
+        self.transcript_text = ""
+        self.insights: List[Dict[str, Any]] = []
+        self._partials: Dict[str, TranscriptSegment] = {}
+        # finalized text not scanned yet, and its words
+        self._scanned = 0
+        self._pending_items = TranscriptItems([], [], [], [])
+        self._sentence_count = 0
+        self._closed = False
+
+    def add_segment(self, segment: TranscriptSegment) -> Dict[str, Any]:
+        """
+        Args:
+            segment (TranscriptSegment): A partial or final segment.
+
+        Returns:
+            Dict[str, Any]: The `insights` of the sentences completed by the segment
+                and the provisional `partial_insights` of the text after them.
+        """
+        if self._closed:
+            raise ValueError("The session is closed")
+
+        new_insights: List[Dict[str, Any]] = []
+        if segment.is_partial:
+            self._partials[segment.result_id] = segment
+        else:
+            self._partials.pop(segment.result_id, None)
+            if segment.text:
+                self._append(segment)
+                cut = self.transcript_text.rfind(SENTENCE_SEPARATOR, self._scanned)
+                if cut >= 0:
+                    new_insights = self._scan(cut)
+
+        return {"insights": new_insights, "partial_insights": self._partial_insights()}
+
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        End the session, the text after the last sentence separator becomes the
+        last sentence. Partial segments left without a final revision are dropped.
+
+        Returns:
+            List[Dict[str, Any]]: The insights of the last sentence.
+        """
+        if self._closed:
+            return []
+        self._closed = True
+        self._partials.clear()
+        return self._scan(len(self.transcript_text))
+
+    def _append(self, segment: TranscriptSegment) -> None:
+        separator = " " if self.transcript_text else ""
+        self.transcript_text += separator + segment.text
+
+        items = TranscriptItems.from_transcribe_items(segment.items)
+        pending = self._pending_items
+        self._pending_items = TranscriptItems(
+            pending.start_times + items.start_times,
+            pending.end_times + items.end_times,
+            pending.confidences + items.confidences,
+            pending.contents + items.contents,
+        )
+
+    def _scan(self, end: int) -> List[Dict[str, Any]]:
+        """
+        Extract the final insights of the finalized text up to `end`, a sentence
+        separator or the end of the transcript.
+        """
+        pending_text = self.transcript_text[self._scanned :]
+        part_end = end - self._scanned
+        part_items = self._pending_items.slice(pending_text, 0, part_end)
+        insights = self._extract(pending_text[:part_end], part_items)
+
+        rest = part_end + len(SENTENCE_SEPARATOR)
+        self._pending_items = self._pending_items.slice(
+            pending_text, rest, len(pending_text)
+        )
+        self._scanned = end + len(SENTENCE_SEPARATOR)
+        self.insights.extend(insights)
+        return insights
+
+    def _partial_insights(self) -> List[Dict[str, Any]]:
+        pending_text = self.transcript_text[self._scanned :]
+        texts = [pending_text] if pending_text.strip() else []
+        texts.extend(segment.text for segment in self._partials.values())
+        if not texts:
+            return []
+
+        items = self._pending_items
+        for segment in self._partials.values():
+            partial_items = TranscriptItems.from_transcribe_items(segment.items)
+            items = TranscriptItems(
+                items.start_times + partial_items.start_times,
+                items.end_times + partial_items.end_times,
+                items.confidences + partial_items.confidences,
+                items.contents + partial_items.contents,
+            )
+        insights, _ = self._extract_part(" ".join(texts), items)
+        return insights
+
+    def _extract(
+        self, text: str, items: Optional[TranscriptItems]
+    ) -> List[Dict[str, Any]]:
+        insights, sentence_count = self._extract_part(text, items)
+        self._sentence_count += sentence_count
+        return insights
+
+    def _extract_part(
+        self, text: str, items: Optional[TranscriptItems]
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        insights, sentence_count = self.extractor.extract_insights_with_sentence_count(
+            text, self.trackers, items if items else None
+        )
+        for insight in insights:
+            insight["sentence_index"] += self._sentence_count
+        return insights, sentence_count
+
+
+async def stream_insights(
+    session: LiveInsightSession, segments: AsyncIterable[TranscriptSegment]
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Feed the segments of a streaming transcription into a session.
+
+    Args:
+        session (LiveInsightSession): The session of the call.
+        segments (AsyncIterable[TranscriptSegment]): The transcribed segments.
+
+    Yields:
+        Dict[str, Any]: The update of every segment, see `add_segment`, then the
+            insights of the last sentence when the stream ends.
+    """
+    async for segment in segments:
+        yield session.add_segment(segment)
+    yield {"insights": session.close(), "partial_insights": []}
+
+
+async def transcribe_audio_stream(
+    audio_chunks: AsyncIterable[bytes],
+    sample_rate: int,
+    media_encoding: str = "pcm",
+    language_code: str = "en-US",
+    region: Optional[str] = None,
+) -> AsyncIterator[TranscriptSegment]:
+    """
+    Transcribe audio with Transcribe streaming while it is being sent.
+
+    Transcribe streaming is an HTTP/2 API, not available in boto3: it requires the
+    `amazon-transcribe` package, imported on the first call. It accepts PCM, FLAC
+    and Ogg Opus audio, not MP3.
+
+    Args:
+        audio_chunks (AsyncIterable[bytes]): The audio, e.g. 100 ms chunks.
+        sample_rate (int): Sample rate of the audio, in Hz.
+        media_encoding (str): "pcm", "flac" or "ogg-opus".
+        language_code (str): Language of the audio.
+        region (Optional[str]): AWS region, the one of the Lambda by default.
+
+    Yields:
+        TranscriptSegment: The partial and final results, in the order received.
+    """
+    from amazon_transcribe.client import TranscribeStreamingClient
+
+    client = TranscribeStreamingClient(
+        region=region or os.getenv("AWS_REGION", "us-east-1")
+    )
+    stream = await client.start_stream_transcription(
+        language_code=language_code,
+        media_sample_rate_hz=sample_rate,
+        media_encoding=media_encoding,
+    )
+
+    async def send_audio() -> None:
+        async for chunk in audio_chunks:
+            await stream.input_stream.send_audio_event(audio_chunk=chunk)
+        await stream.input_stream.end_stream()
+
+    sender = asyncio.ensure_future(send_audio())
+    try:
+        async for event in stream.output_stream:
+            for result in event.transcript.results:
+                if not result.alternatives:
+                    continue
+                alternative = result.alternatives[0]
+                yield TranscriptSegment(
+                    result_id=result.result_id,
+                    text=alternative.transcript,
+                    is_partial=result.is_partial,
+                    items=[_transcribe_item(item) for item in alternative.items or ()],
+                )
+        await sender
+    finally:
+        if not sender.done():
+            sender.cancel()
+
+
+def _transcribe_item(item: Any) -> Dict[str, Any]:
+    """
+    Convert a streaming item to the format of the items of a Transcribe output.
+    """
+    return {
+        "type": item.item_type,
+        "start_time": item.start_time,
+        "end_time": item.end_time,
+        "alternatives": [
+            {"content": item.content, "confidence": item.confidence or 0.0}
+        ],
+    }
@@ -0,0 +1,161 @@
+import codecs
+import json
+from typing import Any, Dict, Iterable, Iterator
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class TranscribeOutputStream:
+    """
+    Forward-only reader of an AWS Transcribe output JSON document.
+
+    Only `results.transcripts[0].transcript` and, optionally, the elements of
+    `results.items` are decoded; everything else is skipped element by element.
+    The document is consumed chunk by chunk, so peak memory is bounded by the
+    chunk size plus the largest single element instead of the document size.
+
+    Transcribe writes `transcripts` before `items`, which is the order the values
+    have to be read in: `transcript()` first, then `items()`.
+
+    Args:
+        chunks (Iterable[bytes]): The raw document, e.g. `Body.iter_chunks()`.
+    """
+
+    _WHITESPACE = " \t\n\r"
+    _NUMBER_CHARS = "0123456789.eE+-"
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+        self._results = self._results_members()
+
+    def transcript(self) -> str:
+        """
+        Returns:
+            str: The transcript text.
+
+        Raises:
+            KeyError: If the document has no `results.transcripts[0].transcript`.
+        """
+        for name in self._results:
+            if name == "transcripts":
+                return self._value()[0]["transcript"]
+            self._skip()
+        raise KeyError("transcripts")
+
+    def items(self) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily iterate over `results.items`, one decoded item at a time.
+
+        Yields:
+            Dict[str, Any]: The next Transcribe item (pronunciation or punctuation).
+        """
+        for name in self._results:
+            if name == "items":
+                yield from (self._value() for _ in self._array())
+                return
+            self._skip()
+
+    def _results_members(self) -> Iterator[str]:
+        for name in self._object():
+            if name == "results":
+                yield from self._object()
+                return
+            self._skip()
+        raise KeyError("results")
+
+    def _object(self) -> Iterator[str]:
+        """Step into an object, yielding each key with the stream at its value."""
+        self._expect("{")
+        if self._peek() == "}":
+            self._position += 1
+            return
+        while True:
+            name = self._value()
+            self._expect(":")
+            yield name
+            if self._next_member("}"):
+                return
+
+    def _array(self) -> Iterator[None]:
+        """Step into an array, yielding with the stream at each element."""
+        self._expect("[")
+        if self._peek() == "]":
+            self._position += 1
+            return
+        while True:
+            yield
+            if self._next_member("]"):
+                return
+
+    def _next_member(self, closing: str) -> bool:
+        char = self._peek()
+        self._position += 1
+        if char == closing:
+            return True
+        if char != ",":
+            raise self._error(f"Expecting ',' or '{closing}'")
+        return False
+
+    def _skip(self) -> None:
+        """Skip a value, stepping into containers so only one child is held at once."""
+        char = self._peek()
+        if char == "{":
+            for _ in self._object():
+                self._value()
+        elif char == "[":
+            for _ in self._array():
+                self._value()
+        else:
+            self._value()
+
+    def _value(self) -> Any:
+        """Decode the complete value at the current position."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._position)
+                if self._eof or (
+                    end < len(self._buffer)
+                    and not self._number_continues(value, self._buffer[end])
+                ):
+                    self._position = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def _number_continues(self, value: Any, char: str) -> bool:
+        """A number cut by the end of the buffer may continue in the next chunk."""
+        return isinstance(value, (int, float)) and char in self._NUMBER_CHARS
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise self._error(f"Expecting '{char}'")
+        self._position += 1
+
+    def _peek(self) -> str:
+        while True:
+            while self._position < len(self._buffer):
+                if self._buffer[self._position] not in self._WHITESPACE:
+                    return self._buffer[self._position]
+                self._position += 1
+            if self._eof:
+                raise self._error("Unexpected end of document")
+            self._fill()
+
+    def _fill(self) -> None:
+        chunk = next(self._chunks, None)
+        self._buffer = self._buffer[self._position :] + self._decoder.decode(
+            chunk or b"", final=chunk is None
+        )
+        self._position = 0
+        self._eof = chunk is None
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._position)
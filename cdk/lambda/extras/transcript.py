@@ -0,0 +1,308 @@
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+SENTENCE_SEPARATOR = "."
+# how far past the previous word the next word is looked up in the transcript
+ALIGNMENT_WINDOW = 64
+# fewer insights than items / ratio are annotated by binary search, not a merge
+ANNOTATE_SEARCH_RATIO = 16
+
+
+class TranscriptIndex:
+    """
+    Sentence and word offsets of a transcript, built once per transcript.
+
+    Offsets are kept in compact unsigned integer arrays so that mapping a character
+    offset to its sentence and word index is a binary search instead of slicing and
+    re-tokenizing the text around every match.
+
+    Args:
+        text (str): The transcript text.
+        sentence_spans (Iterable[Tuple[int, int]]): Start and end character offsets
+                                                    of the sentences, in order.
+        word_starts (Iterable[int]): Start character offsets of the words, in order.
+    """
+
+    _WORD = re.compile(rf"[^\s{re.escape(SENTENCE_SEPARATOR)}]+")
+
+    def __init__(
+        self,
+        text: str,
+        sentence_spans: Iterable[Tuple[int, int]],
+        word_starts: Iterable[int],
+    ):
+        self.text = text
+        self.sentence_starts = array("I")
+        self.sentence_ends = array("I")
+        for start, end in sentence_spans:
+            self.sentence_starts.append(start)
+            self.sentence_ends.append(end)
+        self.word_starts = array("I", word_starts)
+        self.sentence_first_words = array(
+            "I",
+            (bisect_left(self.word_starts, start) for start in self.sentence_starts),
+        )
+        self.sentence_first_words.append(len(self.word_starts))
+
+    @classmethod
+    def from_text(cls, text: str) -> "TranscriptIndex":
+        """
+        Index a transcript split into sentences on periods and into words on
+        whitespace, the same way `str.split` would tokenize every sentence.
+
+        Args:
+            text (str): The transcript text.
+
+        Returns:
+            TranscriptIndex: The index of the transcript.
+        """
+        sentence_spans, position = [], 0
+        for sentence in text.split(SENTENCE_SEPARATOR):
+            sentence_spans.append((position, position + len(sentence)))
+            position += len(sentence) + len(SENTENCE_SEPARATOR)
+        return cls(text, sentence_spans, cls.find_word_starts(text))
+
+    @classmethod
+    def find_word_starts(cls, text: str) -> Iterator[int]:
+        """
+        Args:
+            text (str): The transcript text.
+
+        Returns:
+            Iterator[int]: The start character offset of every word, in order.
+        """
+        return (matched.start() for matched in cls._WORD.finditer(text))
+
+    def __len__(self) -> int:
+        return len(self.sentence_starts)
+
+    def sentence(self, sentence_index: int) -> str:
+        """
+        Args:
+            sentence_index (int): Index of the sentence.
+
+        Returns:
+            str: The text of the sentence.
+        """
+        return self.text[
+            self.sentence_starts[sentence_index] : self.sentence_ends[sentence_index]
+        ]
+
+    def sentence_index(self, offset: int) -> int:
+        """
+        Args:
+            offset (int): Character offset in the transcript.
+
+        Returns:
+            int: Index of the sentence the offset falls into.
+        """
+        return bisect_right(self.sentence_starts, offset) - 1
+
+    def word_index(self, offset: int, sentence_index: int) -> int:
+        """
+        Number of words of the sentence starting before the character offset,
+        i.e. `len(sentence[:offset].split())` for an offset inside the sentence.
+
+        Args:
+            offset (int): Character offset in the transcript.
+            sentence_index (int): Index of the sentence containing the offset.
+
+        Returns:
+            int: The word index within the sentence.
+        """
+        first_word = self.sentence_first_words[sentence_index]
+        last_word = self.sentence_first_words[sentence_index + 1]
+        return bisect_left(self.word_starts, offset, first_word, last_word) - first_word
+
+
+class TranscriptItems:
+    """
+    The pronunciation items of a Transcribe output, stored column by column.
+
+    Punctuation items carry no timing and are dropped. Each item is aligned to the
+    character offset of its word in the transcript text once, so the timing of any
+    character range is found without searching the items again.
+
+    Args:
+        start_times (Iterable[float]): Start of every word, in seconds.
+        end_times (Iterable[float]): End of every word, in seconds.
+        confidences (Iterable[float]): Confidence of every word.
+        contents (Iterable[str]): Text of every word.
+    """
+
+    def __init__(
+        self,
+        start_times: Iterable[float],
+        end_times: Iterable[float],
+        confidences: Iterable[float],
+        contents: Iterable[str],
+    ):
+        self.start_times = array("d", start_times)
+        self.end_times = array("d", end_times)
+        self.confidences = array("d", confidences)
+        self.contents = list(contents)
+        self._alignment: Optional[Tuple[str, array, array]] = None
+
+    @classmethod
+    def from_transcribe_items(
+        cls, items: Iterable[Dict[str, Any]]
+    ) -> "TranscriptItems":
+        """
+        Args:
+            items (Iterable[Dict[str, Any]]): The `results.items` of a Transcribe
+                                              output, e.g. `TranscribeOutputStream.items()`.
+
+        Returns:
+            TranscriptItems: The pronunciation items.
+        """
+        start_times, end_times = array("d"), array("d")
+        confidences, contents = array("d"), []
+        for item in items:
+            if item.get("type") != "pronunciation":
+                continue
+            alternative = item["alternatives"][0]
+            start_times.append(float(item["start_time"]))
+            end_times.append(float(item["end_time"]))
+            confidences.append(float(alternative.get("confidence", 0)))
+            contents.append(alternative["content"])
+        return cls(start_times, end_times, confidences, contents)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, List[Any]]) -> "TranscriptItems":
+        """
+        Args:
+            data (Dict[str, List[Any]]): The columns, as returned by `to_dict`.
+
+        Returns:
+            TranscriptItems: The items.
+        """
+        return cls(
+            data["start_time"], data["end_time"], data["confidence"], data["content"]
+        )
+
+    def to_dict(self) -> Dict[str, List[Any]]:
+        """
+        Returns:
+            Dict[str, List[Any]]: The columns as JSON serializable lists.
+        """
+        return {
+            "start_time": self.start_times.tolist(),
+            "end_time": self.end_times.tolist(),
+            "confidence": self.confidences.tolist(),
+            "content": self.contents,
+        }
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    def annotate(
+        self,
+        transcript_text: str,
+        insights: List[Dict[str, Any]],
+        spans: List[Tuple[int, int]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Add the `start_time`, `end_time` and mean `confidence` of the words covered
+        by every insight, None when no word is covered.
+
+        The insights are visited in order of their start and, separately, of their
+        end, so both the item boundaries are found by a single forward pass over
+        the items (a linear merge) instead of a search per insight. A few insights,
+        e.g. those of a single sentence, are binary searched instead.
+
+        Args:
+            transcript_text (str): The transcript text the spans refer to.
+            insights (List[Dict[str, Any]]): The insights, updated in place.
+            spans (List[Tuple[int, int]]): Start and end character offsets of every
+                                           insight in the transcript.
+
+        Returns:
+            List[Dict[str, Any]]: The insights.
+        """
+        item_starts, item_ends = self._align(transcript_text)
+
+        if len(spans) * ANNOTATE_SEARCH_RATIO < len(item_starts):
+            first_items = [bisect_right(item_ends, start) for start, _ in spans]
+            end_items = [bisect_left(item_starts, end) for _, end in spans]
+            return self._annotate_items(insights, first_items, end_items)
+
+        first_items = [0] * len(spans)
+        item = 0
+        for position in sorted(range(len(spans)), key=lambda i: spans[i][0]):
+            while item < len(item_ends) and item_ends[item] <= spans[position][0]:
+                item += 1
+            first_items[position] = item
+
+        end_items = [0] * len(spans)
+        item = 0
+        for position in sorted(range(len(spans)), key=lambda i: spans[i][1]):
+            while item < len(item_starts) and item_starts[item] < spans[position][1]:
+                item += 1
+            end_items[position] = item
+
+        return self._annotate_items(insights, first_items, end_items)
+
+    def _annotate_items(
+        self,
+        insights: List[Dict[str, Any]],
+        first_items: List[int],
+        end_items: List[int],
+    ) -> List[Dict[str, Any]]:
+        for insight, first, end in zip(insights, first_items, end_items):
+            if first < end:
+                insight["start_time"] = self.start_times[first]
+                insight["end_time"] = self.end_times[end - 1]
+                insight["confidence"] = sum(self.confidences[first:end]) / (end - first)
+            else:
+                insight.update(start_time=None, end_time=None, confidence=None)
+        return insights
+
+    def slice(self, transcript_text: str, start: int, end: int) -> "TranscriptItems":
+        """
+        Args:
+            transcript_text (str): The transcript text.
+            start (int): Start character offset of the part of the transcript.
+            end (int): End character offset of the part of the transcript.
+
+        Returns:
+            TranscriptItems: The items aligned within the part.
+        """
+        item_starts, _ = self._align(transcript_text)
+        first = bisect_left(item_starts, start)
+        last = bisect_left(item_starts, end, first)
+        return TranscriptItems(
+            self.start_times[first:last],
+            self.end_times[first:last],
+            self.confidences[first:last],
+            self.contents[first:last],
+        )
+
+    def _align(self, transcript_text: str) -> Tuple[array, array]:
+        """
+        Find the character range of every word in the transcript, walking both
+        forward together. A word not found within `ALIGNMENT_WINDOW` characters
+        gets an empty range at the current position.
+
+        Returns:
+            Tuple[array, array]: Start and end character offsets of the items.
+        """
+        if self._alignment is not None and self._alignment[0] == transcript_text:
+            return self._alignment[1:]
+
+        item_starts, item_ends = array("I"), array("I")
+        position = 0
+        for content in self.contents:
+            start = transcript_text.find(
+                content, position, position + len(content) + ALIGNMENT_WINDOW
+            )
+            if start < 0:
+                start, end = position, position
+            else:
+                end = position = start + len(content)
+            item_starts.append(start)
+            item_ends.append(end)
+
+        self._alignment = (transcript_text, item_starts, item_ends)
+        return item_starts, item_ends
@@ -0,0 +1,225 @@
+import gzip
+import hashlib
+import logging
+import os
+import time
+from typing import NamedTuple, Optional
+
+from botocore.exceptions import ClientError
+from extras.cache import LRUCache
+from extras.types import S3ClientType
+
+# transcripts of warm containers, keyed by transcription job name
+TRANSCRIPT_CACHE = LRUCache(maxsize=int(os.getenv("TRANSCRIPT_CACHE_SIZE", "32")))
+# seconds a cached transcript is served without checking its job again
+TRANSCRIPT_REVALIDATE_SECONDS = float(os.getenv("TRANSCRIPT_REVALIDATE_SECONDS", "300"))
+# optional persistent tier in the source bucket, disabled when empty
+TRANSCRIPT_CACHE_S3_PREFIX = os.getenv("TRANSCRIPT_CACHE_S3_PREFIX", "")
+# transcripts stored by the event-driven pipeline, disabled when empty
+TRANSCRIPT_RESULTS_S3_PREFIX = os.getenv("TRANSCRIPT_RESULTS_S3_PREFIX", "")
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+class CachedTranscript(NamedTuple):
+    """
+    The transcript of a completed transcription job, in the in-process cache.
+
+    Attributes:
+        version (str): Identifies the transcription, see
+                       `extras.handlers.transcript_version`.
+        transcript (str): The transcript text.
+        checked (float): When the version was read from the job, in seconds since
+                         the epoch.
+    """
+
+    version: str
+    transcript: str
+    checked: float
+
+
+def transcript_cache_key(job_name: str, version: str) -> str:
+    """
+    Build a compact cache key for the transcript of a transcription job.
+
+    Args:
+        job_name (str): The name of the transcription job.
+        version (str): Identifies the transcription of the audio object, see
+                       `extras.handlers.transcript_version`.
+
+    Returns:
+        str: A fixed length key identifying the transcript.
+    """
+    identity = f"{job_name}/{version}".encode("utf-8")
+    return hashlib.sha256(identity).hexdigest()[:32]
+
+
+def _persistent_key(cache_key: str) -> str:
+    return f"{TRANSCRIPT_CACHE_S3_PREFIX}{cache_key}.txt.gz"
+
+
+def get_fresh_transcript(job_name: str) -> Optional[CachedTranscript]:
+    """
+    Look up the transcript of a job in the in-process cache only, without any
+    AWS call.
+
+    Args:
+        job_name (str): The name of the transcription job.
+
+    Returns:
+        Optional[CachedTranscript]: The transcript and its version if the version
+            was read from the job less than `TRANSCRIPT_REVALIDATE_SECONDS` ago,
+            None otherwise.
+    """
+    cached = TRANSCRIPT_CACHE.get(job_name)
+    if cached is None or time.time() - cached.checked > TRANSCRIPT_REVALIDATE_SECONDS:
+        return None
+    return cached
+
+
+def get_cached_transcript(
+    bucket_name: str, job_name: str, version: str, s3_client: S3ClientType
+) -> Optional[str]:
+    """
+    Look up the transcript of a given version of a job in the in-process cache,
+    renewing its check time, then in the persistent S3 tier if it is enabled.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        job_name (str): The name of the transcription job.
+        version (str): Identifies the transcription of the audio object, see
+                       `extras.handlers.transcript_version`.
+        s3_client (S3ClientType): client to interact with s3 bucket
+
+    Returns:
+        Optional[str]: The transcript text, None if it is not cached.
+    """
+    cached = TRANSCRIPT_CACHE.get(job_name)
+    transcript = cached.transcript if cached and cached.version == version else None
+
+    if transcript is None and TRANSCRIPT_CACHE_S3_PREFIX:
+        try:
+            response = s3_client.get_object(
+                Bucket=bucket_name,
+                Key=_persistent_key(transcript_cache_key(job_name, version)),
+            )
+            transcript = gzip.decompress(response["Body"].read()).decode("utf-8")
+        except s3_client.exceptions.NoSuchKey:
+            pass
+        except ClientError as e:
+            logger.error(f"Cant read the cached transcript of {job_name}: {e}")
+
+    if transcript is not None:
+        TRANSCRIPT_CACHE.put(
+            job_name, CachedTranscript(version, transcript, time.time())
+        )
+    logger.info(f"Transcript cache: {TRANSCRIPT_CACHE.stats()}")
+    return transcript
+
+
+def cache_transcript(
+    bucket_name: str,
+    job_name: str,
+    version: str,
+    transcript: str,
+    s3_client: S3ClientType,
+) -> None:
+    """
+    Store the transcript of a job in the in-process cache and in the persistent
+    S3 tier if it is enabled. Failing to persist it is not an error.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        job_name (str): The name of the transcription job.
+        version (str): Identifies the transcription of the audio object, see
+                       `extras.handlers.transcript_version`.
+        transcript (str): The transcript text.
+        s3_client (S3ClientType): client to interact with s3 bucket
+    """
+    TRANSCRIPT_CACHE.put(job_name, CachedTranscript(version, transcript, time.time()))
+
+    if TRANSCRIPT_CACHE_S3_PREFIX:
+        try:
+            s3_client.put_object(
+                Bucket=bucket_name,
+                Key=_persistent_key(transcript_cache_key(job_name, version)),
+                Body=gzip.compress(transcript.encode("utf-8")),
+                ContentType="text/plain; charset=utf-8",
+                ContentEncoding="gzip",
+            )
+        except ClientError as e:
+            logger.error(f"Cant persist the transcript of {job_name}: {e}")
+
+
+def _result_key(key: str) -> str:
+    return f"{TRANSCRIPT_RESULTS_S3_PREFIX}{key}.txt.gz"
+
+
+def get_transcript_result(
+    bucket_name: str, key: str, job_name: str, s3_client: S3ClientType
+) -> Optional[CachedTranscript]:
+    """
+    Look up the transcript stored by the event-driven pipeline for an audio object,
+    a single S3 request replacing the HEAD and Transcribe status calls. A stored
+    transcript is kept in the in-process cache, see `get_fresh_transcript`.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        key (str): The key of the audio S3 object.
+        job_name (str): The name of its transcription job.
+        s3_client (S3ClientType): client to interact with s3 bucket
+
+    Returns:
+        Optional[CachedTranscript]: The transcript and its version, None if it was
+            not stored (yet).
+    """
+    if not TRANSCRIPT_RESULTS_S3_PREFIX:
+        return None
+
+    try:
+        response = s3_client.get_object(Bucket=bucket_name, Key=_result_key(key))
+        transcript = gzip.decompress(response["Body"].read()).decode("utf-8")
+    except s3_client.exceptions.NoSuchKey:
+        return None
+    except ClientError as e:
+        logger.error(f"Cant read the stored transcript of {bucket_name} {key}: {e}")
+        return None
+
+    version = response.get("Metadata", {}).get("transcript-version", "")
+    result = CachedTranscript(version, transcript, time.time())
+    TRANSCRIPT_CACHE.put(job_name, result)
+    return result
+
+
+def store_transcript_result(
+    bucket_name: str,
+    key: str,
+    job_name: str,
+    version: str,
+    transcript: str,
+    s3_client: S3ClientType,
+) -> None:
+    """
+    Store the transcript of an audio object for `get_transcript_result`, and in the
+    transcript cache.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        key (str): The key of the audio S3 object.
+        job_name (str): The name of its transcription job.
+        version (str): Identifies the transcription of the audio object, see
+                       `extras.handlers.transcript_version`.
+        transcript (str): The transcript text.
+        s3_client (S3ClientType): client to interact with s3 bucket
+    """
+    cache_transcript(bucket_name, job_name, version, transcript, s3_client)
+    if TRANSCRIPT_RESULTS_S3_PREFIX:
+        s3_client.put_object(
+            Bucket=bucket_name,
+            Key=_result_key(key),
+            Body=gzip.compress(transcript.encode("utf-8")),
+            ContentType="text/plain; charset=utf-8",
+            ContentEncoding="gzip",
+            Metadata={"transcript-version": version},
+        )
@@ -0,0 +1,103 @@
+import gzip
+import json
+import logging
+import os
+from typing import Optional
+
+from botocore.exceptions import ClientError
+from extras.cache import LRUCache
+from extras.transcript import TranscriptItems
+from extras.types import S3ClientType
+
+TRANSCRIPT_ITEMS_ENABLED = os.getenv("TRANSCRIPT_ITEMS_ENABLED", "False") == "True"
+# items of warm containers, keyed by transcription job name and transcript version
+TRANSCRIPT_ITEMS_CACHE = LRUCache(
+    maxsize=int(os.getenv("TRANSCRIPT_ITEMS_CACHE_SIZE", "32"))
+)
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def _items_key(job_name: str) -> str:
+    return f"{job_name}.items.json.gz"
+
+
+def store_transcript_items(
+    bucket_name: str,
+    job_name: str,
+    transcript_version: str,
+    items: TranscriptItems,
+    s3_client: S3ClientType,
+) -> None:
+    """
+    Store the columnar items next to the Transcribe output with the transcript
+    they were read with, and in the in-process cache. Failing to store them is
+    not an error.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        job_name (str): The name of the transcription job.
+        transcript_version (str): Identifies the transcript, see
+                                  `extras.handlers.transcript_version`.
+        items (TranscriptItems): The items of the job.
+        s3_client (S3ClientType): client to interact with s3 bucket
+    """
+    TRANSCRIPT_ITEMS_CACHE.put((bucket_name, job_name, transcript_version), items)
+    stored = {"transcript_version": transcript_version, "items": items.to_dict()}
+    try:
+        s3_client.put_object(
+            Bucket=bucket_name,
+            Key=_items_key(job_name),
+            Body=gzip.compress(json.dumps(stored).encode("utf-8")),
+            ContentType="application/json",
+            ContentEncoding="gzip",
+        )
+    except ClientError as e:
+        logger.error(f"Cant store the items of {bucket_name} {job_name}: {e}")
+
+
+def get_stored_transcript_items(
+    bucket_name: str, job_name: str, transcript_version: str, s3_client: S3ClientType
+) -> Optional[TranscriptItems]:
+    """
+    Look up the columnar items of a transcription job in the in-process cache,
+    then next to the Transcribe output. Items stored with another transcript
+    are ignored.
+
+    Args:
+        bucket_name (str): The name of the S3 bucket.
+        job_name (str): The name of the transcription job.
+        transcript_version (str): Identifies the transcript, see
+                                  `extras.handlers.transcript_version`.
+        s3_client (S3ClientType): client to interact with s3 bucket
+
+    Returns:
+        Optional[TranscriptItems]: The items, None if they were not stored for
+            this transcript.
+    """
+    cache_key = (bucket_name, job_name, transcript_version)
+    items = TRANSCRIPT_ITEMS_CACHE.get(cache_key)
+    if items is not None:
+        return items
+
+    try:
+        response = s3_client.get_object(Bucket=bucket_name, Key=_items_key(job_name))
+        stored = json.loads(gzip.decompress(response["Body"].read()))
+    except s3_client.exceptions.NoSuchKey:
+        return None
+    except (ClientError, ValueError) as e:
+        logger.error(f"Cant read the items of {bucket_name} {job_name}: {e}")
+        return None
+
+    if stored.get("transcript_version") != transcript_version:
+        logger.info(f"Items of {job_name} are outdated, they will be read again.")
+        return None
+    try:
+        items = TranscriptItems.from_dict(stored["items"])
+    except (KeyError, TypeError) as e:
+        logger.error(f"Cant read the items of {bucket_name} {job_name}: {e}")
+        return None
+
+    TRANSCRIPT_ITEMS_CACHE.put(cache_key, items)
+    return items
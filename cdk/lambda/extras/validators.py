@@ -1,11 +1,17 @@
+import base64
+import binascii
 import json
 import re
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 from botocore.exceptions import ClientError
-from extras.exception import S3ClientError, ValidationError
+from extras.audio import CONTENT_TYPE_FORMATS, MEDIA_FORMATS
+from extras.exception import (S3ClientError, S3ObjectNotFoundError,
+                              ValidationError)
 from extras.types import S3ClientType
 
+AUDIO_CONTENT_TYPES = frozenset(CONTENT_TYPE_FORMATS)
+
 
 def validate_input(body: Dict[str, Any], required_fields: Tuple[str]) -> Dict[str, Any]:
     """
@@ -84,7 +90,8 @@ def parse_s3_uri(interaction_url: str) -> tuple[str, str]:
     validate the S3 URI and extract the bucket name and key.
 
     This function performs the following:
-    1. Validates that the URI starts with "s3://" and ends with ".mp3".
+    1. Validates that the URI starts with "s3://" and ends with the extension of
+       an audio format supported by Transcribe, see `extras.audio.MEDIA_FORMATS`.
     2. Extracts the bucket name and key from the URI.
 
     Args:
@@ -95,9 +102,11 @@ def parse_s3_uri(interaction_url: str) -> tuple[str, str]:
             - If the URI is invalid, the dictionary will contain an 'error' key with details.
             - If the URI is valid, the dictionary will contain 'bucket_name' and 'key'.
     """
-    EXPECTED_S3_URI = "s3://<bucket_name>/<file_name>.mp3"
+    EXPECTED_S3_URI = f"s3://<bucket_name>/<file_name>.<{'|'.join(MEDIA_FORMATS)}>"
 
-    pattern = r"^s3://(?P<bucket_name>[^/]+)/(?P<key>.+\.mp3)$"
+    pattern = (
+        rf"^s3://(?P<bucket_name>[^/]+)/(?P<key>.+\.(?i:{'|'.join(MEDIA_FORMATS)}))$"
+    )
     match = re.match(pattern, interaction_url)
 
     if match:
@@ -169,12 +178,76 @@ def validate_trackers(trackers: Any) -> list[str]:
     return trackers
 
 
+def validate_interaction_urls(interaction_urls: Any, max_size: int) -> list[str]:
+    """
+    Validate the interaction URLs of a batch request to ensure it is a bounded
+    list of strings. Each URL is validated separately by `parse_s3_uri`.
+
+    Args:
+        interaction_urls (Any): The input to validate.
+        max_size (int): Maximum number of interactions in one batch.
+
+    Returns:
+       list[str]: A list with the validated interaction URLs.
+    """
+    if not isinstance(interaction_urls, list) or not all(
+        isinstance(interaction_url, str) for interaction_url in interaction_urls
+    ):
+        raise ValidationError(
+            {
+                "error": {
+                    "error": "Interaction URLs must be a list of strings",
+                    "error_message": "Invalid interaction_urls format",
+                }
+            }
+        )
+
+    if len(interaction_urls) > max_size:
+        raise ValidationError(
+            {
+                "error": {
+                    "error": f"At most {max_size} interaction URLs can be requested at once",
+                    "error_message": "Invalid interaction_urls format",
+                }
+            }
+        )
+
+    return interaction_urls
+
+
+def validate_pagination(body: Dict[str, Any]) -> Tuple[Optional[int], int]:
+    """
+    Validate the optional `limit` and `cursor` of a request.
+
+    Args:
+        body (Dict[str, Any]): The JSON body of the request.
+
+    Returns:
+        Tuple[Optional[int], int]: The maximum number of insights of the page, None
+            for all of them, and the index of the sentence the page starts at.
+    """
+    limit, cursor = body.get("limit"), body.get("cursor") or 0
+    for name, value, minimum in (("limit", limit, 1), ("cursor", cursor, 0)):
+        if value is None:
+            continue
+        if not isinstance(value, int) or isinstance(value, bool) or value < minimum:
+            raise ValidationError(
+                {
+                    "error": {
+                        "error": f"{name} must be an integer of at least {minimum}",
+                        "error_message": "Invalid pagination format",
+                    }
+                }
+            )
+    return limit, cursor
+
+
 def check_s3_object_exists(
     bucket_name: str,
     key: str,
     s3_client: S3ClientType,
     with_content_type_check: bool = True,
-) -> bool:
+) -> Dict[str, Any]:
     """
     Check if the S3 object exists and is of the correct type.
 
@@ -185,20 +258,20 @@ def check_s3_object_exists(
                                         to validate the object
         s3_client (S3ClientType): boto client to interact with s3 bucket
     Returns:
-        bool: Indicating the existance status
+        Dict[str, Any]: The head response of the existing object (ETag, ContentType, ...)
     """
     try:
         response = s3_client.head_object(Bucket=bucket_name, Key=key)
-        content_type = response["ContentType"]
-        if with_content_type_check and content_type not in {"audio/mpeg", "audio/mp3"}:
+        content_type = response.get("ContentType")
+        if with_content_type_check and content_type not in AUDIO_CONTENT_TYPES:
             raise ValidationError(
                 {
-                    "error": f"The file {bucket_name} {key} is not an mp3 or the content type is incorrect"
+                    "error": f"The file {bucket_name} {key} is not an audio file or the content type is incorrect"
                 }
             )
     except ClientError as e:
         if e.response["Error"]["Code"] == "404":
-            raise S3ClientError(
+            raise S3ObjectNotFoundError(
                 {"error": f"The specified object does not exist: {bucket_name} {key}"}
             )
         else:
@@ -211,11 +284,14 @@ def check_s3_object_exists(
                 }
             )
 
-    return True
+    return response
 
 
 def parse_body(event: Dict[str, Any]) -> Dict[str, Any]:
     try:
+        if event.get("isBase64Encoded"):
+            # API Gateway base64 encodes the bodies of its binary media types
+            return json.loads(base64.b64decode(event["body"]))
         return json.loads(event["body"])
-    except json.JSONDecodeError as e:
+    except (json.JSONDecodeError, binascii.Error, UnicodeDecodeError) as e:
         raise ValidationError({"error": f"Invalid JSON format: {str(e)}"})
@@ -1,25 +1,39 @@
 import logging
-from typing import Any, Dict
+import os
+import time
+from typing import Any, Dict, List, Optional
 
-import boto3
+from extras.clients import CALL_LATENCIES, get_client
 from extras.exception import (BaseError, S3ClientError, TranscriptionJobError,
                               ValidationError)
-from extras.extractors import (NATURAL_LANGUAGE_PROCESSING_PIPELINE,
-                               SimpleRegexInsightExtractor,
-                               SpacyNLPInsightExtractor)
-from extras.handlers import (handle_insights_extraction,
-                             handle_transcription_job)
-from extras.response import ResponseAWS
+from extras.extractors import (InsightExtractor, SimpleRegexInsightExtractor,
+                               create_spacy_extractor,
+                               create_static_vector_extractor)
+from extras.fuzzy_extractors import FuzzyInsightExtractor
+from extras.handlers import (handle_insights_extraction, handle_insights_page,
+                             handle_transcription_job,
+                             handle_transcription_jobs_batch)
+from extras.insights_index import get_insights_index
+from extras.job_status import retry_after
+from extras.metrics import flush_invocation_metrics
+from extras.profiler import profiled
+from extras.response import ResponseAWS, get_header, insights_body
 from extras.validators import (parse_body, parse_s3_uri, validate_input,
+                               validate_interaction_urls, validate_pagination,
                                validate_trackers)
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-s3 = boto3.client("s3")
-transcribe = boto3.client("transcribe")
+BATCH_MAX_INTERACTIONS = int(os.getenv("BATCH_MAX_INTERACTIONS", "100"))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "10"))
 
+# the clients are shared by the batch thread pool, see AWS_CLIENT_MAX_POOL_CONNECTIONS
+s3 = get_client("s3")
+transcribe = get_client("transcribe")
 
+
+@profiled
 def lambda_handler(event: Dict[str, Any], context: Any) -> ResponseAWS:
     """
     AWS Lambda function handler to process audio file transcription requests.
@@ -29,7 +43,26 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> ResponseAWS:
     2. Validates the URL format and checks the existence and content type
        of the specified S3 object.
     3. Checks the status of a transcription job and returns insights if completed,
-       or starts a new job if necessary.
+       or starts a new job if necessary. A pending job is answered with 202 and
+       a `Retry-After` header estimated from the duration of the audio.
+    4. With `INSIGHTS_INDEX_ENABLED`, answers the trackers from the precomputed
+       index of the transcript, built and stored on first use.
+    5. With `TRANSCRIPT_ITEMS_ENABLED`, adds the audio `start_time`, `end_time` and
+       mean word `confidence` of every insight.
+    6. With `METRICS_ENABLED`, logs the durations, sizes and cache hits of the
+       request as CloudWatch embedded metrics; with `PROFILER_INTERVAL_MS`, its
+       most sampled stacks.
+    7. Gzip encodes the responses of clients sending `Accept-Encoding: gzip`,
+       from `RESPONSE_GZIP_MIN_BYTES`.
+
+    A body with a `limit` gets a page of `limit` insights from the sentence
+    `cursor` (0 by default) on, completed with the other insights of its last
+    sentence, and the `next_cursor` of the following page, null after the last
+    one. The extraction stops at the end of the page.
+
+    A body with a list of `interaction_urls` instead of a single `interaction_url`
+    is handled as a batch: the lookups of all interactions run concurrently and the
+    response lists the status code and insights (or error) of every interaction.
 
     Args:
         event (Dict[str, Any]): The event dictionary passed by AWS Lambda
@@ -42,16 +75,42 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> ResponseAWS:
             - statusCode (int): The HTTP status code.
             - body (str): The response body as a JSON string. Contains error messages
               or transcription insights.
+            - headers (Dict[str, str]): The `Retry-After` of 202 responses and the
+              `Content-Encoding` of gzip encoded responses, when set.
 
     Headers:
-        - The `X-Spacy` header can be used to specify whether to use Spacy for tracker extraction.
+        - The `X-Spacy` header can be used to specify whether to use Spacy for tracker extraction,
+          `True` for the spaCy model or `static` for its exported static word vectors.
+        - The `X-Spacy-Match` header set to `phrase` makes Spacy match trackers to
+          the phrases of the sentences instead of the whole sentences.
+        - The `X-Fuzzy` header set to `True` matches trackers to words within a small
+          edit distance instead of exactly, when Spacy is not used.
+        - The `X-Response-Format` header set to `compact` writes the text of every
+          sentence once, in a `sentences` table keyed by the `sentence_index` of
+          the insights, instead of in their `transcribe_value`.
     """
-    spacy_enabled = event["headers"].get("X-Spacy", None) == "True"
+    started = time.perf_counter()
+    headers = event["headers"]
+    spacy_mode = get_header(headers, "X-Spacy")
+    phrase_matching = get_header(headers, "X-Spacy-Match") == "phrase"
+    fuzzy_matching = get_header(headers, "X-Fuzzy") == "True"
+    compact = get_header(headers, "X-Response-Format") == "compact"
+    accept_encoding = get_header(headers, "Accept-Encoding")
 
     try:
 
         body = parse_body(event)
 
+        if "interaction_urls" in body:
+            return handle_batch_request(
+                body,
+                spacy_mode,
+                phrase_matching,
+                fuzzy_matching,
+                compact=compact,
+                accept_encoding=accept_encoding,
+            )
+
         required_parameters = ("interaction_url", "trackers")
         validation_result = validate_input(body, required_parameters)
 
@@ -61,29 +120,161 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> ResponseAWS:
         )
 
         trackers = validate_trackers(trackers)
+        limit, cursor = validate_pagination(body)
         bucket_name, key = parse_s3_uri(interaction_url)
 
-        transcription_status, transcription_text = handle_transcription_job(
+        transcription = handle_transcription_job(
             bucket_name,
             key,
             s3_client=s3,
             transcribe_client=transcribe,
         )
 
-        if transcription_status != "COMPLETED":
-            return ResponseAWS(202, {"transcription status": transcription_status}).create_response()
+        if transcription.status != "COMPLETED":
+            return ResponseAWS(
+                202,
+                {"transcription status": transcription.status},
+                accept_encoding,
+                headers={"Retry-After": str(retry_after(transcription.job_name))},
+            ).create_response()
 
-        extractor = (
-            SimpleRegexInsightExtractor()
-            if not spacy_enabled
-            else SpacyNLPInsightExtractor(NATURAL_LANGUAGE_PROCESSING_PIPELINE)
-        )
-        insights = handle_insights_extraction(
-            transcription_text, trackers, extractor=extractor
+        transcription_text = transcription.transcript
+        extractor = get_extractor(spacy_mode, phrase_matching, fuzzy_matching)
+        index = get_insights_index(
+            bucket_name,
+            transcription.job_name,
+            transcription.version,
+            transcription_text,
+            extractor,
+            s3_client=s3,
         )
+        items = transcription.items
+
+        if limit is None and not cursor:
+            insights = handle_insights_extraction(
+                transcription_text, trackers, extractor, index=index, items=items
+            )
+            response_body = insights_body(insights, compact)
+        else:
+            insights, next_cursor = handle_insights_page(
+                transcription_text,
+                trackers,
+                extractor,
+                limit,
+                cursor,
+                index=index,
+                items=items,
+            )
+            response_body = dict(
+                insights_body(insights, compact), next_cursor=next_cursor
+            )
 
-        return ResponseAWS(200, {"insights": insights}).create_response()
+        return ResponseAWS(200, response_body, accept_encoding).create_response()
 
     except (ValidationError, S3ClientError, BaseError, TranscriptionJobError) as e:
         logger.error(f"An error occurred: {e}")
-        return ResponseAWS(400, {"error": e.get_error_message()}).create_response()
+        return ResponseAWS(
+            400, {"error": e.get_error_message()}, accept_encoding
+        ).create_response()
+
+    finally:
+        request_ms = (time.perf_counter() - started) * 1000
+        call_latencies = CALL_LATENCIES.reset()
+        logger.info(
+            f"Request handled in {request_ms:.1f} ms "
+            f"with {sum(stats['calls'] for stats in call_latencies.values())} "
+            f"AWS calls: {call_latencies}"
+        )
+        flush_invocation_metrics(context, call_latencies, request_ms)
+
+
+def handle_batch_request(
+    body: Dict[str, Any],
+    spacy_mode: Optional[str],
+    phrase_matching: bool = False,
+    fuzzy_matching: bool = False,
+    compact: bool = False,
+    accept_encoding: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Process a batch of interactions sharing the same trackers.
+
+    Args:
+        body (Dict[str, Any]): The parsed request body with `interaction_urls`
+                               and `trackers`.
+        spacy_mode (Optional[str]): The value of the `X-Spacy` header.
+        phrase_matching (bool): Whether Spacy matches trackers to phrases.
+        fuzzy_matching (bool): Whether trackers are matched within an edit distance.
+        compact (bool): Whether the insights are written in the compact format.
+        accept_encoding (Optional[str]): The `Accept-Encoding` header of the request.
+
+    Returns:
+        Dict[str, Any]: The HTTP response, its body holds one result per interaction,
+            in the order of the request, each with its own `status_code`.
+    """
+    required_parameters = ("interaction_urls", "trackers")
+    validation_result = validate_input(body, required_parameters)
+
+    interaction_urls = validate_interaction_urls(
+        validation_result["interaction_urls"], max_size=BATCH_MAX_INTERACTIONS
+    )
+    trackers = validate_trackers(validation_result["trackers"])
+
+    # the items and index of every completed transcript are looked up on the pool
+    extractor = get_extractor(spacy_mode, phrase_matching, fuzzy_matching)
+    transcriptions = handle_transcription_jobs_batch(
+        interaction_urls,
+        s3_client=s3,
+        transcribe_client=transcribe,
+        max_workers=BATCH_MAX_WORKERS,
+        extractor=extractor,
+    )
+
+    results: List[Dict[str, Any]] = []
+    for interaction_url, transcription in zip(interaction_urls, transcriptions):
+        result = {"interaction_url": interaction_url}
+        if isinstance(transcription, BaseError):
+            logger.error(f"An error occurred for {interaction_url}: {transcription}")
+            result.update(status_code=400, error=transcription.get_error_message())
+        elif transcription.status != "COMPLETED":
+            result.update(
+                status_code=202,
+                retry_after=retry_after(transcription.job_name),
+                **{"transcription status": transcription.status},
+            )
+        else:
+            insights = handle_insights_extraction(
+                transcription.transcript,
+                trackers,
+                extractor=extractor,
+                index=transcription.index,
+                items=transcription.items,
+            )
+            result.update(status_code=200, **insights_body(insights, compact))
+        results.append(result)
+
+    return ResponseAWS(200, {"results": results}, accept_encoding).create_response()
+
+
+def get_extractor(
+    spacy_mode: Optional[str],
+    phrase_matching: bool = False,
+    fuzzy_matching: bool = False,
+) -> InsightExtractor:
+    """
+    Args:
+        spacy_mode (Optional[str]): The value of the `X-Spacy` header, `True` for
+                                    the spaCy model, `static` for its static vectors.
+        phrase_matching (bool): Whether Spacy matches trackers to phrases.
+        fuzzy_matching (bool): Whether trackers are matched within an edit distance.
+
+    Returns:
+        InsightExtractor: The strategy for extracting insights.
+    """
+    if spacy_mode == "True":
+        return create_spacy_extractor(phrase_matching)
+    if spacy_mode == "static":
+        return create_static_vector_extractor(phrase_matching)
+    if fuzzy_matching:
+        return FuzzyInsightExtractor()
+    return SimpleRegexInsightExtractor()
@@ -0,0 +1,118 @@
+"""
+Export the static word vectors of a spaCy model to the memory-mapped table read
+by `extras.static_vectors`, so the Lambda can compare sentences and trackers
+without packaging spaCy and the model.
+
+The output directory holds:
+- vectors.npy: the vector rows used by the exported words.
+- rows.npy: the row of every word of vocabulary.txt, in the same order.
+- vocabulary.txt: one lower-cased word per line.
+- meta.json: the model the vectors come from.
+
+Usage:
+    python export_static_vectors.py --output /lambda/static-vectors [--model en_core_web_md]
+        [--max-words 200000] [--vocabulary words.txt] [--dtype float16]
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, Optional, Set
+
+import numpy
+import spacy
+
+
+def read_vocabulary(path: Optional[str]) -> Optional[Set[str]]:
+    if path is None:
+        return None
+    with open(path, encoding="utf-8") as vocabulary_file:
+        return {line.strip().lower() for line in vocabulary_file if line.strip()}
+
+
+def word_rows(
+    nlp: spacy.language.Language,
+    vocabulary: Optional[Set[str]],
+    max_words: int,
+) -> Dict[str, int]:
+    """
+    Args:
+        nlp (Language): The spaCy model.
+        vocabulary (Optional[Set[str]]): Words to export, all when None.
+        max_words (int): Maximum number of words, 0 for no limit.
+
+    Returns:
+        Dict[str, int]: The model table row of every exported lower-cased word. A
+            word only known capitalized gets the vector of that form, as the
+            extractor looks up lower-cased tokens.
+    """
+    vectors = nlp.vocab.vectors
+    rows: Dict[str, int] = {}
+    # lower-cased forms first, they win over the other casings of the word
+    entries = sorted(
+        (
+            (nlp.vocab.strings[key], row)
+            for key, row in vectors.key2row.items()
+            if key in nlp.vocab.strings
+        ),
+        key=lambda entry: (entry[0] != entry[0].lower(), entry[1]),
+    )
+    for word, row in entries:
+        lower = word.lower()
+        if not lower or any(character.isspace() for character in lower):
+            continue
+        if vocabulary is not None and lower not in vocabulary:
+            continue
+        rows.setdefault(lower, row)
+
+    if max_words and len(rows) > max_words:
+        # keeps the words of the first rows of the model table
+        rows = dict(sorted(rows.items(), key=lambda item: item[1])[:max_words])
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="en_core_web_md")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--max-words", type=int, default=0)
+    parser.add_argument("--vocabulary", default=None)
+    parser.add_argument("--dtype", choices=("float32", "float16"), default="float32")
+    args = parser.parse_args()
+
+    nlp = spacy.load(args.model)
+    vectors = nlp.vocab.vectors
+    if vectors.size == 0 or vectors.mode != "default":
+        raise SystemExit(f"{args.model} has no table of static vectors to export")
+
+    rows = word_rows(nlp, read_vocabulary(args.vocabulary), args.max_words)
+    words = list(rows)
+    model_rows = numpy.array([rows[word] for word in words], dtype="int64")
+    # rows shared by several words are exported once
+    used_rows, word_table_rows = numpy.unique(model_rows, return_inverse=True)
+    table = numpy.asarray(vectors.data)[used_rows].astype(args.dtype)
+
+    os.makedirs(args.output, exist_ok=True)
+    numpy.save(os.path.join(args.output, "vectors.npy"), table)
+    numpy.save(os.path.join(args.output, "rows.npy"), word_table_rows.astype("int32"))
+    with open(
+        os.path.join(args.output, "vocabulary.txt"), "w", encoding="utf-8"
+    ) as vocabulary_file:
+        vocabulary_file.write("\n".join(words))
+    with open(os.path.join(args.output, "meta.json"), "w", encoding="utf-8") as meta:
+        json.dump(
+            {
+                "model": f"{nlp.meta['lang']}_{nlp.meta['name']}-{nlp.meta['version']}",
+                "dtype": args.dtype,
+            },
+            meta,
+        )
+
+    print(
+        f"Exported {len(words)} words and {table.shape[0]}x{table.shape[1]} "
+        f"{args.dtype} vectors ({table.nbytes / 2**20:.1f} MiB) to {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
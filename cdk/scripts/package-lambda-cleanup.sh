@@ -12,6 +12,6 @@ if [ ! -d "$LAMBDA_DIR" ]; then
 fi
 
 # Preserve specific files and directories
-find "$LAMBDA_DIR" -mindepth 1 -maxdepth 1 ! -name 'lambda_function.py' ! -name 'requirements' ! -name 'extras' -exec rm -rf {} +
+find "$LAMBDA_DIR" -mindepth 1 -maxdepth 1 ! -name 'lambda_function.py' ! -name 'events_function.py' ! -name 'requirements' ! -name 'extras' -exec rm -rf {} +
 
 echo "Lambda packaging cleanup completed successfully."
\ No newline at end of file
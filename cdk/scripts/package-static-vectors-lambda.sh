@@ -0,0 +1,36 @@
+#!/bin/bash
+
+set -e
+set -o pipefail
+set -u
+
+
+LAMBDA_DIR="/lambda"
+REQUIREMENTS_DIR="$LAMBDA_DIR/requirements"
+REQUIREMENTS_FILE="static-vectors-requirements.txt"
+SPACY_REQUIREMENTS_FILE="spacy-requirements.txt"
+SPACY_MODEL="en_core_web_md"
+# spaCy and the model are only needed for the export, not packaged
+EXPORT_DIR="/tmp/static-vectors-export"
+
+if [ ! -d "$LAMBDA_DIR" ]; then
+  echo "Error: The lambda directory does not exist."
+  exit 1
+fi
+
+if [ ! -d "$REQUIREMENTS_DIR" ]; then
+  echo "Error: The requirements directory does not exist in lambda directory."
+  exit 1
+fi
+
+
+pip install --target "$EXPORT_DIR" -r "$REQUIREMENTS_DIR/$SPACY_REQUIREMENTS_FILE" --no-cache-dir
+MODEL_URL=$(PYTHONPATH="$EXPORT_DIR" python -m spacy info "$SPACY_MODEL" --url)
+pip install --target "$EXPORT_DIR" "$MODEL_URL" --no-cache-dir
+PYTHONPATH="$EXPORT_DIR" python "$(dirname "$0")/export_static_vectors.py" --model "$SPACY_MODEL" --output "$LAMBDA_DIR/static-vectors"
+rm -rf "$EXPORT_DIR"
+
+pip install --target "$LAMBDA_DIR" -r "$REQUIREMENTS_DIR/$REQUIREMENTS_FILE" --no-cache-dir
+
+
+echo "Lambda packaging completed for static vectors successfully."
@@ -5,6 +5,9 @@
 
 package-spacy-lambda.sh
 
+# static word vectors for the `x-spacy: static` header, without spaCy
+# package-static-vectors-lambda.sh
+
 cdk-deploy.sh
 
 copy-media-2-s3.sh